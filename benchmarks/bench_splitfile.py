@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+"""SplitFile benchmark suite
+
+Generates synthetic files and measures chunk iteration, random access,
+reading, line reading, hashing and membership tests across a grid of file
+sizes, chunk sizes and SplitFile modes. Results are printed as a table and
+can be written as JSON and compared against an earlier run::
+
+    python benchmarks/bench_splitfile.py --json new.json
+    python benchmarks/bench_splitfile.py --json new.json --compare old.json
+
+The synthetic data is deterministic for a given `--seed`; about one byte in
+64 is a newline so the line oriented benchmarks have something to split.
+"""
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import splitfile  # noqa: E402
+
+from splitfile import SplitFile  # noqa: E402
+
+
+MODES = {
+    'default': {},
+    'positional': {'positional': True},
+    'mmap': {'use_mmap': True},
+}
+
+# bytes 0-3 become newlines, so lines average 64 bytes
+_NEWLINES = bytes(bytearray(10 if i < 4 else i for i in range(256)))
+
+
+def parse_size(value):
+    units = {'K': 2**10, 'M': 2**20, 'G': 2**30}
+    value = value.strip().upper()
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def generate(path, size, seed):
+    rand = random.Random(seed)
+    block_size = 2**20
+    with io.open(path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            length = min(block_size, remaining)
+            data = rand.getrandbits(8 * length).to_bytes(length, 'little')
+            f.write(data.translate(_NEWLINES))
+            remaining -= length
+
+
+def bench_iter(split_file, seed):
+    chunks = 0
+    for _ in split_file:
+        chunks += 1
+    return 0, chunks
+
+
+def bench_getitem(split_file, seed):
+    indices = list(range(len(split_file)))
+    random.Random(seed).shuffle(indices)
+    for index in indices:
+        split_file[index]
+    return 0, len(indices)
+
+
+def bench_read(split_file, seed):
+    size = chunks = 0
+    for chunk in split_file:
+        size += len(chunk.read())
+        chunks += 1
+    return size, chunks
+
+
+def bench_readline(split_file, seed):
+    size = chunks = 0
+    for chunk in split_file:
+        for line in iter(chunk.readline, b''):
+            size += len(line)
+        chunks += 1
+    return size, chunks
+
+
+def bench_readlines(split_file, seed):
+    size = chunks = 0
+    for chunk in split_file:
+        size += sum(len(l) for l in chunk.readlines())
+        chunks += 1
+    return size, chunks
+
+
+def bench_md5(split_file, seed):
+    size = chunks = 0
+    for chunk in split_file:
+        chunk.md5
+        size += chunk.size
+        chunks += 1
+    return size, chunks
+
+
+def bench_contains(split_file, seed, queries=1000):
+    # includes building the digest index on the first query
+    rand = random.Random(seed)
+    length = len(split_file)
+    candidates = [split_file[rand.randrange(length)] for _ in range(16)]
+    for i in range(queries):
+        candidates[i % len(candidates)] in split_file
+    return split_file.size, queries
+
+
+BENCHMARKS = [
+    ('iter', bench_iter),
+    ('getitem_random', bench_getitem),
+    ('read', bench_read),
+    ('readline', bench_readline),
+    ('readlines', bench_readlines),
+    ('md5', bench_md5),
+    ('contains', bench_contains),
+]
+
+
+def run(path, file_size, chunk_size, mode, name, func, repeat, seed):
+    best = None
+    for _ in range(repeat):
+        # a fresh SplitFile per run so cached digests don't carry over
+        split_file = SplitFile(path, chunk_size, **MODES[mode])
+        try:
+            start = time.perf_counter()
+            size, count = func(split_file, seed)
+            elapsed = time.perf_counter() - start
+        finally:
+            split_file.close()
+        if best is None or elapsed < best[0]:
+            best = (elapsed, size, count)
+    elapsed, size, count = best
+    size = size or file_size
+    return {
+        'benchmark': name,
+        'mode': mode,
+        'file_size': file_size,
+        'chunk_size': chunk_size,
+        'count': count,
+        'seconds': elapsed,
+        'mb_per_s': size / elapsed / 1e6 if elapsed else None,
+        'us_per_item': elapsed / count * 1e6 if count else None,
+    }
+
+
+def key(result):
+    return (result['benchmark'], result['mode'], result['file_size'],
+            result['chunk_size'])
+
+
+def print_results(results, baseline=None, threshold=0.1):
+    baseline = dict((key(r), r) for r in (baseline or []))
+    regressions = []
+    header = '{:<15} {:<11} {:>10} {:>9} {:>10} {:>11}'.format(
+        'benchmark', 'mode', 'file_size', 'chunk', 'MB/s', 'us/item')
+    if baseline:
+        header += ' {:>8}'.format('vs base')
+    print(header)
+    for result in results:
+        line = '{:<15} {:<11} {:>10} {:>9} {:>10.1f} {:>11.3f}'.format(
+            result['benchmark'], result['mode'], result['file_size'],
+            result['chunk_size'], result['mb_per_s'] or 0,
+            result['us_per_item'] or 0)
+        base = baseline.get(key(result))
+        if base and base['mb_per_s'] and result['mb_per_s']:
+            ratio = result['mb_per_s'] / base['mb_per_s']
+            line += ' {:>7.2f}x'.format(ratio)
+            if ratio < 1 - threshold:
+                regressions.append(result)
+                line += ' !'
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--file-sizes', default='16M',
+                        help='comma separated file sizes (default: %(default)s)')
+    parser.add_argument('--chunk-sizes', default='4K,64K,1M',
+                        help='comma separated chunk sizes '
+                             '(default: %(default)s)')
+    parser.add_argument('--modes', default=','.join(sorted(MODES)),
+                        help='comma separated SplitFile modes '
+                             '(default: %(default)s)')
+    parser.add_argument('--benchmarks',
+                        default=','.join(n for n, _ in BENCHMARKS),
+                        help='comma separated benchmarks '
+                             '(default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per benchmark, the best one is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--compare', help='compare against earlier results')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    benchmarks = dict(BENCHMARKS)
+    names = args.benchmarks.split(',')
+    modes = args.modes.split(',')
+    for name in names:
+        if name not in benchmarks:
+            parser.error('unknown benchmark {}'.format(name))
+    for mode in modes:
+        if mode not in MODES:
+            parser.error('unknown mode {}'.format(mode))
+
+    results = []
+    directory = tempfile.mkdtemp(prefix='splitfile-bench-')
+    try:
+        for file_size in [parse_size(s) for s in args.file_sizes.split(',')]:
+            path = os.path.join(directory, 'data-{}.bin'.format(file_size))
+            generate(path, file_size, args.seed)
+            for chunk_size in [parse_size(s)
+                               for s in args.chunk_sizes.split(',')]:
+                for mode in modes:
+                    for name in names:
+                        results.append(run(path, file_size, chunk_size, mode,
+                                           name, benchmarks[name],
+                                           args.repeat, args.seed))
+    finally:
+        shutil.rmtree(directory)
+
+    baseline = None
+    if args.compare:
+        with io.open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    regressions = print_results(results, baseline, args.threshold)
+
+    if args.json:
+        with io.open(args.json, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'meta': {
+                    'splitfile': splitfile.__version__,
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'seed': args.seed,
+                    'repeat': args.repeat,
+                },
+                'results': results,
+            }, indent=2, sort_keys=True))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
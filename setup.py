@@ -47,12 +47,19 @@ setup(name='splitfile',
       packages=find_packages(exclude=('tests',)),
       test_suite='nose2.collector.collector',
       install_requires=[
-          'six'
+          'six',
+          'futures; python_version < "3"'
       ],
       extras_require={
+          'crc32c': [
+              'crc32c'
+          ],
           'dev': [
               'ipdb'
           ],
+          'zstd': [
+              'zstandard'
+          ],
           'test': [
               'nose2',
               'cov-core',
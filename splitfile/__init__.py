@@ -1,2 +1,19 @@
+import sys
+
 from ._version import __version__
-from .splitfile import SplitFile
+from .splitfile import ChunkView, SplitFile
+from .manifest import ChunkRecord, Manifest
+from .merkle import MerkleTree, composite_etag
+from .upload import MultipartUploader, upload_parts
+from .chunkers import Chunker, FastCDC, LayoutChunker, RecordChunker
+from .planner import PartPlanner
+from .stream import StreamChunk, StreamSplitFile
+from .compressed import CompressedChunk, CompressedSplitFile
+from .multi import MultiChunk, MultiSplitFile
+from .parallel import ChunkDescriptor, open_chunk
+from .buffers import BufferPool
+from .stats import IOEvent, IOStats
+from .text import TextChunk, TextCodec
+
+if sys.version_info >= (3, 5, 2):
+    from .aio import AsyncChunk, AsyncSplitFile
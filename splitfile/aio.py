@@ -0,0 +1,191 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import asyncio
+import functools
+import os
+
+from . import digest
+from .splitfile import SplitFile
+
+
+class AsyncChunk(object):
+    """asyncio counterpart of `Chunk`
+
+    Reads and digests run on an executor so they never block the event loop.
+    If the chunk was prefetched its contents are already in memory (or on
+    their way) and reads are served from there.
+    """
+    def __init__(self, split_file, chunk, index, prefetched=None):
+        self._split_file = split_file
+        self._chunk = chunk
+        self._index = index
+        self._prefetched = prefetched
+
+    def _run(self, func, *args):
+        return self._split_file._run(func, *args)
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def offset(self):
+        return self._chunk.offset
+
+    @property
+    def size(self):
+        return self._chunk.size
+
+    @property
+    def closed(self):
+        return self._chunk.closed
+
+    @property
+    def chunk(self):
+        """The underlying (synchronous) `Chunk`"""
+        return self._chunk
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._chunk.seek(offset, whence)
+
+    def tell(self):
+        return self._chunk.tell()
+
+    async def read(self, size=-1):
+        if self._prefetched is None:
+            return await self._run(self._chunk.read, size)
+        data = await self._prefetched
+        pos = self._chunk.tell()
+        size = self._chunk.bytes_remaining if size < 0 else size
+        self._chunk.seek(size, os.SEEK_CUR)
+        return data[pos:self._chunk.tell()]
+
+    async def readinto(self, buffer_):
+        if self._prefetched is None:
+            return await self._run(self._chunk.readinto, buffer_)
+        data = await self._prefetched
+        view = memoryview(buffer_).cast('B')
+        pos = self._chunk.tell()
+        size = min(len(view), self._chunk.bytes_remaining)
+        view[:size] = data[pos:pos + size]
+        self._chunk.seek(size, os.SEEK_CUR)
+        return size
+
+    async def digests(self, algorithms=('md5', )):
+        if self._prefetched is None:
+            return await self._run(self._chunk.digests, algorithms)
+        # hash the prefetched contents instead of reading the chunk again
+        data = await self._prefetched
+        chunk = self._chunk
+        cached = chunk._container._cached_digests(chunk.offset, chunk.size)
+        missing = [a for a in algorithms if a not in cached]
+        if missing:
+            cached.update(await self._run(digest.compute, [data], missing))
+        return dict((a, cached[a]) for a in algorithms)
+
+    async def md5(self):
+        return (await self.digests(('md5', )))['md5']
+
+    def close(self):
+        if self._prefetched is not None:
+            self._prefetched.cancel()
+            self._prefetched = None
+        self._chunk.close()
+
+
+class AsyncSplitFile(object):
+    """AsyncSplitFile class
+
+    asyncio counterpart of `SplitFile`. Supports `async for chunk in ...`,
+    yielding `AsyncChunk` objects whose reads are offloaded to `executor`
+    (the loop's default executor if not given). While a chunk is being
+    processed the contents of the next `prefetch` chunks are already being
+    read.
+
+    The remaining arguments are passed to `SplitFile`; positional reads are
+    always used.
+    """
+    def __init__(self, file_, chunk_size=2**20, prefetch=2, executor=None,
+                 **kwargs):
+        if prefetch < 0:
+            raise ValueError('prefetch must be >= 0')
+        kwargs['positional'] = True
+        self._split_file = SplitFile(file_, chunk_size, **kwargs)
+        self._prefetch = prefetch
+        self._executor = executor
+        self._pending = {}
+        self._index = 0
+
+    def _run(self, func, *args):
+        try:
+            loop = asyncio.get_running_loop()
+        except AttributeError:
+            loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self._executor,
+                                    functools.partial(func, *args))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._split_file)
+
+    def __aiter__(self):
+        self._cancel_pending()
+        self._index = 0
+        return self
+
+    async def __anext__(self):
+        length = len(self._split_file)
+        index = self._index
+        if index >= length:
+            raise StopAsyncIteration()
+        self._index += 1
+        prefetched = self._pending.pop(index, None)
+        for ahead in range(index + 1,
+                           min(index + 1 + self._prefetch, length)):
+            if ahead not in self._pending:
+                self._pending[ahead] = self._read_chunk(ahead)
+        if prefetched is None and self._prefetch:
+            prefetched = self._read_chunk(index)
+        return AsyncChunk(self, self._split_file[index], index, prefetched)
+
+    def _read_chunk(self, index):
+        offset, size = self._split_file._extent(index)
+        return self._run(self._split_file._pread, size, offset)
+
+    def chunk(self, index):
+        """Return an `AsyncChunk` for chunk `index` (without prefetching)"""
+        index = len(self) + index if index < 0 else index
+        return AsyncChunk(self, self._split_file[index], index)
+
+    async def digests(self, algorithms=('md5', ), workers=None):
+        """Awaitable `SplitFile.digests`"""
+        return await self._run(self._split_file.digests, algorithms, workers)
+
+    def _cancel_pending(self):
+        for future in self._pending.values():
+            future.cancel()
+        self._pending = {}
+
+    def close(self):
+        self._cancel_pending()
+        self._split_file.close()
+
+    @property
+    def split_file(self):
+        """The underlying (synchronous) `SplitFile`"""
+        return self._split_file
+
+    @property
+    def prefetch(self):
+        return self._prefetch
+
+    @property
+    def chunk_size(self):
+        return self._split_file.chunk_size
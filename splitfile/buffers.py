@@ -0,0 +1,82 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import threading
+import weakref
+
+
+class _Buffer(bytearray):
+    """A `bytearray` the pool can keep track of without keeping it alive"""
+    __slots__ = ('__weakref__', )
+
+
+class BufferPool(object):
+    """BufferPool class
+
+    Hands out `bytearray` buffers of `buffer_size` bytes and takes them back
+    for reuse, so reading many chunks doesn't allocate a buffer per read.
+    Pass one to `SplitFile` (usually sized to its `chunk_size`) and chunks
+    borrow from it for `Chunk.borrow`, `Chunk.digests` and
+    `SplitFile.read_chunks`.
+
+    The pool owns at most `max_bytes` of buffers (no limit if `None`), lent
+    out or free. Beyond that `acquire` returns buffers the pool doesn't
+    keep when they are released. A lent out buffer that is dropped without
+    being released stops counting once it is garbage collected, it is never
+    handed out again.
+    """
+    def __init__(self, buffer_size, max_bytes=None):
+        if buffer_size < 1:
+            raise ValueError('buffer_size must be >= 1')
+        self._buffer_size = buffer_size
+        self._max_bytes = max_bytes
+        self._free = []
+        # id -> buffer of the buffers lent out, the free ones are kept alive
+        # by `_free`
+        self._lent = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Return a buffer, reused if one is free"""
+        with self._lock:
+            if self._free:
+                buffer_ = self._free.pop()
+            elif self._max_bytes is None or \
+                    self.total_bytes + self._buffer_size <= self._max_bytes:
+                buffer_ = _Buffer(self._buffer_size)
+            else:
+                return bytearray(self._buffer_size)
+            self._lent[id(buffer_)] = buffer_
+            return buffer_
+
+    def release(self, buffer_):
+        """Return `buffer_` (or a `memoryview` of it) to the pool
+
+        The buffer must not be used afterwards. Buffers not owned by the
+        pool are ignored.
+        """
+        if isinstance(buffer_, memoryview):
+            buffer_ = buffer_.obj
+        with self._lock:
+            if self._lent.get(id(buffer_)) is buffer_:
+                del self._lent[id(buffer_)]
+                self._free.append(buffer_)
+
+    @property
+    def buffer_size(self):
+        return self._buffer_size
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @property
+    def total_bytes(self):
+        """Size of the buffers owned by the pool"""
+        return (len(self._lent) + len(self._free)) * self._buffer_size
+
+    @property
+    def free_bytes(self):
+        """Size of the buffers ready for reuse"""
+        return len(self._free) * self._buffer_size
@@ -2,27 +2,68 @@ from __future__ import (
     absolute_import, division, print_function, unicode_literals
 )
 
-import hashlib
+import io
 import logging
 import os
 
+from contextlib import contextmanager
 from functools import wraps
 
+import six
+
+from . import digest, ranges
+from .stats import instrumented
+
 
 class Chunk(object):
-    hash_chunk_size = 8192
+    __slots__ = (
+        '_container', '_offset', '_size', '_closed', '_positional', '_pos',
+        '_lbuf', '_lbuf_start',
+    )
 
-    def __init__(self, container):
+    hash_chunk_size = 2**20
+    line_chunk_size = 2**16
+
+    def __init__(self, container, offset=None, size=None):
         self._container = container
-        self._size = min(container.chunk_size, container.bytes_remaining)
-        self._offset = container.offset
+        self._offset = container.offset if offset is None else offset
+        self._size = \
+            min(container.chunk_size, container.bytes_remaining) \
+            if size is None else size
         self._closed = False
-        self.seek(0)
+        # positional chunks keep their own cursor and read with pread so
+        # that any number of them can be used at once (even from different
+        # threads) without disturbing the container's file position
+        self._positional = container.positional
+        self._pos = 0
+        # block read by positional readline, see _pread_line
+        self._lbuf = None
+        self._lbuf_start = 0
+        if not self._positional:
+            self.seek(0)
+
+    @classmethod
+    def _make(cls, container, offset, size):
+        """Cheap constructor for positional chunks
+
+        Skips everything `__init__` does beyond setting the slots, this is
+        the hot path when iterating over many small chunks.
+        """
+        chunk = cls.__new__(cls)
+        chunk._container = container
+        chunk._offset = offset
+        chunk._size = size
+        chunk._closed = False
+        chunk._positional = True
+        chunk._pos = 0
+        chunk._lbuf = None
+        chunk._lbuf_start = 0
+        return chunk
 
     def __check_open(func):
         @wraps(func)
         def wrapper(self, *args, **kwargs):
-            if self.closed:
+            if self._closed or self._container.closed:
                 # standard error returned for operations on closed files
                 raise ValueError('I/O operation on closed file')
             return func(self, *args, **kwargs)
@@ -35,34 +76,131 @@ class Chunk(object):
     @__check_open
     def __iter__(self):
         self.seek(0)
-        return self
+        return self.iterlines()
 
     @__check_open
     def __next__(self):
         pos = self.tell()
         if pos < self._size:
-            line = self._container.file.readline(self.bytes_remaining)
-            if line != '':
+            line = self.readline()
+            if line:
                 return line
         raise StopIteration()
 
     def next(self):
         return self.__next__()
 
+    @__check_open
+    def iterlines(self, block_size=None):
+        """Iterate over the lines from the current position to the end of
+        the chunk
+
+        The data is read in blocks of `block_size` (`line_chunk_size`) bytes
+        which are split into lines in bulk, a line cut by a block boundary is
+        carried over to the next block. The chunk position is brought up to
+        date when the iteration ends or is abandoned.
+        """
+        pos = self.tell()
+        try:
+            for lines in self._line_batches(block_size):
+                for line in lines:
+                    pos += len(line)
+                    yield line
+        finally:
+            if not self.closed:
+                self.seek(pos)
+
+    @__check_open
+    def iterbatches(self, block_size=None):
+        """Like `iterlines` but yield the lines of every block as a list"""
+        pos = self.tell()
+        try:
+            for lines in self._line_batches(block_size):
+                pos += sum(map(len, lines))
+                yield lines
+        finally:
+            if not self.closed:
+                self.seek(pos)
+
+    def _line_batches(self, block_size):
+        block_size = block_size or self.__class__.line_chunk_size
+        partial = b''
+        while True:
+            data = self.read(block_size)
+            if not data:
+                if partial:
+                    yield [partial]
+                return
+            lines = io.BytesIO(data).readlines()
+            if partial:
+                lines[0] = partial + lines[0]
+            partial = b'' if lines[-1].endswith(b'\n') else lines.pop()
+            if lines:
+                yield lines
+
     @property
     @__check_open
     def md5(self):
-        pos = self.tell()
+        return self.digests(('md5', ))['md5']
+
+    @__check_open
+    @instrumented('digests')
+    def digests(self, algorithms=('md5', )):
+        """Return hex digests of the chunk's contents
+
+        All requested algorithms (anything `hashlib` supports plus `crc32`
+        and `crc32c`) are computed in a single pass over the data. Results
+        are cached per chunk window on the container and thrown away if the
+        underlying file changes.
+
+        :param algorithms: names of the digest algorithms
+        :returns: a dict mapping algorithm name to hex digest
+        :rtype: dict
+        """
+        cached = self._container._cached_digests(self._offset, self._size)
+        missing = [a for a in algorithms if a not in cached]
+        if missing:
+            cached.update(digest.compute(self._blocks(), missing))
+        return dict((a, cached[a]) for a in algorithms)
+
+    def _blocks(self):
+        """Yield the chunk's data in `hash_chunk_size` (or pool buffer) blocks
+
+        The chunk position is left untouched. Blocks are views into a reused
+        buffer, borrowed from the container's `buffer_pool` if it has one
+        (or the mapping itself with `use_mmap=True`), so they are only valid
+        until the next block is requested.
+        """
+        if self._container.use_mmap:
+            self._count('mmap', self._size)
+            yield self.getbuffer()
+            return
+        pool = self._container.buffer_pool
+        if pool is not None:
+            buffer_ = pool.acquire()
+        else:
+            buffer_ = bytearray(
+                min(self.__class__.hash_chunk_size, self._size))
+        # (the shared file position of a non-positional chunk may have been
+        # moved outside of the chunk by other chunks)
+        pos = min(max(self.tell(), 0), self._size)
         try:
             self.seek(0)
-            hash_ = hashlib.md5()
-            data = self.read(self.__class__.hash_chunk_size)
-            while data:
-                hash_.update(data)
-                data = self.read(self.__class__.hash_chunk_size)
-            return hash_.hexdigest()
+            view = memoryview(buffer_)
+            while True:
+                size = self.readinto(view)
+                if not size:
+                    break
+                yield view[:size]
         finally:
             self.seek(pos)
+            if pool is not None:
+                pool.release(buffer_)
+
+    def _count(self, call, nbytes):
+        stats = self._container._stats
+        if stats is not None:
+            stats.count(call, nbytes)
 
     @property
     @__check_open
@@ -76,31 +214,228 @@ class Chunk(object):
 
     @property
     def closed(self):
-        return self._container.closed or self._closed
+        return self._closed or self._container.closed
 
     def close(self):
-        self._closed = True
+        if not self._closed:
+            self._closed = True
+            self._container._chunk_closed(self._offset, self._size)
+
+    @property
+    def offset(self):
+        return self._offset
+
+    @property
+    def positional(self):
+        return self._positional
 
     @__check_open
+    @instrumented('read')
     def read(self, size=-1):
         size = self.bytes_remaining if size < 0 else size
-        return self._container.file.read(min(size, self.bytes_remaining))
+        size = min(size, self.bytes_remaining)
+        if self._positional:
+            data = self._container._pread(size, self._offset + self._pos)
+            self._pos += len(data)
+            return data
+        data = self._container.file.read(size)
+        self._count('read', len(data))
+        return data
 
     @__check_open
+    @instrumented('readline')
     def readline(self, size=-1):
         size = self.bytes_remaining if size < 0 else size
-        return self._container.file.readline(min(size, self.bytes_remaining))
+        size = min(size, self.bytes_remaining)
+        if self._positional:
+            return self._pread_line(size)
+        line = self._container.file.readline(size)
+        self._count('read', len(line))
+        return line
+
+    def _pread_line(self, size):
+        mm = self._container._mmap
+        if mm is not None:
+            start = self._offset + self._pos
+            newline = mm.find(b'\n', start, start + size)
+            end = start + size if newline < 0 else newline + 1
+            self._pos += end - start
+            self._count('mmap', end - start)
+            return bytes(mm[start:end])
+        # lines are cut from a block kept between calls, it is read again
+        # whenever the position leaves it
+        pos = self._pos
+        limit = pos + size
+        buf = self._lbuf
+        start = self._lbuf_start
+        pieces = []
+        while pos < limit:
+            if buf is None or not start <= pos < start + len(buf):
+                buf = self._container._pread(
+                    min(self.__class__.line_chunk_size, self._size - pos),
+                    self._offset + pos)
+                start = pos
+                if not buf:
+                    buf = None
+                    break
+            i = pos - start
+            end = min(len(buf), limit - start)
+            newline = buf.find(b'\n', i, end)
+            if newline >= 0:
+                end = newline + 1
+            pieces.append(buf[i:end])
+            pos = start + end
+            if newline >= 0:
+                break
+        self._lbuf = buf
+        self._lbuf_start = start
+        self._pos = pos
+        return pieces[0] if len(pieces) == 1 else b''.join(pieces)
+
+    @__check_open
+    @instrumented('readinto')
+    def readinto(self, buffer_):
+        view = memoryview(buffer_)
+        if view.ndim != 1 or view.itemsize != 1:
+            view = view.cast('B')
+        size = min(len(view), self.bytes_remaining)
+        if not self._positional:
+            size = self._container.file.readinto(view[:size])
+            self._count('read', size)
+            return size
+        if self._container.use_mmap:
+            view[:size] = self.getbuffer()[self._pos:self._pos + size]
+            self._count('mmap', size)
+        else:
+            size = self._container._preadinto(view[:size],
+                                              self._offset + self._pos)
+        self._pos += size
+        return size
+
+    @__check_open
+    @contextmanager
+    def borrow(self, size=-1):
+        """Read up to `size` bytes (by default the rest of the chunk) into a
+        buffer borrowed from the container's `buffer_pool`
+
+        Use as `with chunk.borrow() as view:`. The `memoryview` of the data
+        is only valid within the block, the buffer goes back to the pool
+        afterwards. Mapped chunks (`use_mmap=True`) give a view of the
+        mapping instead; without a pool, or if the data doesn't fit in its
+        buffers, a new buffer is used.
+        """
+        remaining = self.bytes_remaining
+        size = remaining if size < 0 else min(size, remaining)
+        if self._container.use_mmap:
+            pos = self.tell()
+            self.seek(pos + size)
+            self._count('mmap', size)
+            yield self.getbuffer()[pos:pos + size]
+            return
+        pool = self._container.buffer_pool
+        if pool is not None and size <= pool.buffer_size:
+            buffer_ = pool.acquire()
+        else:
+            pool = None
+            buffer_ = bytearray(size)
+        try:
+            yield memoryview(buffer_)[:self.readinto(
+                memoryview(buffer_)[:size])]
+        finally:
+            if pool is not None:
+                pool.release(buffer_)
+
+    @__check_open
+    @instrumented('copy_to')
+    def copy_to(self, target):
+        """Copy the rest of the chunk to `target`
+
+        `target` may be a path (the file is created or truncated), a binary
+        file or a socket. Where possible the bytes are moved by the kernel,
+        with `os.copy_file_range` into files and `os.sendfile` into
+        (blocking) sockets and pipes, and never pass through Python.
+        Otherwise they are copied in `hash_chunk_size` blocks.
+
+        :returns: the number of bytes copied
+        """
+        if isinstance(target, six.string_types):
+            with io.open(target, 'wb') as f:
+                return self.copy_to(f)
+        pos = self.tell()
+        size = self._size - pos
+        src_fd = _fileno(self._container)
+        copied = 0
+        if hasattr(target, 'sendall'):
+            if src_fd is not None and target.gettimeout() is None:
+                copied = ranges.sendfile(src_fd, self._offset + pos,
+                                         target.fileno(), size)
+                if copied:
+                    self._count('sendfile', copied)
+            write = target.sendall
+        else:
+            dst_fd = _fileno(target)
+            if src_fd is not None and dst_fd is not None and \
+                    'a' not in getattr(target, 'mode', ''):
+                target.flush()
+                if _seekable(target):
+                    dst = target.tell()
+                    copied = ranges.copy_file_range(
+                        src_fd, self._offset + pos, dst_fd, dst, size)
+                    if copied:
+                        self._count('copy_file_range', copied)
+                    target.seek(dst + copied)
+                elif _blocking(dst_fd):
+                    # pipes have no position to copy to
+                    copied = ranges.sendfile(src_fd, self._offset + pos,
+                                             dst_fd, size)
+                    if copied:
+                        self._count('sendfile', copied)
+            write = target.write
+        self.seek(pos + copied)
+        block_size = self.__class__.hash_chunk_size
+        while copied < size:
+            data = self.read(min(block_size, size - copied))
+            if not data:
+                break
+            write(data)
+            copied += len(data)
+        return copied
+
+    @__check_open
+    def getbuffer(self):
+        """Return a read-only `memoryview` over the chunk's bytes
+
+        Only available if the `SplitFile` was opened with `use_mmap=True`.
+        The view references the mapping directly, no data is copied.
+        """
+        mm = self._container._mmap
+        if mm is None:
+            if self._container.use_mmap:
+                return memoryview(b'')
+            raise ValueError('chunk buffers require use_mmap=True')
+        return memoryview(mm)[self._offset:self._offset + self._size]
 
     @__check_open
+    @instrumented('readlines')
     def readlines(self, sizehint=-1):
-        bytes_remaining = self.bytes_remaining
-        lines = self._container.file.readlines(bytes_remaining)
-        index = 0
-        data_len = sum([len(l) for l in lines])
-        while data_len > bytes_remaining:
-            index -= 1
-            data_len -= len(lines[index])
-        return lines[:index] + [lines[index][:bytes_remaining - data_len]]
+        pos = self.tell()
+        lines = []
+        total = 0
+        for batch in self._line_batches(None):
+            lines.extend(batch)
+            total += sum(map(len, batch))
+            if 0 < sizehint <= total:
+                break
+        if 0 < sizehint < total:
+            # stop at the first line reaching sizehint
+            total = 0
+            for index, line in enumerate(lines):
+                total += len(line)
+                if total >= sizehint:
+                    del lines[index + 1:]
+                    break
+        self.seek(pos + total)
+        return lines
 
     @__check_open
     def xreadlines(self):
@@ -111,7 +446,10 @@ class Chunk(object):
         return self._container.seekable()
 
     @__check_open
+    @instrumented('seek')
     def seek(self, offset, whence=os.SEEK_SET):
+        if self._positional:
+            return self._seek_positional(offset, whence)
         if not self.seekable():
             raise IOError('file is not seekable')
         if whence == os.SEEK_SET:
@@ -135,9 +473,25 @@ class Chunk(object):
         else:
             raise ValueError('unknown value for whence %s' % (str(whence)))
 
+    def _seek_positional(self, offset, whence):
+        if whence == os.SEEK_SET:
+            pos = offset
+        elif whence == os.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == os.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError('unknown value for whence %s' % (str(whence)))
+        if pos < 0:
+            raise IOError('invalid argument')
+        self._pos = min(pos, self._size)
+        return self._pos
+
     @__check_open
     def tell(self):
-        return self._container.file.tell() - self._container.offset
+        if self._positional:
+            return self._pos
+        return self._container.file.tell() - self._offset
 
     @__check_open
     def truncate(self, size=None):
@@ -151,3 +505,22 @@ class Chunk(object):
     def writelines(self, sequence):
         raise NotImplementedError()
 
+
+def _fileno(obj):
+    try:
+        return obj.fileno()
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+
+
+def _seekable(obj):
+    try:
+        return obj.seekable()
+    except (AttributeError, IOError, OSError, ValueError):
+        return False
+
+
+def _blocking(fd):
+    # without os.get_blocking (python 2) we can't tell, don't risk EAGAIN
+    get_blocking = getattr(os, 'get_blocking', None)
+    return get_blocking is not None and get_blocking(fd)
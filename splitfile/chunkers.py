@@ -0,0 +1,193 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import hashlib
+import struct
+
+
+class Chunker(object):
+    """Chunker base class
+
+    A chunker decides where a `SplitFile` is cut when fixed size chunks won't
+    do. `SplitFile` calls `lengths` once with an iterable over the whole file
+    (in blocks of arbitrary size) and keeps the resulting boundary table, so
+    random access to chunks afterwards doesn't involve the chunker at all.
+    """
+    def lengths(self, blocks):
+        """Yield the length of each consecutive chunk
+
+        :param blocks: iterable of `bytes` blocks making up the file
+        """
+        raise NotImplementedError()
+
+    def fixed_lengths(self, size):
+        """Return the chunk lengths for a file of `size` bytes if they don't
+        depend on its contents (so the file needn't be read), else `None`
+        """
+        return None
+
+    def _buffered(self, blocks, min_buffered):
+        """Iterate over a buffer topped up from `blocks`
+
+        The buffer holds at least `min_buffered` bytes unless the end of the
+        data has been reached. Consumers delete what they've used from the
+        front of the (shared) buffer before asking for more.
+        """
+        buf = bytearray()
+        blocks = iter(blocks)
+        eof = False
+        while True:
+            while not eof and len(buf) < min_buffered:
+                try:
+                    buf += next(blocks)
+                except StopIteration:
+                    eof = True
+            if not buf:
+                return
+            yield buf
+
+
+def _gear_table():
+    # derived from md5 rather than a PRNG so boundaries are reproducible
+    # everywhere
+    return [struct.unpack('>Q',
+                          hashlib.md5(struct.pack('>I', i)).digest()[:8])[0]
+            for i in range(256)]
+
+
+class FastCDC(Chunker):
+    """Content-defined chunking with the FastCDC gear hash
+
+    Cut points depend only on the bytes near them, so inserting or removing
+    data only changes the chunks around the edit. Chunk sizes lie within
+    `[min_size, max_size]` (except the last one) and are normalised around
+    `avg_size`.
+    """
+    gear = _gear_table()
+
+    def __init__(self, min_size=2**18, avg_size=2**20, max_size=2**22,
+                 normalization=2):
+        if not 0 < min_size <= avg_size <= max_size:
+            raise ValueError('need 0 < min_size <= avg_size <= max_size')
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        bits = max(avg_size.bit_length() - 1, 1)
+        # use the high bits of the hash, they depend on the most input bytes
+        self._mask_s = self._mask(bits + normalization)
+        self._mask_l = self._mask(max(bits - normalization, 1))
+
+    @staticmethod
+    def _mask(bits):
+        bits = min(bits, 64)
+        return ((1 << bits) - 1) << (64 - bits)
+
+    def cut(self, data, length):
+        """Return the length of the first chunk of `data[:length]`"""
+        if length <= self.min_size:
+            return length
+        end = min(length, self.max_size)
+        normal = min(end, self.avg_size)
+        gear = self.__class__.gear
+        mask_s = self._mask_s
+        mask_l = self._mask_l
+        full = 0xFFFFFFFFFFFFFFFF
+        h = 0
+        # the hash only depends on the last 64 bytes, so skip everything
+        # before min_size that can't influence a cut point
+        for i in range(max(self.min_size - 64, 0), self.min_size):
+            h = ((h << 1) + gear[data[i]]) & full
+        for i in range(self.min_size, normal):
+            h = ((h << 1) + gear[data[i]]) & full
+            if not h & mask_s:
+                return i + 1
+        for i in range(normal, end):
+            h = ((h << 1) + gear[data[i]]) & full
+            if not h & mask_l:
+                return i + 1
+        return end
+
+    def lengths(self, blocks):
+        for buf in self._buffered(blocks, self.max_size):
+            length = self.cut(buf, len(buf))
+            yield length
+            del buf[:length]
+
+
+class RecordChunker(Chunker):
+    """Cut at record boundaries
+
+    Every boundary that would fall on a multiple of `chunk_size` bytes into
+    the current chunk is moved forward to just past the next `delimiter`, so
+    chunks hold only whole records (the last chunk may lack a trailing
+    delimiter if the file does). Chunks are at least `chunk_size` bytes long
+    except for the last one.
+    """
+    def __init__(self, chunk_size=2**20, delimiter=b'\n'):
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be >= 1')
+        if not delimiter:
+            raise ValueError('delimiter must not be empty')
+        self.chunk_size = chunk_size
+        self.delimiter = bytes(delimiter)
+
+    def lengths(self, blocks):
+        delimiter = self.delimiter
+        delimiter_len = len(delimiter)
+        chunk_size = self.chunk_size
+        buf = bytearray()
+        # file offsets of buf[0], of the current chunk and of where to resume
+        # looking for a delimiter; only bytes from there on are kept, so
+        # memory stays bounded by the block size however long chunks get
+        base = start = search = 0
+        for block in blocks:
+            buf += block
+            while base + len(buf) >= start + chunk_size:
+                found = buf.find(delimiter, max(start + chunk_size -
+                                                delimiter_len, search) - base)
+                if found < 0:
+                    # the delimiter may straddle the next block (but doesn't
+                    # start before the chunk)
+                    search = max(base + len(buf) - delimiter_len + 1, start)
+                    break
+                end = base + found + delimiter_len
+                yield end - start
+                start = search = end
+            keep = min(max(start + chunk_size - delimiter_len, search),
+                       base + len(buf))
+            if keep > base:
+                del buf[:keep - base]
+                base = keep
+        if base + len(buf) > start:
+            yield base + len(buf) - start
+
+
+class LayoutChunker(Chunker):
+    """Cut at explicitly given chunk lengths
+
+    Describes a planned, non-uniform layout (see `PartPlanner.layout`).
+    The chunks take the given lengths in order; the last one is cut short
+    if the file is shorter than the layout and any data beyond the layout
+    makes up one more chunk. The file contents are never looked at.
+    """
+    def __init__(self, lengths):
+        lengths = list(lengths)
+        if any(length < 1 for length in lengths):
+            raise ValueError('lengths must be >= 1')
+        self.layout = lengths
+
+    def fixed_lengths(self, size):
+        lengths = []
+        remaining = size
+        for length in self.layout:
+            if remaining <= 0:
+                break
+            lengths.append(min(length, remaining))
+            remaining -= length
+        if remaining > 0:
+            lengths.append(remaining)
+        return lengths
+
+    def lengths(self, blocks):
+        return iter(self.fixed_lengths(sum(len(b) for b in blocks)))
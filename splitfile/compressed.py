@@ -0,0 +1,359 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import io
+import json
+import logging
+import os
+import threading
+import zlib
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+from bisect import bisect_right
+
+import six
+
+try:
+    import zstandard as _zstandard
+except ImportError:
+    _zstandard = None
+
+from .chunk import Chunk
+from .stream import _BufferContainer
+
+
+logger = logging.getLogger(__name__)
+
+
+_MAGIC = {
+    'gzip': b'\x1f\x8b',
+    'zstd': b'\x28\xb5\x2f\xfd',
+}
+
+
+def detect_format(header):
+    """Return the compression format of a file starting with `header`"""
+    for name, magic in _MAGIC.items():
+        if header.startswith(magic):
+            return name
+    return None
+
+
+class _Decoder(object):
+    """Decompress a file from an access point onwards
+
+    Consecutive gzip members or zstd frames are decompressed as a single
+    stream. The `CompressedSplitFile` is told about every member start and,
+    for gzip, about the decompressor state at every `spacing` bytes of
+    output, so later reads can start there.
+    """
+    block_size = 2**16
+
+    def __init__(self, owner, coffset, uoffset, tail=b'', dobj=None):
+        self._owner = owner
+        self._format = owner.format
+        self._magic = _MAGIC[owner.format]
+        self._spacing = owner._spacing if owner.format == 'gzip' else 0
+        self.coffset = coffset
+        self.uoffset = uoffset
+        self._tail = tail
+        self._dobj = dobj
+        self._pending = b''
+        self.eof = False
+
+    def _new(self):
+        if self._format == 'gzip':
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return _zstandard.ZstdDecompressor().decompressobj()
+
+    def _fill(self):
+        data = self._owner._read_at(self.__class__.block_size, self.coffset)
+        self.coffset += len(data)
+        self._tail += data
+        return len(data)
+
+    def read(self, size):
+        pieces = []
+        while size > 0 and not self.eof:
+            data = self._read1(size)
+            pieces.append(data)
+            size -= len(data)
+        return b''.join(pieces)
+
+    def skip(self, size=None):
+        """Discard `size` bytes of output (or everything up to the end)"""
+        while not self.eof:
+            if size is None:
+                self._read1(2**20)
+                continue
+            if size <= 0:
+                break
+            size -= len(self._read1(min(size, 2**20)))
+
+    def _read1(self, size):
+        if self._pending:
+            data, self._pending = self._pending[:size], self._pending[size:]
+            self.uoffset += len(data)
+            return data
+        if self._dobj is None:
+            while len(self._tail) < len(self._magic) and self._fill():
+                pass
+            if not self._tail.startswith(self._magic):
+                if self._tail.strip(b'\0'):
+                    logger.warning('ignoring trailing garbage at %d',
+                                   self.coffset - len(self._tail))
+                self.eof = True
+                return b''
+            self._owner._add_point(self.uoffset,
+                                   self.coffset - len(self._tail))
+            self._dobj = self._new()
+        elif self._spacing and self.uoffset % self._spacing == 0 and \
+                not self._owner._has_point(self.uoffset):
+            self._owner._add_point(self.uoffset, self.coffset, self._tail,
+                                   self._dobj.copy())
+        if self._spacing:
+            size = min(size, self._spacing - self.uoffset % self._spacing)
+        if not self._tail and not self._fill():
+            raise EOFError('compressed file ended before the end of stream '
+                           'marker was reached')
+        if self._format == 'gzip':
+            data = self._dobj.decompress(self._tail, size)
+            self._tail = self._dobj.unconsumed_tail
+        else:
+            data = self._dobj.decompress(self._tail)
+            self._tail = b''
+            data, self._pending = data[:size], data[size:]
+        eof = getattr(self._dobj, 'eof', None)
+        if eof or (eof is None and self._dobj.unused_data):
+            # all input passed in after the end of stream
+            self._tail = self._dobj.unused_data
+            self._dobj = None
+        self.uoffset += len(data)
+        return data
+
+
+class CompressedChunk(Chunk):
+    """A chunk of a `CompressedSplitFile`, decompressed into memory"""
+    def __init__(self, index, offset, data):
+        self._index = index
+        self._chunk_offset = offset
+        super(CompressedChunk, self).__init__(
+            _BufferContainer(data, len(data)), 0, len(data))
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def offset(self):
+        return self._chunk_offset
+
+
+class CompressedSplitFile(Sequence):
+    """CompressedSplitFile class
+
+    Split the decompressed contents of a gzip or zstd (requires the
+    `zstandard` package) file into chunks. The first pass over the file
+    (iteration, `len()` or `build_index`) records access points to restart
+    decompression from: the start of every gzip member or zstd frame and,
+    for gzip, a copy of the decompressor state every `spacing` bytes. After
+    that `self[n]` only decompresses from the nearest access point.
+
+    Member and frame starts can be saved with `save_index` and loaded into
+    a later instance with `load_index`. Decompressor states live in memory
+    only (about 40KB each) and are recorded again as chunks are read.
+    """
+    index_version = 1
+
+    def __init__(self, file_, chunk_size=2**20, format=None, spacing=2**22):
+        """Constructor
+
+        :param file_: the compressed file
+        :type file_: str, file, io.IOBase
+        :param format: `'gzip'` or `'zstd'`, detected from the file header
+            if not given
+        :param spacing: uncompressed distance between gzip decompressor
+            states kept in memory, rounded up to a multiple of `chunk_size`.
+            0 keeps member starts only.
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be >= 1')
+        self._owns_file = isinstance(file_, six.string_types)
+        if self._owns_file:
+            file_ = io.open(file_, 'rb')
+        elif not isinstance(file_, io.IOBase):
+            raise ValueError('file_ must be a path or an actual file')
+        self._file = file_
+        self._lock = threading.Lock()
+        if format is None:
+            format = detect_format(self._read_at(8, 0))
+            if format is None:
+                raise ValueError('unknown compression format')
+        if format not in _MAGIC:
+            raise ValueError('format must be "gzip" or "zstd"')
+        if format == 'zstd' and _zstandard is None:
+            raise ValueError('zstd support requires the zstandard package')
+        self._format = format
+        self._chunk_size = chunk_size
+        self._spacing = -(-spacing // chunk_size) * chunk_size
+        self._offsets = []
+        self._points = []
+        self._size = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _read_at(self, size, offset):
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def _has_point(self, uoffset):
+        pos = bisect_right(self._offsets, uoffset)
+        return pos > 0 and self._offsets[pos - 1] == uoffset
+
+    def _add_point(self, uoffset, coffset, tail=b'', dobj=None):
+        with self._lock:
+            pos = bisect_right(self._offsets, uoffset)
+            if pos > 0 and self._offsets[pos - 1] == uoffset:
+                # a member start beats a decompressor state
+                if dobj is not None or self._points[pos - 1][2] is None:
+                    return
+                pos -= 1
+                del self._offsets[pos], self._points[pos]
+            self._offsets.insert(pos, uoffset)
+            self._points.insert(pos, (uoffset, coffset, dobj, tail))
+
+    def _decoder(self, uoffset=0):
+        """Return a decoder at the nearest access point before `uoffset`"""
+        pos = bisect_right(self._offsets, uoffset)
+        if not pos:
+            return _Decoder(self, 0, 0)
+        start, coffset, dobj, tail = self._points[pos - 1]
+        return _Decoder(self, coffset, start, tail,
+                        None if dobj is None else dobj.copy())
+
+    def build_index(self):
+        """Decompress the whole file once to find its size and access points
+        """
+        if self._size is None:
+            decoder = self._decoder()
+            decoder.skip()
+            self._size = decoder.uoffset
+
+    def __iter__(self):
+        decoder = self._decoder()
+        index = 0
+        while True:
+            offset = decoder.uoffset
+            data = decoder.read(self._chunk_size)
+            if not data:
+                break
+            yield CompressedChunk(index, offset, data)
+            index += 1
+        self._size = decoder.uoffset
+
+    def __len__(self):
+        self.build_index()
+        return -(-self._size // self._chunk_size)
+
+    def __getitem__(self, index):
+        length = len(self)
+        index = length + index if index < 0 else index
+        if index < 0 or index >= length:
+            raise IndexError('index out of range')
+        offset = index * self._chunk_size
+        decoder = self._decoder(offset)
+        decoder.skip(offset - decoder.uoffset)
+        return CompressedChunk(index, offset, decoder.read(self._chunk_size))
+
+    def _index_key(self):
+        st = os.fstat(self._file.fileno())
+        return {
+            'version': self.__class__.index_version,
+            'format': self._format,
+            'compressed_size': st.st_size,
+            'mtime': getattr(st, 'st_mtime_ns', st.st_mtime),
+        }
+
+    def save_index(self, path):
+        """Build (if necessary) and save the member/frame starts to `path`"""
+        self.build_index()
+        data = self._index_key()
+        data['size'] = self._size
+        data['points'] = [[u, c] for u, c, dobj, _ in self._points
+                          if dobj is None]
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(six.text_type(json.dumps(data)))
+
+    def load_index(self, path):
+        """Load an index saved by `save_index`
+
+        The index is only used if the compressed file's size and mtime
+        haven't changed since.
+
+        :returns: whether the index was loaded
+        :rtype: bool
+        """
+        try:
+            with io.open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return False
+        size = data.pop('size', None)
+        points = data.pop('points', None)
+        if size is None or points is None or data != self._index_key():
+            return False
+        for uoffset, coffset in points:
+            self._add_point(uoffset, coffset)
+        self._size = size
+        return True
+
+    def close(self):
+        self._points = []
+        self._offsets = []
+        if self._owns_file:
+            self._file.close()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    @property
+    def format(self):
+        return self._format
+
+    @property
+    def chunk_size(self):
+        return self._chunk_size
+
+    @property
+    def spacing(self):
+        return self._spacing
+
+    @property
+    def size(self):
+        """Uncompressed size"""
+        self.build_index()
+        return self._size
+
+    @property
+    def compressed_size(self):
+        return os.fstat(self._file.fileno()).st_size
+
+    @property
+    def access_points(self):
+        """Uncompressed offsets decompression can restart from"""
+        return list(self._offsets)
+
+    @property
+    def file(self):
+        return self._file
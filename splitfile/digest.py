@@ -0,0 +1,92 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import hashlib
+import struct
+import zlib
+
+try:
+    import crc32c as _crc32c
+except ImportError:
+    _crc32c = None
+
+
+def _make_crc32c_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_crc32c_table = None
+
+
+def crc32c(data, value=0):
+    """Compute the CRC32C (Castagnoli) checksum of `data`
+
+    Uses the `crc32c` package if it is installed and a (slow) pure python
+    implementation otherwise.
+    """
+    if _crc32c is not None:
+        return _crc32c.crc32c(data, value)
+    global _crc32c_table
+    if _crc32c_table is None:
+        _crc32c_table = _make_crc32c_table()
+    table = _crc32c_table
+    crc = value ^ 0xFFFFFFFF
+    for byte in bytearray(data):
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+class _Checksum(object):
+    """hashlib-like wrapper around a running 32 bit checksum function"""
+
+    digest_size = 4
+
+    def __init__(self, name, func):
+        self.name = name
+        self._func = func
+        self._value = 0
+
+    def update(self, data):
+        self._value = self._func(data, self._value) & 0xFFFFFFFF
+
+    def digest(self):
+        return struct.pack('>I', self._value)
+
+    def hexdigest(self):
+        return '{:08x}'.format(self._value)
+
+
+_checksums = {
+    'crc32': zlib.crc32,
+    'crc32c': crc32c,
+}
+
+
+def new(name):
+    """Return a new hash object for algorithm `name`
+
+    Supports everything `hashlib.new` does plus `crc32` and `crc32c`.
+    """
+    if name in _checksums:
+        return _Checksum(name, _checksums[name])
+    return hashlib.new(name)
+
+
+def compute(blocks, algorithms):
+    """Feed each block from `blocks` to every algorithm in `algorithms`
+
+    :returns: a dict mapping algorithm name to hex digest
+    :rtype: dict
+    """
+    hashers = [(name, new(name)) for name in algorithms]
+    for block in blocks:
+        for _, hasher in hashers:
+            hasher.update(block)
+    return dict((name, hasher.hexdigest()) for name, hasher in hashers)
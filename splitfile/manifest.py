@@ -0,0 +1,160 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import io
+import json
+
+from collections import namedtuple
+
+import six
+
+from . import digest
+
+
+ChunkRecord = namedtuple('ChunkRecord', ['offset', 'size', 'digest',
+                                         'sample'])
+
+
+def _identity(split_file):
+    st = split_file.refresh()
+    return {
+        'ino': st.st_ino,
+        'size': st.st_size,
+        'mtime': getattr(st, 'st_mtime_ns', st.st_mtime),
+    }
+
+
+class Manifest(object):
+    """Manifest class
+
+    Records the chunk layout of a `SplitFile` (chunk size, offsets, sizes
+    and digests) together with the identity (inode, size and mtime) of the
+    file, so a later run can find the chunks that changed without
+    re-processing the whole file, see `changed_chunks`.
+
+    Besides the digest of every chunk a digest of `samples` windows of
+    `sample_size` bytes spread over the chunk is kept, allowing a cheap
+    (but not exhaustive) check of unchanged chunks.
+    """
+    version = 1
+    verify_modes = ('stat', 'sample', 'full')
+
+    def __init__(self, chunk_size, chunks, identity=None, algorithm='md5',
+                 sample_size=4096, samples=3):
+        self.chunk_size = chunk_size
+        self.chunks = [ChunkRecord(*c) for c in chunks]
+        self.identity = identity
+        self.algorithm = algorithm
+        self.sample_size = sample_size
+        self.samples = samples
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    @classmethod
+    def build(cls, split_file, algorithm='md5', workers=None,
+              sample_size=4096, samples=3):
+        """Hash every chunk of `split_file` and return its manifest"""
+        manifest = cls(split_file.chunk_size, [], _identity(split_file),
+                       algorithm, sample_size, samples)
+        digests = split_file.digests((algorithm, ), workers)
+        for index, (offset, size) in enumerate(split_file.extents()):
+            manifest.chunks.append(ChunkRecord(
+                offset, size, digests[index][algorithm],
+                manifest._sample(split_file, index)))
+        return manifest
+
+    def _sample(self, split_file, index):
+        """Return the digest of the sample windows of chunk `index`"""
+        chunk = split_file._chunk(index)
+        # sample the bytes of text mode chunks
+        raw = getattr(chunk, 'raw', chunk)
+        try:
+            size = chunk.size
+            length = min(self.sample_size, size)
+            positions = sorted(set(
+                (size - length) * i // max(self.samples - 1, 1)
+                for i in range(self.samples)))
+            hash_ = digest.new(self.algorithm)
+            for pos in positions:
+                raw.seek(pos)
+                hash_.update(raw.read(length))
+            return hash_.hexdigest()
+        finally:
+            chunk.close()
+
+    def changed_chunks(self, split_file, verify='stat'):
+        """Return the indices of the chunks of `split_file` that are new or
+        changed since the manifest was made
+
+        Chunks are matched up by offset and size, a chunk without a
+        counterpart in the manifest is new. How the others are checked
+        depends on `verify`:
+
+        * `'stat'`: if the file's identity (inode, size and mtime) is
+          unchanged nothing is read and no chunk changed, otherwise every
+          chunk is hashed
+        * `'sample'`: only the sample windows of each chunk are read and
+          compared, changes outside of them go unnoticed
+        * `'full'`: every chunk is hashed
+
+        :rtype: list
+        """
+        if verify not in self.__class__.verify_modes:
+            raise ValueError('verify must be one of {}'.format(
+                ', '.join(self.__class__.verify_modes)))
+        identity = _identity(split_file)
+        extents = list(split_file.extents())
+        records = dict(((c.offset, c.size), c) for c in self.chunks)
+        known = [i for i, extent in enumerate(extents) if extent in records]
+        changed = set(range(len(extents))) - set(known)
+        if verify == 'stat' and self.identity == identity and \
+                self.chunk_size == split_file.chunk_size:
+            return sorted(changed)
+        algorithm = self.algorithm
+        for index in known:
+            record = records[extents[index]]
+            if verify == 'sample':
+                same = self._sample(split_file, index) == record.sample
+            else:
+                chunk = split_file._chunk(index)
+                try:
+                    same = chunk.digests((algorithm, ))[algorithm] == \
+                        record.digest
+                finally:
+                    chunk.close()
+            if not same:
+                changed.add(index)
+        return sorted(changed)
+
+    def to_dict(self):
+        return {
+            'version': self.__class__.version,
+            'algorithm': self.algorithm,
+            'chunk_size': self.chunk_size,
+            'identity': self.identity,
+            'sample_size': self.sample_size,
+            'samples': self.samples,
+            'chunks': [list(c) for c in self.chunks],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != cls.version:
+            raise ValueError('unsupported manifest version {}'.format(
+                data.get('version')))
+        return cls(data['chunk_size'], data['chunks'], data['identity'],
+                   data['algorithm'], data['sample_size'], data['samples'])
+
+    def save(self, path):
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(six.text_type(json.dumps(self.to_dict())))
+
+    @classmethod
+    def load(cls, path):
+        with io.open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,185 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import binascii
+import hashlib
+
+from . import digest
+
+
+def composite_etag(part_md5s):
+    """Return the S3 multipart ETag of parts with the given (hex) MD5s
+
+    That is the MD5 of the concatenated binary part MD5s followed by `-`
+    and the number of parts, without the quotes S3 puts around it.
+    """
+    hash_ = hashlib.md5()
+    count = 0
+    for md5 in part_md5s:
+        hash_.update(binascii.unhexlify(md5))
+        count += 1
+    return '{}-{}'.format(hash_.hexdigest(), count)
+
+
+class MerkleTree(object):
+    """MerkleTree class
+
+    Binary hash tree over the (hex) digests of a file's chunks. Every inner
+    node is the `algorithm` digest of `b'\\x01'` followed by its two
+    children, the last node of an odd level is carried up unchanged. When a
+    chunk changes only the nodes on the path from its leaf to the root are
+    recomputed (`update`, `rehash`), and trees over the same layout are
+    compared top down, skipping identical subtrees (`diff`).
+
+    With `algorithm='md5'` the leaves are the part MD5s of a multipart
+    upload of the chunks and `etag` is its composite ETag, so an upload can
+    be verified without reading the file again.
+    """
+    def __init__(self, leaves, algorithm='md5', extents=None):
+        """Constructor
+
+        :param leaves: hex digests of the chunks, in order
+        :param extents: `(offset, size)` of every chunk, needed for
+            `diff_ranges`
+        """
+        self._algorithm = algorithm
+        self._levels = [[binascii.unhexlify(leaf) for leaf in leaves]]
+        self._extents = None if extents is None else list(extents)
+        if self._extents is not None and \
+                len(self._extents) != len(self._levels[0]):
+            raise ValueError('need one extent per leaf')
+        level = self._levels[0]
+        while len(level) > 1:
+            level = [self._parent(level, i) for i in range(0, len(level), 2)]
+            self._levels.append(level)
+
+    @classmethod
+    def from_split_file(cls, split_file, algorithm='md5', workers=None):
+        """Build the tree over the chunk digests of `split_file`
+
+        Digests already computed (e.g. while uploading the chunks) are
+        taken from the chunk digest cache.
+        """
+        digests = split_file.digests((algorithm, ), workers)
+        return cls([d[algorithm] for d in digests], algorithm,
+                   split_file.extents())
+
+    def _parent(self, level, index):
+        if index + 1 == len(level):
+            return level[index]
+        hash_ = digest.new(self._algorithm)
+        hash_.update(b'\x01')
+        hash_.update(level[index])
+        hash_.update(level[index + 1])
+        return hash_.digest()
+
+    def __len__(self):
+        return len(self._levels[0])
+
+    def update(self, index, leaf):
+        """Replace leaf `index` by the hex digest `leaf` and recompute the
+        path to the root
+        """
+        levels = self._levels
+        index = len(self) + index if index < 0 else index
+        if index < 0 or index >= len(self):
+            raise IndexError('index out of range')
+        levels[0][index] = binascii.unhexlify(leaf)
+        for depth in range(1, len(levels)):
+            index //= 2
+            levels[depth][index] = self._parent(levels[depth - 1], 2 * index)
+
+    def rehash(self, split_file, indices):
+        """Hash the chunks of `split_file` at `indices` again and `update`
+        their leaves, e.g. with the indices `Manifest.changed_chunks` reports
+
+        The chunk layout must be unchanged, otherwise build a new tree.
+        """
+        split_file.refresh()
+        if len(split_file) != len(self):
+            raise ValueError('chunk layout changed, build a new tree')
+        algorithm = self._algorithm
+        for index in indices:
+            chunk = split_file._chunk(index)
+            try:
+                self.update(index, chunk.digests((algorithm, ))[algorithm])
+            finally:
+                chunk.close()
+
+    def diff(self, other):
+        """Return the indices of the leaves that differ from `other`'s
+
+        Leaves only one of the trees has count as different.
+
+        :rtype: list
+        """
+        if other.algorithm != self._algorithm:
+            raise ValueError('trees use different algorithms')
+        if len(self) != len(other):
+            # different shapes, compare leaf by leaf
+            ours, theirs = self._levels[0], other._levels[0]
+            common = min(len(ours), len(theirs))
+            return [i for i in range(common) if ours[i] != theirs[i]] + \
+                list(range(common, max(len(ours), len(theirs))))
+        if not len(self):
+            return []
+        changed = []
+        stack = [(len(self._levels) - 1, 0)]
+        while stack:
+            depth, index = stack.pop()
+            if self._levels[depth][index] == other._levels[depth][index]:
+                continue
+            if not depth:
+                changed.append(index)
+                continue
+            below = len(self._levels[depth - 1])
+            stack.extend((depth - 1, i) for i in (2 * index, 2 * index + 1)
+                         if i < below)
+        return sorted(changed)
+
+    def diff_ranges(self, other):
+        """Return the `(offset, size)` byte ranges of the chunks that differ
+        from `other`'s, adjacent ones merged
+
+        :rtype: list
+        """
+        if self._extents is None:
+            raise ValueError('the tree was built without extents')
+        ranges = []
+        for index in self.diff(other):
+            if index >= len(self):
+                break
+            offset, size = self._extents[index]
+            if ranges and sum(ranges[-1]) == offset:
+                ranges[-1] = (ranges[-1][0], ranges[-1][1] + size)
+            else:
+                ranges.append((offset, size))
+        return ranges
+
+    @property
+    def algorithm(self):
+        return self._algorithm
+
+    @property
+    def root(self):
+        """Hex digest of the root (of no data for an empty tree)"""
+        if not len(self):
+            return digest.new(self._algorithm).hexdigest()
+        return binascii.hexlify(self._levels[-1][0]).decode('ascii')
+
+    @property
+    def leaves(self):
+        return [binascii.hexlify(leaf).decode('ascii')
+                for leaf in self._levels[0]]
+
+    @property
+    def extents(self):
+        return None if self._extents is None else list(self._extents)
+
+    @property
+    def etag(self):
+        """S3 multipart ETag of the chunks, see `composite_etag`"""
+        if self._algorithm != 'md5':
+            raise ValueError('composite ETags require algorithm md5')
+        return composite_etag(self.leaves)
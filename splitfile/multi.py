@@ -0,0 +1,274 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import logging
+import os
+import threading
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+from bisect import bisect_right
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .chunk import Chunk
+
+
+logger = logging.getLogger(__name__)
+
+
+Source = namedtuple('Source', ['path', 'offset', 'size'])
+
+
+class MultiChunk(Chunk):
+    """A chunk of a `MultiSplitFile`, possibly spanning several files"""
+    __slots__ = ()
+
+    @property
+    def sources(self):
+        """The `Source` (path, offset in that file, size) pieces of the chunk
+        """
+        return self._container.sources(self._offset, self._size)
+
+
+class MultiSplitFile(Sequence):
+    """MultiSplitFile class
+
+    Present an ordered list of files as one virtual file and split that
+    into chunks, so many small files make evenly sized chunks rather than
+    one undersized chunk each. Chunks may span file boundaries; they are
+    positional `Chunk` objects with an additional `sources` property.
+
+    File sizes are taken when the `MultiSplitFile` is created (and by
+    `refresh`). Files are opened on demand and at most `max_open` of them
+    are kept open, the least recently used ones are closed first.
+    """
+    def __init__(self, paths, chunk_size=2**20, max_open=64, stats=None,
+                 buffer_pool=None):
+        """Constructor
+
+        :param paths: the files, in order
+        :param max_open: maximum number of file descriptors kept open
+        :param stats: if given, I/O statistics are collected here
+        :type stats: IOStats
+        :param buffer_pool: if given, chunks borrow read buffers from here,
+            see `SplitFile`
+        :type buffer_pool: BufferPool
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be >= 1')
+        if max_open < 1:
+            raise ValueError('max_open must be >= 1')
+        self._paths = list(paths)
+        self._chunk_size = chunk_size
+        self._max_open = max_open
+        self._stats = stats
+        self._buffer_pool = buffer_pool
+        self._lock = threading.Lock()
+        # index -> [fd, pins], least recently used first
+        self._fds = OrderedDict()
+        self._closed = False
+        self._digest_cache = {}
+        self._stamps = None
+        self.refresh()
+
+    positional = True
+    use_mmap = False
+    _mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def refresh(self):
+        """Refresh the file sizes (and with them the chunk layout)"""
+        stamps = []
+        starts = [0]
+        for path in self._paths:
+            st = os.stat(path)
+            stamps.append((st.st_ino, st.st_size,
+                           getattr(st, 'st_mtime_ns', st.st_mtime)))
+            starts.append(starts[-1] + st.st_size)
+        if stamps != self._stamps:
+            self._digest_cache = {}
+        self._stamps = stamps
+        self._starts = starts
+
+    def __len__(self):
+        return -(-self.size // self._chunk_size)
+
+    def __getitem__(self, index):
+        length = len(self)
+        index = length + index if index < 0 else index
+        if index < 0 or index >= length:
+            raise IndexError('index out of range')
+        offset, size = self._extent(index)
+        return MultiChunk._make(self, offset, size)
+
+    # chunks for internal use, see `SplitFile._chunk`
+    _chunk = __getitem__
+
+    def __iter__(self):
+        make = MultiChunk._make
+        for offset, size in self.extents():
+            yield make(self, offset, size)
+
+    def _extent(self, index):
+        offset = index * self._chunk_size
+        return offset, min(self._chunk_size, self.size - offset)
+
+    def extents(self):
+        """Iterate over the `(offset, size)` of every chunk"""
+        chunk_size = self._chunk_size
+        size = self.size
+        return ((offset, min(chunk_size, size - offset))
+                for offset in range(0, size, chunk_size))
+
+    def sources(self, offset, size):
+        """Return the `Source` pieces making up `size` bytes at `offset`"""
+        return [Source(self._paths[i], file_offset, length)
+                for i, file_offset, length in self._pieces(offset, size)]
+
+    def _pieces(self, offset, size):
+        """Yield `(file index, offset in file, length)` covering the range"""
+        starts = self._starts
+        end = min(offset + size, starts[-1])
+        # the last file starting at or before offset, this skips empty files
+        i = bisect_right(starts, offset) - 1
+        while offset < end:
+            length = min(end, starts[i + 1]) - offset
+            if length > 0:
+                yield i, offset - starts[i], length
+                offset += length
+            i += 1
+
+    def _acquire(self, index):
+        with self._lock:
+            if self._closed:
+                raise ValueError('I/O operation on closed file')
+            entry = self._fds.pop(index, None)
+            if entry is None:
+                self._evict()
+                entry = [os.open(self._paths[index], os.O_RDONLY), 0]
+                if self._stats is not None:
+                    self._stats.count('open')
+            entry[1] += 1
+            self._fds[index] = entry
+            return entry[0]
+
+    def _release(self, index):
+        with self._lock:
+            entry = self._fds.get(index)
+            if entry is not None:
+                entry[1] -= 1
+
+    def _evict(self):
+        # descriptors in use by a read are pinned, so the limit may be
+        # exceeded while many reads are running
+        for index in list(self._fds):
+            if len(self._fds) < self._max_open:
+                break
+            fd, pins = self._fds[index]
+            if not pins:
+                del self._fds[index]
+                os.close(fd)
+
+    def _pread(self, size, offset):
+        pieces = []
+        for i, file_offset, length in self._pieces(offset, size):
+            fd = self._acquire(i)
+            try:
+                while length > 0:
+                    data = os.pread(fd, length, file_offset)
+                    if self._stats is not None:
+                        self._stats.count('pread', len(data))
+                    if not data:
+                        # the file shrank, stop rather than shift the data
+                        # of the files after it
+                        return b''.join(pieces)
+                    pieces.append(data)
+                    length -= len(data)
+                    file_offset += len(data)
+            finally:
+                self._release(i)
+        return b''.join(pieces)
+
+    def _preadinto(self, view, offset):
+        if not hasattr(os, 'preadv'):
+            data = self._pread(len(view), offset)
+            view[:len(data)] = data
+            return len(data)
+        total = 0
+        for i, file_offset, length in self._pieces(offset, len(view)):
+            fd = self._acquire(i)
+            try:
+                size = os.preadv(fd, [view[total:total + length]],
+                                 file_offset)
+            finally:
+                self._release(i)
+            if self._stats is not None:
+                self._stats.count('preadv', size)
+            total += size
+            if size < length:
+                break
+        return total
+
+    def _cached_digests(self, offset, size):
+        return self._digest_cache.setdefault((offset, size), {})
+
+    def _chunk_closed(self, offset, size):
+        pass
+
+    def digests(self, algorithms=('md5', ), workers=None):
+        """Return the digests of every chunk, see `SplitFile.digests`"""
+        if workers is None:
+            return [chunk.digests(algorithms) for chunk in self]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda c: c.digests(algorithms),
+                                     list(self)))
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            for fd, _ in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def size(self):
+        return self._starts[-1]
+
+    @property
+    def chunk_size(self):
+        return self._chunk_size
+
+    @property
+    def paths(self):
+        return list(self._paths)
+
+    @property
+    def max_open(self):
+        return self._max_open
+
+    @property
+    def open_files(self):
+        """Number of file descriptors currently open"""
+        return len(self._fds)
+
+    @property
+    def stats(self):
+        return self._stats
+
+    @property
+    def buffer_pool(self):
+        return self._buffer_pool
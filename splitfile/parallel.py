@@ -0,0 +1,95 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import functools
+import multiprocessing
+
+from collections import namedtuple
+
+import six
+
+
+class ChunkDescriptor(namedtuple('ChunkDescriptor',
+                                 ['path', 'index', 'offset', 'size'])):
+    """Picklable description of a chunk
+
+    Unlike a `Chunk` it doesn't reference an open file, so it can be sent to
+    other processes and turned back into a chunk with `open_chunk`.
+    """
+    __slots__ = ()
+
+
+# files opened by open_chunk in this process, path -> SplitFile
+_open_files = {}
+
+
+def open_chunk(descriptor):
+    """Return a positional `Chunk` for `descriptor`
+
+    The file is opened once per process and shared by all chunks of it.
+    """
+    from .chunk import Chunk
+    from .splitfile import SplitFile
+    split_file = _open_files.get(descriptor.path)
+    if split_file is None or split_file.closed:
+        split_file = SplitFile(descriptor.path, positional=True)
+        _open_files[descriptor.path] = split_file
+    return Chunk(split_file, descriptor.offset, descriptor.size)
+
+
+def _apply(func, text, descriptor):
+    chunk = open_chunk(descriptor)
+    if text is not None:
+        chunk = text.wrap(chunk)
+    try:
+        return func(chunk)
+    finally:
+        chunk.close()
+
+
+def _apply_indexed(func, text, descriptor):
+    return descriptor.index, _apply(func, text, descriptor)
+
+
+def describe(split_file):
+    """Return a `ChunkDescriptor` for every chunk of `split_file`"""
+    path = split_file.name
+    if not isinstance(path, six.string_types):
+        raise ValueError('chunks of a file without a path cannot be sent to '
+                         'other processes')
+    descriptors = []
+    for index in range(len(split_file)):
+        offset, size = split_file._extent(index)
+        descriptors.append(ChunkDescriptor(path, index, offset, size))
+    return descriptors
+
+
+def imap(split_file, func, workers=None, chunksize=1, ordered=True):
+    """Apply `func` to every chunk of `split_file` on a process pool
+
+    `func` must be picklable (e.g. a module level function) and is called
+    with a chunk-like object in the worker process; its return value must be
+    picklable too. Descriptors are sent to the workers in batches of
+    `chunksize`. Text mode chunks are handed to `func` as `TextChunk`
+    objects.
+
+    :returns: an iterator over the results in chunk order if `ordered`,
+        otherwise over `(index, result)` tuples as they complete
+    """
+    descriptors = describe(split_file)
+    text = split_file.text
+    pool = multiprocessing.Pool(workers)
+    try:
+        if ordered:
+            results = pool.imap(functools.partial(_apply, func, text),
+                                descriptors, chunksize)
+        else:
+            results = pool.imap_unordered(
+                functools.partial(_apply_indexed, func, text), descriptors,
+                chunksize)
+        for result in results:
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
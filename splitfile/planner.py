@@ -0,0 +1,170 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import os
+import threading
+import time
+
+from functools import wraps
+
+import six
+
+from .chunkers import LayoutChunker
+
+
+class PartPlanner(object):
+    """PartPlanner class
+
+    Pick the part (chunk) size for splitting a file into upload parts. The
+    defaults follow the S3 multipart limits: parts of 5MiB to 5GiB, at most
+    10000 of them.
+
+    Within those limits parts are `target_part_size` bytes, but no larger
+    than needed to give each of `workers` at least one part. Once upload
+    throughput has been measured (see `observe`, or pass the planner to
+    `MultipartUploader`) and `part_duration` is set, the target becomes
+    the number of bytes a part upload is expected to take `part_duration`
+    seconds for instead. Part sizes are rounded up to a multiple of
+    `alignment`.
+    """
+    def __init__(self, min_part_size=5 * 2**20, max_part_size=5 * 2**30,
+                 max_parts=10000, target_part_size=8 * 2**20, workers=4,
+                 part_duration=None, alignment=2**20, smoothing=0.3):
+        """Constructor
+
+        :param min_part_size: minimum size of every part but the last
+        :param max_part_size: maximum size of any part
+        :param max_parts: maximum number of parts
+        :param target_part_size: preferred part size without throughput
+            measurements (or `part_duration`)
+        :param workers: number of parts uploaded in parallel
+        :param part_duration: preferred time in seconds to upload one part
+        :param alignment: part sizes are rounded up to a multiple of this
+        :param smoothing: weight of every new throughput measurement in the
+            moving average
+        """
+        if not 0 < min_part_size <= max_part_size:
+            raise ValueError('need 0 < min_part_size <= max_part_size')
+        if max_parts < 1:
+            raise ValueError('max_parts must be >= 1')
+        self.min_part_size = min_part_size
+        self.max_part_size = max_part_size
+        self.max_parts = max_parts
+        self.target_part_size = target_part_size
+        self.workers = workers
+        self.part_duration = part_duration
+        self.alignment = alignment
+        self.smoothing = smoothing
+        self._throughput = None
+        self._lock = threading.Lock()
+
+    def observe(self, nbytes, seconds):
+        """Record that a part of `nbytes` took `seconds` to upload"""
+        if seconds <= 0:
+            return
+        with self._lock:
+            throughput = nbytes / seconds
+            if self._throughput is None:
+                self._throughput = throughput
+            else:
+                self._throughput += self.smoothing * \
+                    (throughput - self._throughput)
+
+    def timed(self, upload_part):
+        """Wrap `upload_part(part_number, chunk)` to `observe` every upload
+        """
+        @wraps(upload_part)
+        def wrapper(part_number, chunk):
+            start = time.time()
+            result = upload_part(part_number, chunk)
+            self.observe(chunk.size, time.time() - start)
+            return result
+        return wrapper
+
+    @property
+    def throughput(self):
+        """Average upload throughput of a single part in bytes/s (or `None`)
+        """
+        return self._throughput
+
+    def _align(self, size):
+        if self.alignment > 1:
+            aligned = -(-size // self.alignment) * self.alignment
+            if aligned <= self.max_part_size:
+                return aligned
+        return size
+
+    def plan_part_size(self, size):
+        """Return the part size to split `size` bytes with
+
+        :raises ValueError: if `size` can't be split within `max_parts`
+            parts of at most `max_part_size`
+        """
+        if size > self.max_parts * self.max_part_size:
+            raise ValueError('{} bytes do not fit in {} parts of at most {} '
+                             'bytes'.format(size, self.max_parts,
+                                            self.max_part_size))
+        lower = max(self.min_part_size, -(-size // self.max_parts))
+        target = self.target_part_size
+        if self.part_duration and self._throughput:
+            target = int(self._throughput * self.part_duration)
+        if self.workers:
+            # keep every worker busy
+            target = min(target, -(-size // self.workers))
+        part_size = min(self._align(max(lower, target)), self.max_part_size)
+        # alignment may have been skipped, make sure lower still holds
+        return max(part_size, lower)
+
+    def layout(self, size, head=()):
+        """Plan a (non-uniform) layout for `size` bytes
+
+        Parts are `plan_part_size` bytes, except that a short remainder is
+        merged into the last part when that keeps it within
+        `max_part_size`, saving a request for a tiny final part. `head`
+        holds the lengths of parts already made (e.g. uploaded while
+        measuring throughput); they're kept as they are and only the rest
+        is planned.
+
+        :returns: the part lengths
+        :rtype: list
+        """
+        lengths = list(head)
+        done = sum(lengths)
+        if done > size:
+            raise ValueError('head is larger than size')
+        remaining = size - done
+        if not remaining:
+            return lengths
+        part_size = self.plan_part_size(remaining)
+        if len(lengths) + -(-remaining // part_size) > self.max_parts:
+            raise ValueError('too many parts')
+        count, tail = divmod(remaining, part_size)
+        lengths.extend([part_size] * count)
+        if tail:
+            if count and (tail < self.min_part_size or
+                          tail < part_size // 2) and \
+                    lengths[-1] + tail <= self.max_part_size:
+                lengths[-1] += tail
+            else:
+                lengths.append(tail)
+        return lengths
+
+    def chunker(self, size, head=()):
+        """Return a `LayoutChunker` for `layout(size, head)`"""
+        return LayoutChunker(self.layout(size, head))
+
+    def split_file(self, file_, uniform=True, **kwargs):
+        """Open `file_` as a `SplitFile` with a planned chunk size (or,
+        if not `uniform`, a planned layout)
+
+        The remaining arguments are passed to `SplitFile`.
+        """
+        from .splitfile import SplitFile
+        if isinstance(file_, six.string_types):
+            size = os.stat(file_).st_size
+        else:
+            size = os.fstat(file_.fileno()).st_size
+        if uniform:
+            return SplitFile(file_, self.plan_part_size(size), **kwargs)
+        return SplitFile(file_, chunker=self.chunker(size), **kwargs)
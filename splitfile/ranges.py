@@ -0,0 +1,258 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import sys
+import tempfile
+
+
+logger = logging.getLogger(__name__)
+
+
+# linux/falloc.h
+FALLOC_FL_COLLAPSE_RANGE = 0x08
+FALLOC_FL_INSERT_RANGE = 0x20
+
+# errors meaning the operation isn't supported here (as opposed to failed)
+_UNSUPPORTED = frozenset(getattr(errno, name) for name in
+                         ('EINVAL', 'EOPNOTSUPP', 'ENOTSUP', 'ENOSYS',
+                          'ENODEV', 'EXDEV')
+                         if hasattr(errno, name))
+
+block_size = 2**24
+
+# below this the per call overhead of copy_file_range outweighs the copy
+_min_kernel_copy = 2**16
+
+_fallocate = None
+if sys.platform.startswith('linux'):
+    try:
+        _fallocate = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                                 use_errno=True).fallocate
+        _fallocate.argtypes = [ctypes.c_int, ctypes.c_int,
+                               ctypes.c_longlong, ctypes.c_longlong]
+        _fallocate.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        _fallocate = None
+
+_copy_file_range = getattr(os, 'copy_file_range', None)
+_sendfile = getattr(os, 'sendfile', None)
+
+
+def fallocate(fd, mode, offset, length):
+    """Call fallocate(2), raising `OSError` on failure"""
+    if _fallocate is None:
+        raise OSError(errno.ENOSYS, 'fallocate is not available')
+    if _fallocate(fd, mode, offset, length) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def _pread(fd, size, offset):
+    if hasattr(os, 'pread'):
+        return os.pread(fd, size, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, size)
+
+
+def _pwrite(fd, data, offset):
+    if hasattr(os, 'pwrite'):
+        return os.pwrite(fd, data, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.write(fd, data)
+
+
+def _aligned(fd, *values):
+    blksize = os.fstat(fd).st_blksize or 4096
+    return all(value % blksize == 0 for value in values)
+
+
+def _collapse(fd, offset, length):
+    if _fallocate is None or not _aligned(fd, offset, length):
+        return False
+    try:
+        fallocate(fd, FALLOC_FL_COLLAPSE_RANGE, offset, length)
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED:
+            raise
+        logger.debug('collapse range not supported: %s', e)
+        return False
+    return True
+
+
+def _insert(fd, offset, length):
+    if _fallocate is None or not _aligned(fd, offset, length):
+        return False
+    try:
+        fallocate(fd, FALLOC_FL_INSERT_RANGE, offset, length)
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED:
+            raise
+        logger.debug('insert range not supported: %s', e)
+        return False
+    return True
+
+
+def copy_file_range(src_fd, src, dst_fd, dst, length):
+    """Copy with `os.copy_file_range`, returning the number of bytes copied
+
+    Stops early (possibly at 0) if the kernel refuses the copy so the caller
+    can finish it some other way.
+    """
+    if _copy_file_range is None:
+        return 0
+    copied = 0
+    while copied < length:
+        try:
+            n = _copy_file_range(src_fd, dst_fd, length - copied,
+                                 src + copied, dst + copied)
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+            logger.debug('copy_file_range not supported: %s', e)
+            break
+        if not n:
+            break
+        copied += n
+    return copied
+
+
+def sendfile(src_fd, src, out_fd, length):
+    """Send with `os.sendfile` (e.g. to a socket), returning the number of
+    bytes sent
+
+    Stops early like `copy_file_range`. `out_fd` must be blocking.
+    """
+    if _sendfile is None:
+        return 0
+    sent = 0
+    while sent < length:
+        try:
+            n = _sendfile(out_fd, src_fd, src + sent, length - sent)
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+            logger.debug('sendfile not supported: %s', e)
+            break
+        if not n:
+            break
+        sent += n
+    return sent
+
+
+def _buffered_copy(src_fd, src, dst_fd, dst, length):
+    copied = 0
+    while copied < length:
+        data = _pread(src_fd, min(block_size, length - copied), src + copied)
+        if not data:
+            raise IOError(errno.EIO, 'unexpected end of file')
+        view = memoryview(data)
+        while view:
+            n = _pwrite(dst_fd, view, dst + copied)
+            view = view[n:]
+            copied += n
+
+
+def copy_range(src_fd, src, dst_fd, dst, length):
+    """Copy `length` bytes at `src` in `src_fd` to `dst` in `dst_fd`
+
+    The ranges must not overlap if the descriptors refer to the same file.
+    """
+    copied = copy_file_range(src_fd, src, dst_fd, dst, length)
+    if copied < length:
+        _buffered_copy(src_fd, src + copied, dst_fd, dst + copied,
+                       length - copied)
+
+
+def shift_range(fd, src, dst, length):
+    """Copy `length` bytes at `src` to `dst` within `fd`, ranges may overlap
+
+    The data is copied front to back when moving down and back to front when
+    moving up, so every block is read before it is overwritten. Kernel
+    copies go straight from file to file, their blocks are no larger than
+    the distance between `src` and `dst`; buffered blocks are read whole
+    before they are written and take up to `block_size` bytes.
+    """
+    distance = abs(src - dst)
+    if not distance or not length:
+        return
+    kernel = distance >= _min_kernel_copy
+    done = 0
+    while done < length:
+        step = min(distance, block_size) if kernel else block_size
+        n = min(step, length - done)
+        if dst < src:
+            s, d = src + done, dst + done
+        else:
+            s, d = src + length - done - n, dst + length - done - n
+        copied = copy_file_range(fd, s, fd, d, n) if kernel else 0
+        if copied < n:
+            kernel = False
+            _buffered_copy(fd, s + copied, fd, d + copied, n - copied)
+        done += n
+
+
+def delete_range(fd, offset, length):
+    """Remove `length` bytes at `offset` from the file, shrinking it"""
+    size = os.fstat(fd).st_size
+    end = offset + length
+    if end < size and _collapse(fd, offset, length):
+        return
+    shift_range(fd, end, offset, size - end)
+    os.ftruncate(fd, size - length)
+
+
+def _rotate(fd, lo, mid, hi, directory=None):
+    """Swap the ranges `[lo, mid)` and `[mid, hi)`
+
+    The shorter one is stashed in a temporary file in `directory` (ideally on
+    the same filesystem so the kernel can copy to and from it) while the
+    other one is shifted.
+    """
+    left, right = mid - lo, hi - mid
+    with tempfile.TemporaryFile(dir=directory) as stash:
+        tmp = stash.fileno()
+        if left <= right:
+            copy_range(fd, lo, tmp, 0, left)
+            shift_range(fd, mid, lo, right)
+            copy_range(tmp, 0, fd, lo + right, left)
+        else:
+            copy_range(fd, mid, tmp, 0, right)
+            shift_range(fd, lo, lo + right, left)
+            copy_range(tmp, 0, fd, lo, right)
+
+
+def move_range(fd, src, length, dst, directory=None):
+    """Move `length` bytes at `src` so they start at `dst`
+
+    `dst` is an offset in the resulting file; the bytes in between shift to
+    close the gap and the file size is unchanged. If the move can't be done
+    by inserting and collapsing ranges, the shorter of the block and the
+    bytes it moves over is stashed in a temporary file in `directory`.
+    """
+    size = os.fstat(fd).st_size
+    if dst == src or not length:
+        return
+    # where the block has to be inserted in the current file; the block
+    # must be aligned as well, or collapsing it fails and the rest of the
+    # file is shifted instead
+    insert_at = dst if dst < src else dst + length
+    if insert_at < size and _aligned(fd, src, insert_at, length) and \
+            _insert(fd, insert_at, length):
+        # the file now has a hole of `length` bytes at insert_at
+        block = src + length if dst < src else src
+        copy_range(fd, block, fd, insert_at, length)
+        if _collapse(fd, block, length):
+            return
+        shift_range(fd, block + length, block, size - block)
+        os.ftruncate(fd, size)
+        return
+    if dst < src:
+        _rotate(fd, dst, src, src + length, directory)
+    else:
+        _rotate(fd, src, src + length, dst + length, directory)
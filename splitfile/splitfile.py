@@ -2,35 +2,103 @@ from __future__ import (
     absolute_import, division, print_function, unicode_literals
 )
 
+import hashlib
 import io
+import json
+import locale
 import logging
+import mmap
 import os
 import stat
 
-from collections import Sequence
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 
 import six
 
+from . import parallel, ranges
 from .chunk import Chunk
+from .manifest import Manifest
+from .merkle import MerkleTree
+from .text import TextCodec
 
 
 logger = logging.getLogger(__name__)
 
 
+try:
+    _IOV_MAX = os.sysconf(str('SC_IOV_MAX'))
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = -1
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
 class SplitFile(Sequence):
     """SplitFile class
 
     Open a file and allow for iteration of file chunks where each chunk can be
-    treated as an individual file.
+    treated as an individual file. To split pipes and other unseekable
+    streams see `StreamSplitFile`.
 
-    XXX: only binary mode supported at the moment
+    In text mode (`'r'` or `'rt'`) chunk boundaries are moved forward to
+    character boundaries and chunks are `TextChunk` objects whose reads
+    return text, see `TextCodec`. The binary modes are `'rb'` and `'rb+'`.
     """
     def __init__(self, file_, chunk_size=2**20, mode='rb', encoding=None,
-                       errors=None, newline=None, closefd=False):
+                       errors=None, newline=None, closefd=False,
+                       positional=False, use_mmap=False, chunker=None,
+                       stats=None, access=None, readahead=2,
+                       buffer_pool=None):
         """Constructor
 
-        :param file_: the file to split
+        :param file_: the file to split (a binary file object even in text
+            mode)
         :type file_: str, file, io.IOBase
+        :param encoding: text mode encoding, defaults to the locale's
+            preferred encoding like `io.open`
+        :param errors: text mode decoding error handling, see `io.open`
+        :param newline: text mode newline handling, see `io.open`
+        :param positional: if `True`, chunks keep their own position and read
+            with `os.pread` instead of sharing the file position, so many
+            chunks may be live (and read concurrently) at the same time
+        :type positional: bool
+        :param use_mmap: if `True`, map the (regular) file into memory and
+            serve positional chunk reads from the mapping. Chunks then also
+            support zero-copy access through `Chunk.getbuffer`. Implies
+            `positional`. The file is mapped again when `refresh` sees its
+            size change; a file shrinking under the mapping makes accesses
+            past its new end crash the process with SIGBUS until then, so
+            mapped files must not be truncated by others.
+        :type use_mmap: bool
+        :param chunker: if given, chunk boundaries are decided by this
+            chunker (e.g. `FastCDC`) in one pass over the file instead of
+            falling on multiples of `chunk_size`
+        :type chunker: Chunker
+        :param stats: if given, I/O statistics of the file and its chunks are
+            collected here
+        :type stats: IOStats
+        :param access: page cache policy (see `posix_fadvise(2)`). With
+            `'sequential'` the kernel is told the file is read sequentially,
+            the next `readahead` chunks are requested while the current one is
+            processed and chunks are dropped from the page cache once they are
+            closed. With `'random'` kernel read-ahead is turned off and every
+            chunk is requested as a whole when it is handed out. `None` (the
+            default) gives no advice.
+        :type access: str
+        :param readahead: number of chunks requested ahead with
+            `access='sequential'`
+        :type readahead: int
+        :param buffer_pool: if given, chunks borrow their read buffers (see
+            `Chunk.borrow`, `Chunk.digests` and `read_chunks`) from this pool
+            instead of allocating them, typically one of `chunk_size` byte
+            buffers with a memory cap
+        :type buffer_pool: BufferPool
 
         .. note:: If we are on python 2.7 and `file_` is a `file` object, we
             we will dup the fd and open that with `io.open` internally. In this
@@ -41,13 +109,21 @@ class SplitFile(Sequence):
         """
         self._file = file_
 
+        self._text = None
+        if mode in ('r', 'rt'):
+            self._text = TextCodec(
+                encoding or locale.getpreferredencoding(False), errors,
+                newline)
+            mode = 'rb'
+            encoding = errors = newline = None
+
         # check mode passed in is valid (update with 'b' flag if necessary)
         if six.PY2 and len(mode) >= 1:
             if len(mode) == 1 or mode[1] != 'b':
                 logger.warning('adding binary flag to mode...')
                 mode = mode[0] + 'b' + mode[1:]
         if not mode.startswith('rb'):
-            raise ValueError('mode must be "rb\\+?"')
+            raise ValueError('mode must be "r", "rt", "rb" or "rb+"')
 
         # if it looks like we got passed a path, make sure it's a valid file
         # and open it
@@ -72,16 +148,67 @@ class SplitFile(Sequence):
         if not self._file.mode.startswith('rb'):
             raise ValueError('mode must be "rb" or "rb+"')
 
+        # stat data is cached, see `refresh` (the file is mapped below, once
+        # its type is checked)
+        self._stats = stats
+        self._st = None
+        self._use_mmap = False
+        self._mmap = None
+        self.refresh()
+
         # make sure it's a file of the appropriate type
         if not (self.is_reg or self.is_fifo):
             raise ValueError('file type must be S_IFREG or S_IFIFO')
 
+        if use_mmap:
+            positional = True
+        if positional:
+            if not (use_mmap or hasattr(os, 'pread')):
+                raise ValueError('positional reads are not supported on this '
+                                 'platform')
+            if not self.is_reg:
+                raise ValueError('positional reads require a S_IFREG file')
+
+        self._use_mmap = use_mmap
+        self._remap()
+
+        if access not in self.__class__.access_policies:
+            raise ValueError('access must be one of {}'.format(
+                ', '.join(repr(a) for a in self.__class__.access_policies)))
+        self._access = access if self.is_reg else None
+        self._readahead = readahead
+        self._advised = (0, 0)
+        if self._access is not None:
+            self._advise(0, 0, self._access)
+
         self._chunk_size = chunk_size
+        self._positional = positional
+        self._buffer_pool = buffer_pool
+        self._chunker = chunker
+        self._boundaries = None
+        self._boundaries_stamp = None
+        self._digest_cache = {}
+        self._digest_stamp = None
+        self._index = None
+        self._index_stamp = None
         self._iterating = False
         self._current_offset = 0
+        self._cur_index = 0
         self._cur_chunk = None
         self._file.seek(0)
 
+    index_algorithm = 'md5'
+    index_version = 1
+
+    access_policies = (None, 'sequential', 'random')
+
+    _fadvice = dict((name, getattr(os, 'POSIX_FADV_' + name.upper(), None))
+                    for name in ('sequential', 'random', 'willneed',
+                                 'dontneed'))
+    _madvice = dict((name, getattr(mmap, 'MADV_' + name.upper(), None))
+                    for name in ('sequential', 'random', 'willneed',
+                                 'dontneed'))
+
     proxied_attrs = [
         'close',
         'closed',
@@ -111,12 +238,15 @@ class SplitFile(Sequence):
         raise AttributeError(attr)
 
     def __iter__(self):
-        if self._cur_chunk is not None:
+        if self._cur_chunk is not None and not self._positional:
             self._cur_chunk.close()
+        self.refresh()
         self._iterating = True
         self._current_offset = None
         self._cur_chunk = None
-        self.seek(0)
+        self._advised = (0, 0)
+        if not self._positional:
+            self.seek(0)
         return self
 
     def __next__(self):
@@ -124,55 +254,589 @@ class SplitFile(Sequence):
             raise RuntimeError('invalid iterator')
 
         if self._current_offset is None:
-            self._current_offset = 0
+            index = 0
         else:
-            self._cur_chunk.seek(0, os.SEEK_END)
-            self._current_offset = self._file.tell()
-            self._cur_chunk.close()
-        if self._current_offset >= self.size:
+            index = self._cur_index + 1
+            # positional chunks handed out earlier stay open and keep their
+            # position
+            if not self._positional:
+                self._cur_chunk.close()
+        if index >= len(self):
             self._iterating = False
             self._current_offset = None
             self._cur_chunk = None
             raise StopIteration()
-        self._cur_chunk = Chunk(self)
-        return self._cur_chunk
+        return self._set_current(index, self._make_chunk(index))
 
     def next(self):
         return self.__next__()
 
     def __getitem__(self, index):
-        self._iterating = False
+        if isinstance(index, slice):
+            return ChunkView(self, range(*index.indices(len(self))))
         index = len(self) + index if index < 0 else index
         if index < 0 or index >= len(self):
             raise IndexError('index out of range')
-        self._current_offset = index * self._chunk_size
-        self.seek(self._current_offset)
-        self._cur_chunk = Chunk(self)
-        return self._cur_chunk
+        if self._positional:
+            # positional chunks don't share the file position, an
+            # iteration in progress goes on
+            return self._make_chunk(index)
+        self._iterating = False
+        return self._set_current(index, self._make_chunk(index))
 
     def __len__(self):
+        if self._has_layout:
+            return len(self._layout()) - 1
         return self.size // self._chunk_size + \
                 (1 if self.size % self._chunk_size != 0 else 0)
 
+    def _set_current(self, index, chunk):
+        self._cur_index = index
+        self._current_offset = chunk.offset
+        self._cur_chunk = chunk
+        return chunk
+
+    def _make_chunk(self, index):
+        offset, size = self._extent(index)
+        if self._access is not None:
+            self._advise_chunk(index, offset, size)
+        if self._positional:
+            chunk = Chunk._make(self, offset, size)
+        else:
+            chunk = Chunk(self, offset, size)
+        if self._text is not None:
+            return self._text.wrap(chunk)
+        return chunk
+
+    def _chunk(self, index):
+        """Return chunk `index` for internal use (digests, the digest index,
+        manifests, ...)
+
+        Unlike `self[index]` this leaves the iteration state, the current
+        chunk and the page cache advice alone. The chunk reads with
+        positional reads where possible, so the shared file position of a
+        non-positional `SplitFile` doesn't move either.
+        """
+        offset, size = self._extent(index)
+        if self._positional or (self.is_reg and hasattr(os, 'pread')):
+            chunk = Chunk._make(self, offset, size)
+        else:
+            chunk = Chunk(self, offset, size)
+        if self._text is not None:
+            return self._text.wrap(chunk)
+        return chunk
+
+    def _advise_chunk(self, index, offset, size):
+        if self._access == 'random':
+            self._advise(offset, size, 'willneed')
+            return
+        # request the chunks up to index + readahead that weren't requested
+        # yet
+        last = min(index + self._readahead, len(self) - 1)
+        end = sum(self._extent(last))
+        start, advised_end = self._advised
+        if offset < start or offset > advised_end:
+            advised_end = offset
+        if end > advised_end:
+            self._advise(advised_end, end - advised_end, 'willneed')
+        self._advised = (offset, max(end, advised_end))
+
+    def _chunk_closed(self, offset, size):
+        if self._access == 'sequential' and not self.closed:
+            self._advise(offset, size, 'dontneed')
+
+    def _advise(self, offset, length, advice):
+        """Pass `advice` for the byte range on to the kernel
+
+        `length` 0 means up to the end of the file. Advice is best effort, it
+        is silently skipped where it isn't supported.
+        """
+        if hasattr(os, 'posix_fadvise') and \
+                self._fadvice[advice] is not None:
+            try:
+                os.posix_fadvise(self._file.fileno(), offset, length,
+                                 self._fadvice[advice])
+            except OSError as e:
+                logger.debug('posix_fadvise failed: %s', e)
+            if self._stats is not None:
+                self._stats.count('fadvise')
+        # pages mapped by us are not affected by posix_fadvise
+        mm = self._mmap
+        if mm is not None and hasattr(mm, 'madvise') and \
+                self._madvice[advice] is not None:
+            start = offset - offset % mmap.PAGESIZE
+            end = len(mm) if length == 0 else min(offset + length, len(mm))
+            if start < end:
+                try:
+                    mm.madvise(self._madvice[advice], start, end - start)
+                except (OSError, ValueError) as e:
+                    logger.debug('madvise failed: %s', e)
+
+    @property
+    def _has_layout(self):
+        return self._chunker is not None or self._text is not None
+
+    def _extent(self, index):
+        if self._has_layout:
+            boundaries = self._layout()
+            return boundaries[index], \
+                boundaries[index + 1] - boundaries[index]
+        offset = index * self._chunk_size
+        return offset, min(self._chunk_size, self.size - offset)
+
+    def _layout(self):
+        """Return the chunk boundary table for `chunker` (or text mode)
+
+        The table holds the offset of every chunk followed by the file size.
+        It is built in a single pass over the file and rebuilt if the file
+        changes.
+        """
+        stamp = self._stamp(self._st)
+        if self._boundaries is None or stamp != self._boundaries_stamp:
+            if self._chunker is None:
+                boundaries = list(range(0, self.size, self._chunk_size))
+                boundaries.append(self.size)
+            else:
+                lengths = self._chunker.fixed_lengths(self.size)
+                if lengths is None:
+                    lengths = self._chunker.lengths(self._scan())
+                boundaries = [0]
+                for length in lengths:
+                    boundaries.append(boundaries[-1] + length)
+            if self._text is not None:
+                boundaries = self._text.snap(boundaries, self._read_at,
+                                             self._scan())
+            self._boundaries = boundaries
+            self._boundaries_stamp = stamp
+        return self._boundaries
+
+    def extents(self):
+        """Iterate over the `(offset, size)` of every chunk
+
+        This is the cheapest way to walk the chunk layout, no chunk objects
+        are created.
+        """
+        if self._has_layout:
+            boundaries = self._layout()
+            return six.moves.zip(boundaries, [b - a for a, b in
+                                              six.moves.zip(boundaries,
+                                                            boundaries[1:])])
+        chunk_size = self._chunk_size
+        size = self.size
+        return ((offset, min(chunk_size, size - offset))
+                for offset in range(0, size, chunk_size))
+
+    def chunks(self):
+        """Iterate over all chunks without touching the iteration state
+
+        Chunks are made straight from the precomputed offset table, making
+        this the fast path for walking many small chunks. Requires
+        `positional=True`; the chunks stay usable after the loop moves on.
+        """
+        if not self._positional:
+            raise ValueError('chunks() requires positional=True')
+        make = Chunk._make
+        wrap = self._text.wrap if self._text is not None else None
+        for offset, size in self.extents():
+            chunk = make(self, offset, size)
+            yield chunk if wrap is None else wrap(chunk)
+
+    def read_chunks(self, indices, buffers=None, pool=None):
+        """Read the bytes of the chunks at `indices` with vectored reads
+
+        Runs of adjacent chunks are read with one `os.preadv` call, no chunk
+        objects are created and the file position isn't moved. The data goes
+        into `buffers` (one per index, each at least as large as its chunk),
+        into buffers acquired from `pool` (a `BufferPool`, by default
+        `buffer_pool`; release them when done) or into new buffers, also
+        used for chunks larger than the pool's buffers.
+
+        :returns: a `memoryview` of the bytes of every chunk, in the order of
+            `indices`
+        :rtype: list
+        """
+        pool = self._buffer_pool if pool is None else pool
+        length = len(self)
+        extents = []
+        for index in indices:
+            index = length + index if index < 0 else index
+            if index < 0 or index >= length:
+                raise IndexError('index out of range')
+            extents.append(self._extent(index))
+        if buffers is None:
+            # chunks larger than the pool's buffers get buffers of their own
+            buffers = [pool.acquire() if pool is not None and
+                       size <= pool.buffer_size else bytearray(size)
+                       for _, size in extents]
+        elif len(buffers) != len(extents):
+            raise ValueError('need one buffer per chunk')
+        views = []
+        for buffer_, (_, size) in six.moves.zip(buffers, extents):
+            view = memoryview(buffer_)
+            if view.ndim != 1 or view.itemsize != 1:
+                view = view.cast('B')
+            if len(view) < size:
+                raise ValueError('buffer smaller than its chunk')
+            views.append(view[:size])
+        start = 0
+        for i in range(1, len(extents) + 1):
+            if i < len(extents) and i - start < _IOV_MAX and \
+                    sum(extents[i - 1]) == extents[i][0]:
+                continue
+            # read the run of adjacent chunks start..i-1
+            remaining = self._readv(views[start:i], extents[start][0])
+            for j in range(start, i):
+                views[j] = views[j][:min(len(views[j]), remaining)]
+                remaining -= len(views[j])
+            start = i
+        return views
+
+    def _readv(self, views, offset):
+        """Fill `views` with the bytes at `offset`, return the bytes read"""
+        total = 0
+        if self._use_mmap or not hasattr(os, 'preadv'):
+            for view in views:
+                data = self._pread(len(view), offset + total)
+                view[:len(data)] = data
+                total += len(data)
+                if len(data) < len(view):
+                    break
+            return total
+        fd = self._file.fileno()
+        views = list(views)
+        while views:
+            size = os.preadv(fd, views, offset + total)
+            if self._stats is not None:
+                self._stats.count('preadv', size)
+            if not size:
+                break
+            total += size
+            # drop what's filled, the rest continues where this read ended
+            while views and size >= len(views[0]):
+                size -= len(views.pop(0))
+            if size:
+                views[0] = views[0][size:]
+        return total
+
+    def _read_at(self, size, offset):
+        """Read without moving any chunk cursors"""
+        if self._positional:
+            return self._pread(size, offset)
+        pos = self._file.tell()
+        try:
+            self._file.seek(offset)
+            return self._file.read(size)
+        finally:
+            self._file.seek(pos)
+
+    def _scan(self, block_size=2**22):
+        """Yield the whole file in blocks without moving any chunk cursors"""
+        if self._positional:
+            offset = 0
+            data = self._pread(block_size, offset)
+            while data:
+                yield data
+                offset += len(data)
+                data = self._pread(block_size, offset)
+            return
+        pos = self._file.tell()
+        try:
+            self._file.seek(0)
+            data = self._file.read(block_size)
+            while data:
+                yield data
+                data = self._file.read(block_size)
+        finally:
+            self._file.seek(pos)
+
+    def _pread(self, size, offset):
+        stats = self._stats
+        if self._use_mmap:
+            if self._mmap is None:
+                return b''
+            data = self._mmap[offset:offset + size]
+            if stats is not None:
+                stats.count('mmap', len(data))
+            return data
+        fd = self._file.fileno()
+        pieces = []
+        while size > 0:
+            data = os.pread(fd, size, offset)
+            if stats is not None:
+                stats.count('pread', len(data))
+            if not data:
+                break
+            pieces.append(data)
+            size -= len(data)
+            offset += len(data)
+        return b''.join(pieces)
+
+    def _preadinto(self, view, offset):
+        if not hasattr(os, 'preadv'):
+            data = self._pread(len(view), offset)
+            view[:len(data)] = data
+            return len(data)
+        size = os.preadv(self._file.fileno(), [view], offset)
+        if self._stats is not None:
+            self._stats.count('preadv', size)
+        return size
+
+    def _cached_digests(self, offset, size):
+        stamp = self.stamp
+        if stamp != self._digest_stamp:
+            self._digest_cache = {}
+            self._digest_stamp = stamp
+        return self._digest_cache.setdefault((offset, size), {})
+
+    def digests(self, algorithms=('md5', ), workers=None):
+        """Return the digests of every chunk
+
+        :param algorithms: names of the digest algorithms (see
+            `Chunk.digests`)
+        :param workers: if given, hash chunks on this many threads (requires
+            `positional=True`)
+        :returns: a list with a dict of hex digests per chunk
+        :rtype: list
+        """
+        if workers is None:
+            return [self._chunk(i).digests(algorithms)
+                    for i in range(len(self))]
+        if not self._positional:
+            raise ValueError('parallel digests require positional=True')
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda c: c.digests(algorithms),
+                                     [self._chunk(i)
+                                      for i in range(len(self))]))
+
+    def split_to_files(self, directory, template='part-{index:05d}'):
+        """Write every chunk to its own file in `directory`
+
+        Chunks are copied with `Chunk.copy_to`, so the data is moved by the
+        kernel where possible.
+
+        :param template: file name template, formatted with the chunk's
+            `index` and `offset`
+        :returns: the paths written, in chunk order
+        :rtype: list
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        paths = []
+        for index in range(len(self)):
+            path = os.path.join(directory, template.format(
+                index=index, offset=self._extent(index)[0]))
+            chunk = self[index]
+            try:
+                chunk.copy_to(path)
+            finally:
+                chunk.close()
+            paths.append(path)
+        return paths
+
+    def manifest(self, algorithm='md5', workers=None):
+        """Return a `Manifest` of the chunk layout and digests"""
+        return Manifest.build(self, algorithm, workers)
+
+    def changed_chunks(self, manifest, verify='stat'):
+        """Return the indices of the chunks that are new or changed since
+        `manifest` (a `Manifest` or the path of a saved one) was made
+
+        See `Manifest.changed_chunks`.
+        """
+        if isinstance(manifest, six.string_types):
+            manifest = Manifest.load(manifest)
+        return manifest.changed_chunks(self, verify)
+
+    def merkle_tree(self, algorithm='md5', workers=None):
+        """Return a `MerkleTree` over the chunk digests"""
+        return MerkleTree.from_split_file(self, algorithm, workers)
+
+    def etag(self, workers=None):
+        """Return the S3 ETag of a multipart upload with a part per chunk"""
+        return self.merkle_tree('md5', workers).etag
+
+    def descriptors(self):
+        """Return a picklable `ChunkDescriptor` for every chunk"""
+        return parallel.describe(self)
+
+    def map(self, func, workers=None, chunksize=1):
+        """Return `[func(chunk) for chunk in self]`, computed by `workers`
+        processes
+
+        See `imap` for the requirements on `func`.
+        """
+        return list(parallel.imap(self, func, workers, chunksize))
+
+    def imap(self, func, workers=None, chunksize=1):
+        """Apply `func` to every chunk on a pool of `workers` processes
+
+        `func` must be picklable (e.g. a module level function). Each worker
+        reopens the file once and calls `func` with a chunk of it; chunks are
+        described to the workers in batches of `chunksize`.
+
+        :returns: an iterator over the results in chunk order
+        """
+        return parallel.imap(self, func, workers, chunksize)
+
+    def imap_unordered(self, func, workers=None, chunksize=1):
+        """Like `imap` but yield `(index, result)` tuples as they complete"""
+        return parallel.imap(self, func, workers, chunksize, ordered=False)
+
     def __contains__(self, item):
-        logging.warning('__contains__ is very inefficient')
-        item_md5 = item.md5
-        for chunk in self:
-            if chunk.md5 == item_md5:
-                return True
-        return False
+        return self._item_digest(item) in self._digest_index()
+
+    def index(self, item, start=0, stop=None):
+        """Return the index of the first chunk with the same contents as item
+
+        Uses the digest index, see `load_index`.
+        """
+        length = len(self)
+        start = max(length + start, 0) if start < 0 else start
+        stop = length if stop is None else stop
+        stop = max(length + stop, 0) if stop < 0 else stop
+        indices = self._digest_index().get(self._item_digest(item), [])
+        pos = bisect_left(indices, start)
+        if pos < len(indices) and indices[pos] < stop:
+            return indices[pos]
+        raise ValueError('chunk not in SplitFile')
+
+    def count(self, item):
+        """Return the number of chunks with the same contents as item"""
+        return len(self._digest_index().get(self._item_digest(item), []))
+
+    def _item_digest(self, item):
+        algorithm = self.__class__.index_algorithm
+        return item.digests((algorithm, ))[algorithm]
+
+    def _digest_index(self):
+        stamp = self.stamp
+        if self._index is None or stamp != self._index_stamp:
+            algorithm = self.__class__.index_algorithm
+            index = {}
+            for i, digests in enumerate(self.digests((algorithm, ))):
+                index.setdefault(digests[algorithm], []).append(i)
+            self._index = index
+            self._index_stamp = stamp
+        return self._index
+
+    def _index_key(self):
+        st = os.fstat(self._file.fileno())
+        key = {
+            'version': self.__class__.index_version,
+            'algorithm': self.__class__.index_algorithm,
+            'chunk_size': self._chunk_size,
+            'size': st.st_size,
+            'mtime': getattr(st, 'st_mtime_ns', st.st_mtime),
+            'layout': None,
+        }
+        if self._has_layout:
+            # chunker and text mode boundaries don't follow from chunk_size
+            key['layout'] = hashlib.md5(
+                json.dumps(self._layout()).encode('ascii')).hexdigest()
+        return key
+
+    def save_index(self, path):
+        """Build (if necessary) and save the digest index to `path`"""
+        data = self._index_key()
+        data['index'] = self._digest_index()
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(six.text_type(json.dumps(data)))
+
+    def load_index(self, path):
+        """Load a digest index saved by `save_index`
+
+        The index is only used if it was built with the same chunk layout
+        and the file's size and mtime haven't changed since.
+
+        :returns: whether the index was loaded
+        :rtype: bool
+        """
+        try:
+            with io.open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return False
+        index = data.pop('index', None)
+        if index is None or data != self._index_key():
+            return False
+        self._index = index
+        self._index_stamp = self.stamp
+        return True
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # chunk views are still alive, the mapping goes away once
+                # they are released
+                logger.warning('closing SplitFile with live chunk views')
+            self._mmap = None
+        self._file.close()
+
+    def refresh(self):
+        """Refresh the cached stat data of the file
+
+        `size`, `len()` and the chunk layout are based on stat data cached
+        when the file was opened. It is refreshed at the start of every
+        iteration, whenever `stamp` is read (e.g. when looking up digests)
+        and by calling this method, e.g. after writing to the file. With
+        `use_mmap` the file is mapped again if its size changed.
+        """
+        self._st = os.fstat(self._file.fileno())
+        if self._stats is not None:
+            self._stats.count('fstat')
+        mapped = 0 if self._mmap is None else len(self._mmap)
+        if self._use_mmap and self._st.st_size != mapped:
+            # the file grew or shrank, chunks must not read the old mapping
+            self._remap()
+        return self._st
+
+    def _remap(self):
+        """Map the file again, with its current size"""
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # chunk views are still alive, the old mapping goes away
+                # once they are released
+                pass
+            self._mmap = None
+        # mmap refuses to map empty files, there's nothing to read in that
+        # case anyway
+        if self._use_mmap and self.size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _stamp(st):
+        return (st.st_ino, st.st_size,
+                getattr(st, 'st_mtime_ns', st.st_mtime),
+                getattr(st, 'st_ctime_ns', st.st_ctime))
+
+    @property
+    def closed(self):
+        return self._file.closed
 
     @property
     def is_reg(self):
-        return stat.S_ISREG(os.fstat(self._file.fileno()).st_mode)
+        return stat.S_ISREG(self._st.st_mode)
 
     @property
     def is_fifo(self):
-        return stat.S_ISFIFO(os.fstat(self._file.fileno()).st_mode)
+        return stat.S_ISFIFO(self._st.st_mode)
 
     @property
     def size(self):
-        return os.fstat(self._file.fileno()).st_size
+        return self._st.st_size
+
+    @property
+    def stamp(self):
+        """Identity of the file contents (inode, size, mtime and ctime)
+
+        Always based on fresh stat data (and refreshes the cached data).
+        """
+        return self._stamp(self.refresh())
 
     @property
     def chunk(self):
@@ -184,6 +848,8 @@ class SplitFile(Sequence):
 
     @property
     def bytes_remaining(self):
+        if self._positional:
+            return self.size - (self._current_offset or 0)
         return self.size - self._file.tell()
 
     @property
@@ -194,14 +860,152 @@ class SplitFile(Sequence):
     def chunk_size(self):
         return self._chunk_size
 
+    @property
+    def chunker(self):
+        return self._chunker
+
+    @property
+    def positional(self):
+        return self._positional
+
+    @property
+    def buffer_pool(self):
+        return self._buffer_pool
+
+    @property
+    def encoding(self):
+        if self._text is None:
+            return self._file.encoding
+        return self._text.encoding
+
+    @property
+    def errors(self):
+        if self._text is None:
+            return self._file.errors
+        return self._text.errors
+
+    @property
+    def text(self):
+        """The `TextCodec` in text mode, else `None`"""
+        return self._text
+
+    @property
+    def use_mmap(self):
+        return self._use_mmap
+
+    @property
+    def stats(self):
+        return self._stats
+
+    @property
+    def access(self):
+        return self._access
+
+    @property
+    def readahead(self):
+        return self._readahead
+
     @property
     def file(self):
         return self._file
 
     def delete_range(self, offset, length):
-        raise NotImplementedError()
+        """Remove `length` bytes at `offset` from the file in place
+
+        The file must be open for writing (mode `rb+`). Data is shifted with
+        kernel side copies, or the range is collapsed out of the file
+        altogether where the filesystem supports it and the range is block
+        aligned. Chunks obtained earlier are stale afterwards.
+        """
+        self._check_range(offset, length)
+        self._modify(ranges.delete_range, offset, length)
 
     def move_range(self, src_offset, length, dst_offset):
-        raise NotImplementedError()
+        """Move `length` bytes at `src_offset` so they start at `dst_offset`
+
+        `dst_offset` is an offset in the resulting file, the file size is
+        unchanged. See `delete_range`.
+        """
+        self._check_range(src_offset, length)
+        self._check_range(dst_offset, length)
+        directory = None
+        if isinstance(self.name, six.string_types):
+            directory = os.path.dirname(os.path.abspath(self.name))
+        self._modify(ranges.move_range, src_offset, length, dst_offset,
+                     directory)
+
+    def _check_range(self, offset, length):
+        size = self.refresh().st_size
+        if offset < 0 or length < 0 or offset + length > size:
+            raise ValueError('range out of bounds')
+
+    def _modify(self, func, *args):
+        if not self._file.writable():
+            raise io.UnsupportedOperation('file not open for writing, use '
+                                          'mode "rb+"')
+        self._file.flush()
+        # the mapping would expose the shifted data (or fault past the new
+        # end of the file), this raises BufferError while chunk views are
+        # alive
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        try:
+            func(self._file.fileno(), *args)
+        finally:
+            # seeking relative to the end drops any buffered data
+            self._file.seek(0, os.SEEK_END)
+            self._file.seek(0)
+            self._iterating = False
+            self._current_offset = 0
+            self._cur_index = 0
+            self._cur_chunk = None
+            self._boundaries = None
+            self._digest_cache = {}
+            self._digest_stamp = None
+            self._index = None
+            self._advised = (0, 0)
+            # maps the file again
+            self.refresh()
+            if self._mmap is not None and self._access is not None:
+                self._advise(0, 0, self._access)
+
 
+class ChunkView(Sequence):
+    """A lazy view of a range of chunks, see `SplitFile.__getitem__`
 
+    Chunks are only created when they are accessed.
+    """
+    def __init__(self, split_file, indices):
+        self._split_file = split_file
+        self._indices = indices
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ChunkView(self._split_file, self._indices[index])
+        return self._split_file[self._indices[index]]
+
+    def __iter__(self):
+        for index in self._indices:
+            yield self._split_file[index]
+
+    def extents(self):
+        """Iterate over the `(offset, size)` of every chunk in the view"""
+        return (self._split_file._extent(i) for i in self._indices)
+
+    def read_chunks(self, buffers=None, pool=None):
+        """Read the bytes of every chunk in the view, see
+        `SplitFile.read_chunks`
+        """
+        return self._split_file.read_chunks(self._indices, buffers, pool)
+
+    @property
+    def indices(self):
+        return self._indices
+
+    @property
+    def split_file(self):
+        return self._split_file
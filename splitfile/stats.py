@@ -0,0 +1,188 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import threading
+import time
+
+from bisect import bisect_left
+from collections import namedtuple
+from functools import wraps
+
+
+try:
+    _clock = time.perf_counter
+except AttributeError:
+    _clock = time.time
+
+
+IOEvent = namedtuple('IOEvent', ['op', 'offset', 'nbytes', 'elapsed'])
+
+
+class _OpStats(object):
+    __slots__ = ('count', 'nbytes', 'elapsed', 'histogram')
+
+    def __init__(self, buckets):
+        self.count = 0
+        self.nbytes = 0
+        self.elapsed = 0.0
+        self.histogram = [0] * (len(buckets) + 1) if buckets else None
+
+    def add(self, nbytes, elapsed, buckets):
+        self.count += 1
+        self.nbytes += nbytes
+        self.elapsed += elapsed
+        if self.histogram is not None:
+            self.histogram[bisect_left(buckets, elapsed)] += 1
+
+    def as_dict(self, buckets):
+        data = {
+            'count': self.count,
+            'bytes': self.nbytes,
+            'time': self.elapsed,
+        }
+        if self.histogram is not None:
+            data['histogram'] = dict(
+                zip([repr(b) for b in buckets] + ['inf'], self.histogram))
+        return data
+
+
+class IOStats(object):
+    """IOStats class
+
+    Collects I/O statistics for a `SplitFile` and its chunks. Pass an
+    instance as `SplitFile(..., stats=IOStats())`; without one the hot paths
+    only pay for an attribute check.
+
+    Chunk operations (`read`, `readline`, `readlines`, `readinto`, `seek`,
+    `copy_to` and `digests`, which includes `md5`) are timed; their counts,
+    bytes returned and total time are kept in aggregate and per chunk (keyed
+    by chunk offset), with a latency histogram for the aggregate. Operations
+    called from within another operation (e.g. the reads made to compute a
+    digest) are accounted to the outer one only. `bytes_read` counts the
+    bytes actually taken from the file and the system calls made for it
+    (`pread`, `read`, `copy_file_range`, `sendfile`, `fstat`, ...) are
+    counted as well. Every timed operation is also passed to the callbacks
+    as an `IOEvent`, e.g. to feed a metrics system.
+    """
+    default_buckets = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+
+    def __init__(self, per_chunk=True, callbacks=(), buckets=None):
+        """Constructor
+
+        :param per_chunk: whether to keep per chunk statistics
+        :param callbacks: callables receiving an `IOEvent` per operation
+        :param buckets: upper bounds (in seconds) of the latency histogram
+            buckets, an `inf` bucket is added
+        """
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._per_chunk = per_chunk
+        self._callbacks = list(callbacks)
+        self._buckets = tuple(self.__class__.default_buckets
+                              if buckets is None else buckets)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._ops = {}
+            self._chunks = {}
+            self._calls = {}
+            self._bytes_read = 0
+
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self._callbacks.remove(callback)
+
+    def record(self, op, offset, nbytes, elapsed):
+        """Record a timed operation on the chunk at `offset`"""
+        with self._lock:
+            ops = self._ops.get(op)
+            if ops is None:
+                ops = self._ops[op] = _OpStats(self._buckets)
+            ops.add(nbytes, elapsed, self._buckets)
+            if self._per_chunk:
+                chunk = self._chunks.setdefault(offset, {})
+                ops = chunk.get(op)
+                if ops is None:
+                    ops = chunk[op] = _OpStats(None)
+                ops.add(nbytes, elapsed, None)
+        if self._callbacks:
+            event = IOEvent(op, offset, nbytes, elapsed)
+            for callback in self._callbacks:
+                callback(event)
+
+    def count(self, call, nbytes=0):
+        """Count a system call that read `nbytes` from the file"""
+        with self._lock:
+            self._calls[call] = self._calls.get(call, 0) + 1
+            self._bytes_read += nbytes
+
+    @property
+    def bytes_read(self):
+        return self._bytes_read
+
+    def calls(self, call):
+        with self._lock:
+            return self._calls.get(call, 0)
+
+    def op(self, op):
+        """Return `{'count', 'bytes', 'time'[, 'histogram']}` for `op`"""
+        with self._lock:
+            stats = self._ops.get(op)
+            return stats.as_dict(self._buckets) if stats else None
+
+    def snapshot(self):
+        """Return all statistics as a (JSON serialisable) dict"""
+        with self._lock:
+            return {
+                'bytes_read': self._bytes_read,
+                'calls': dict(self._calls),
+                'ops': dict((op, s.as_dict(self._buckets))
+                            for op, s in self._ops.items()),
+                'chunks': dict((offset, dict((op, s.as_dict(None))
+                                             for op, s in ops.items()))
+                               for offset, ops in self._chunks.items()),
+            }
+
+
+def _nbytes(result):
+    if isinstance(result, int):
+        return result
+    try:
+        return len(result)
+    except TypeError:
+        return 0
+
+
+def instrumented(op):
+    """Decorate a `Chunk` method so that it is timed if stats are enabled"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            stats = self._container._stats
+            if stats is None:
+                return func(self, *args, **kwargs)
+            local = stats._local
+            depth = getattr(local, 'depth', 0)
+            local.depth = depth + 1
+            try:
+                start = _clock()
+                result = func(self, *args, **kwargs)
+                elapsed = _clock() - start
+            finally:
+                local.depth = depth
+            if depth:
+                return result
+            if op == 'readlines':
+                nbytes = sum(len(l) for l in result)
+            elif op in ('seek', 'digests'):
+                nbytes = 0
+            else:
+                nbytes = _nbytes(result)
+            stats.record(op, self._offset, nbytes, elapsed)
+            return result
+        return wrapper
+    return decorator
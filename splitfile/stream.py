@@ -0,0 +1,241 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import io
+import logging
+import threading
+
+import six
+
+from six.moves import queue
+
+from .chunk import Chunk
+
+
+logger = logging.getLogger(__name__)
+
+
+class _BufferContainer(object):
+    """Memory backed container for a single chunk of a stream
+
+    Looks enough like a positional, mapped `SplitFile` for `Chunk` to serve
+    reads, lines, digests and buffers straight from the chunk buffer.
+    """
+    positional = True
+    use_mmap = True
+    buffer_pool = None
+    _stats = None
+
+    def __init__(self, buffer_, size):
+        self._mmap = buffer_
+        self._size = size
+        self._digests = {}
+        self.closed = False
+
+    @property
+    def chunk_size(self):
+        return self._size
+
+    def _pread(self, size, offset):
+        return bytes(self._mmap[offset:min(offset + size, self._size)])
+
+    def _cached_digests(self, offset, size):
+        return self._digests
+
+    def _chunk_closed(self, offset, size):
+        pass
+
+
+class StreamChunk(Chunk):
+    """A chunk of a `StreamSplitFile`
+
+    Closing the chunk hands its buffer back to the stream so it can be
+    refilled; the chunk (and any buffer views obtained from it) must not be
+    used afterwards. The stream closes it when the next chunk is requested
+    unless it was `detach`ed.
+    """
+    def __init__(self, stream, index, offset, buffer_, size):
+        self._stream = stream
+        self._index = index
+        self._stream_offset = offset
+        self._buffer = buffer_
+        self._detached = False
+        super(StreamChunk, self).__init__(_BufferContainer(buffer_, size),
+                                          0, size)
+
+    def detach(self):
+        """Keep the chunk open when the stream moves on to the next one,
+        e.g. to hand it to another thread; it must then be closed by the
+        caller
+        """
+        self._detached = True
+
+    @property
+    def detached(self):
+        return self._detached
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def offset(self):
+        return self._stream_offset
+
+    def close(self):
+        if not self._closed:
+            super(StreamChunk, self).close()
+            self._container.closed = True
+            self._stream._release(self._buffer)
+
+
+class StreamSplitFile(object):
+    """StreamSplitFile class
+
+    Split an unseekable stream (pipe, FIFO, socket) into chunks while it is
+    being read. A background thread reads ahead into a bounded ring of
+    `max_chunks` buffers of `chunk_size` bytes and chunks are handed out as
+    soon as their buffer is full, so the producer only stalls once
+    `max_chunks` chunks are waiting or held by the consumer. Closing a chunk
+    returns its buffer to the ring. Like a non-positional `SplitFile`,
+    iterating closes the previous chunk, unless it was detached (see
+    `StreamChunk.detach`) to be processed concurrently and closed later.
+
+    Iteration is single pass.
+    """
+    def __init__(self, file_, chunk_size=2**20, max_chunks=4):
+        """Constructor
+
+        :param file_: the stream to split
+        :type file_: str, int, file, io.IOBase, socket.socket
+        :param chunk_size: size of every chunk but the last
+        :param max_chunks: maximum number of chunk buffers in existence
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be >= 1')
+        if max_chunks < 1:
+            raise ValueError('max_chunks must be >= 1')
+        self._owns_file = isinstance(file_, (six.string_types, int))
+        if self._owns_file:
+            file_ = io.open(file_, 'rb', buffering=0)
+        if hasattr(file_, 'recv_into'):
+            self._readinto = file_.recv_into
+        elif hasattr(file_, 'readinto'):
+            self._readinto = file_.readinto
+        else:
+            raise ValueError('file_ must be a path, fd, file or socket')
+        self._file = file_
+        self._chunk_size = chunk_size
+        self._max_chunks = max_chunks
+        self._free = queue.Queue()
+        for _ in range(max_chunks):
+            # buffers are allocated on first use
+            self._free.put(bytearray())
+        self._ready = queue.Queue()
+        self._closed = False
+        self._done = False
+        self._index = 0
+        self._offset = 0
+        self._last = None
+        self._thread = threading.Thread(target=self._fill)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise ValueError('I/O operation on closed file')
+        last, self._last = self._last, None
+        if last is not None and not last.detached:
+            # otherwise the reader could wait for its buffer forever
+            last.close()
+        if self._done:
+            raise StopIteration()
+        item = self._ready.get()
+        if item is None:
+            self._done = True
+            raise StopIteration()
+        if isinstance(item, BaseException):
+            self._done = True
+            raise item
+        buffer_, size = item
+        chunk = StreamChunk(self, self._index, self._offset, buffer_, size)
+        self._last = chunk
+        self._index += 1
+        self._offset += size
+        return chunk
+
+    def next(self):
+        return self.__next__()
+
+    def _fill(self):
+        try:
+            while True:
+                buffer_ = self._free.get()
+                if self._closed:
+                    return
+                if len(buffer_) != self._chunk_size:
+                    buffer_ = bytearray(self._chunk_size)
+                size = self._read_full(buffer_)
+                if size:
+                    self._ready.put((buffer_, size))
+                if size < self._chunk_size:
+                    break
+        except Exception as e:
+            logger.debug('error reading stream', exc_info=True)
+            self._ready.put(e)
+            return
+        self._ready.put(None)
+
+    def _read_full(self, buffer_):
+        view = memoryview(buffer_)
+        size = 0
+        while size < len(view) and not self._closed:
+            read = self._readinto(view[size:])
+            if not read:
+                break
+            size += read
+        return size
+
+    def _release(self, buffer_):
+        self._free.put(buffer_)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        # wake the reader if it's waiting for a buffer
+        self._free.put(bytearray())
+        if self._owns_file:
+            self._file.close()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def chunk_size(self):
+        return self._chunk_size
+
+    @property
+    def max_chunks(self):
+        return self._max_chunks
+
+    @property
+    def positional(self):
+        # chunks hold their own data and can be used concurrently
+        return True
+
+    @property
+    def offset(self):
+        """Number of bytes handed out in chunks so far"""
+        return self._offset
@@ -20,6 +20,7 @@ logging.basicConfig(level=logging.CRITICAL)
 
 class BaseTest(TestCase):
     chunk_size = 1024
+    split_file_kwargs = {}
 
     def setUp(self):
         bin_fd = None
@@ -29,7 +30,8 @@ class BaseTest(TestCase):
                 io.open(os.path.join(data_path, 'test.bin'), 'rb'),
                 io.open(bin_fd, 'wb', closefd=False))
             self._bin_split_file = \
-                SplitFile(bin_temp_path, self.__class__.chunk_size)
+                SplitFile(bin_temp_path, self.__class__.chunk_size,
+                          **self.__class__.split_file_kwargs)
         finally:
             if bin_fd is not None:
                 os.close(bin_fd)
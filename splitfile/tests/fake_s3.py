@@ -0,0 +1,127 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import hashlib
+import threading
+import time
+import uuid
+
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.http_client import HTTPConnection
+from six.moves.socketserver import ThreadingMixIn
+from six.moves.urllib.parse import parse_qs, urlparse
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    """Just enough of the S3 multipart upload API for tests"""
+
+    def log_message(self, *args):
+        pass
+
+    def _parse(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query, keep_blank_values=True)
+        return url.path, dict((k, v[0]) for k, v in query.items())
+
+    def _respond(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_POST(self):
+        server = self.server
+        key, query = self._parse()
+        self._body()
+        if 'uploads' in query:
+            upload_id = uuid.uuid4().hex
+            with server.lock:
+                server.uploads[upload_id] = {}
+            self._respond(200, upload_id.encode('ascii'))
+        elif 'uploadId' in query:
+            with server.lock:
+                parts = server.uploads.pop(query['uploadId'])
+                server.objects[key] = b''.join(
+                    parts[n] for n in sorted(parts))
+            etag = hashlib.md5(b''.join(
+                hashlib.md5(parts[n]).digest() for n in sorted(parts)))
+            self._respond(200, headers={'ETag': '"{}-{}"'.format(
+                etag.hexdigest(), len(parts))})
+        else:
+            self._respond(400)
+
+    def do_PUT(self):
+        server = self.server
+        key, query = self._parse()
+        body = self._body()
+        part_number = int(query['partNumber'])
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.in_flight, server.max_in_flight)
+            fail = server.failures.get(part_number, 0)
+            if fail:
+                server.failures[part_number] = fail - 1
+        try:
+            time.sleep(server.part_delay)
+            if fail:
+                self._respond(500)
+                return
+            with server.lock:
+                server.uploads[query['uploadId']][part_number] = body
+            self._respond(200, headers={
+                'ETag': '"{}"'.format(hashlib.md5(body).hexdigest())})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def do_GET(self):
+        key, _ = self._parse()
+        with self.server.lock:
+            body = self.server.objects.get(key)
+        if body is None:
+            self._respond(404)
+        else:
+            self._respond(200, body)
+
+
+class FakeS3Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, part_delay=0.0):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), FakeS3Handler)
+        self.lock = threading.Lock()
+        self.uploads = {}
+        self.objects = {}
+        # part_number -> number of times the part should fail
+        self.failures = {}
+        self.part_delay = part_delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        kwargs={'poll_interval': 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def request(self, method, path, body=None):
+        con = HTTPConnection(*self.server_address)
+        try:
+            con.request(method, path, body)
+            response = con.getresponse()
+            return response.status, response.getheaders(), response.read()
+        finally:
+            con.close()
@@ -0,0 +1,109 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import hashlib
+import io
+import os
+import sys
+
+from unittest import SkipTest
+
+from . import BaseTest, data_path
+
+if sys.version_info >= (3, 5, 2):
+    import asyncio
+
+    from splitfile import AsyncSplitFile, IOStats
+
+
+class AsyncSplitFileTest(BaseTest):
+    prefetch = 2
+
+    def setUp(self):
+        if 'AsyncSplitFile' not in globals():
+            raise SkipTest('asyncio support requires python >= 3.5.2')
+        super(AsyncSplitFileTest, self).setUp()
+        self.async_file = AsyncSplitFile(self.split_file.name,
+                                         self.__class__.chunk_size,
+                                         prefetch=self.__class__.prefetch)
+        with io.open(os.path.join(data_path, 'test.bin'), 'rb') as f:
+            self.data = f.read()
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.async_file.close()
+        self.loop.close()
+        super(AsyncSplitFileTest, self).tearDown()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def expected(self, index):
+        chunk_size = self.__class__.chunk_size
+        return self.data[index * chunk_size:(index + 1) * chunk_size]
+
+    def test_iterate(self):
+        async def collect():
+            chunks = []
+            async for chunk in self.async_file:
+                head = await chunk.read(10)
+                chunks.append(head + await chunk.read())
+            return chunks
+
+        chunks = self.run_async(collect())
+        self.assertEqual(len(self.async_file), len(chunks))
+        self.assertEqual(self.data, b''.join(chunks))
+
+    def test_prefetch(self):
+        async def first():
+            async for chunk in self.async_file:
+                return chunk
+
+        self.run_async(first())
+        expected = set(range(1, min(1 + self.__class__.prefetch,
+                                    len(self.async_file))))
+        self.assertEqual(expected, set(self.async_file._pending))
+
+    def test_readinto(self):
+        async def read(index):
+            chunk = self.async_file.chunk(index)
+            buffer_ = bytearray(chunk.size)
+            chunk.seek(1)
+            size = await chunk.readinto(buffer_)
+            return bytes(buffer_[:size])
+
+        self.assertEqual(self.expected(3)[1:], self.run_async(read(3)))
+        self.assertEqual(self.expected(8)[1:], self.run_async(read(-1)))
+
+    def test_digests(self):
+        async def md5s():
+            return [await chunk.md5() async for chunk in self.async_file]
+
+        self.assertEqual([hashlib.md5(self.expected(i)).hexdigest()
+                          for i in range(len(self.async_file))],
+                         self.run_async(md5s()))
+        digests = self.run_async(self.async_file.digests(('sha1', ), 2))
+        self.assertEqual(hashlib.sha1(self.expected(0)).hexdigest(),
+                         digests[0]['sha1'])
+
+    def test_digests_read_once(self):
+        async def md5s():
+            return [await chunk.md5() async for chunk in async_file]
+
+        stats = IOStats()
+        async_file = AsyncSplitFile(self.split_file.name,
+                                    self.__class__.chunk_size,
+                                    prefetch=self.__class__.prefetch,
+                                    stats=stats)
+        try:
+            self.assertEqual([hashlib.md5(self.expected(i)).hexdigest()
+                              for i in range(len(async_file))],
+                             self.run_async(md5s()))
+        finally:
+            async_file.close()
+        self.assertEqual(len(self.data), stats.bytes_read)
+
+
+class NoPrefetchAsyncSplitFileTest(AsyncSplitFileTest):
+    prefetch = 0
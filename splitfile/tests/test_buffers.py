@@ -0,0 +1,156 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import gc
+
+from unittest import TestCase
+
+from splitfile import BufferPool, MultiSplitFile, RecordChunker, SplitFile
+
+from . import BaseTest
+
+
+class BufferPoolTest(TestCase):
+    def test_reuse(self):
+        pool = BufferPool(16)
+        buffer_ = pool.acquire()
+        self.assertEqual(16, len(buffer_))
+        pool.release(memoryview(buffer_)[:4])
+        self.assertTrue(pool.acquire() is buffer_)
+        self.assertRaises(ValueError, BufferPool, 0)
+
+    def test_max_bytes(self):
+        pool = BufferPool(16, max_bytes=32)
+        buffers = [pool.acquire() for _ in range(3)]
+        self.assertEqual(32, pool.total_bytes)
+        for buffer_ in buffers:
+            pool.release(buffer_)
+        # the third buffer was never the pool's
+        self.assertEqual(32, pool.free_bytes)
+        pool.release(bytearray(16))
+        pool.release(buffers[0])
+        self.assertEqual(32, pool.free_bytes)
+        buffer_ = pool.acquire()
+        self.assertTrue(any(buffer_ is b for b in buffers[:2]))
+
+    def test_foreign_buffer(self):
+        pool = BufferPool(16, max_bytes=16)
+        pool.acquire()
+        # dropped and not released, its id may be reused by other objects
+        others = [bytearray(16) for _ in range(100)]
+        for other in others:
+            pool.release(other)
+        self.assertEqual(0, pool.free_bytes)
+
+    def test_dropped(self):
+        pool = BufferPool(16, max_bytes=32)
+        views = [memoryview(pool.acquire()) for _ in range(2)]
+        kept = views[0].obj
+        del views
+        gc.collect()
+        # the dropped buffer no longer counts, the kept one isn't reused
+        self.assertEqual(16, pool.total_bytes)
+        buffer_ = pool.acquire()
+        self.assertEqual(32, pool.total_bytes)
+        self.assertFalse(buffer_ is kept)
+        pool.release(kept)
+        self.assertTrue(pool.acquire() is kept)
+
+
+class PooledChunkTest(BaseTest):
+    def setUp(self):
+        super(PooledChunkTest, self).setUp()
+        self.pool = BufferPool(self.chunk_size, max_bytes=4 * self.chunk_size)
+        self.split_file = SplitFile(self.split_file.name, self.chunk_size,
+                                    buffer_pool=self.pool,
+                                    **self.__class__.split_file_kwargs)
+        with open(self.split_file.name, 'rb') as f:
+            self.data = f.read()
+
+    def tearDown(self):
+        self.split_file.close()
+        super(PooledChunkTest, self).tearDown()
+
+    def test_digests(self):
+        for chunk in self.split_file:
+            md5 = chunk.md5
+            self.assertEqual(32, len(md5))
+        # every chunk was hashed with the same buffer
+        self.assertEqual(self.chunk_size, self.pool.total_bytes)
+        self.assertEqual(self.chunk_size, self.pool.free_bytes)
+        split_file = SplitFile(self.split_file.name, self.chunk_size)
+        try:
+            self.assertEqual([c.md5 for c in split_file],
+                             [c.md5 for c in self.split_file])
+        finally:
+            split_file.close()
+
+    def test_borrow(self):
+        chunk = self.split_file[1]
+        chunk.seek(10)
+        with chunk.borrow(100) as view:
+            self.assertEqual(self.data[self.chunk_size + 10:
+                                       self.chunk_size + 110], view.tobytes())
+        self.assertEqual(110, chunk.tell())
+        with chunk.borrow() as view:
+            self.assertEqual(self.chunk_size - 110, len(view))
+        self.assertEqual(0, chunk.bytes_remaining)
+        if not self.split_file.use_mmap:
+            self.assertEqual(self.chunk_size, self.pool.free_bytes)
+
+    def test_borrow_larger_than_pool(self):
+        split_file = SplitFile(self.split_file.name, 3 * self.chunk_size,
+                               buffer_pool=self.pool)
+        try:
+            with split_file[0].borrow() as view:
+                self.assertEqual(self.data[:3 * self.chunk_size],
+                                 view.tobytes())
+            self.assertEqual(0, self.pool.total_bytes)
+        finally:
+            split_file.close()
+
+    def test_read_chunks(self):
+        views = self.split_file.read_chunks([0, 2])
+        self.assertEqual(self.data[2 * self.chunk_size:3 * self.chunk_size],
+                         views[1].tobytes())
+        for view in views:
+            self.pool.release(view)
+        self.assertEqual(2 * self.chunk_size, self.pool.free_bytes)
+
+    def test_read_chunks_larger_than_pool(self):
+        # record chunks run past chunk_size up to the next delimiter
+        split_file = SplitFile(self.split_file.name, buffer_pool=self.pool,
+                               chunker=RecordChunker(self.chunk_size, b'\0'))
+        try:
+            views = split_file.read_chunks(range(len(split_file)))
+            self.assertEqual(self.data, b''.join(v.tobytes() for v in views))
+            self.assertTrue(all(len(v) > self.chunk_size for v in views[:-1]))
+            # only the last chunk fits a pooled buffer
+            self.assertEqual(self.chunk_size, self.pool.total_bytes)
+        finally:
+            split_file.close()
+
+
+class PositionalPooledChunkTest(PooledChunkTest):
+    split_file_kwargs = {'positional': True}
+
+
+class MmapPooledChunkTest(PooledChunkTest):
+    split_file_kwargs = {'use_mmap': True}
+
+    def test_digests(self):
+        # mapped chunks are hashed straight from the mapping
+        for chunk in self.split_file:
+            chunk.md5
+        self.assertEqual(0, self.pool.total_bytes)
+
+
+class PooledMultiSplitFileTest(BaseTest):
+    def test_digests(self):
+        pool = BufferPool(100)
+        with MultiSplitFile([self.split_file.name] * 3, 100,
+                            buffer_pool=pool) as multi:
+            digests = multi.digests()
+        self.assertEqual(len(multi), len(digests))
+        self.assertEqual(100, pool.total_bytes)
@@ -0,0 +1,194 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import io
+import os
+import random
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from tempfile import mkstemp
+from unittest import SkipTest, TestCase
+
+from splitfile import FastCDC, RecordChunker, SplitFile
+
+
+def random_bytes(size, seed=0):
+    rand = random.Random(seed)
+    return bytes(bytearray(rand.getrandbits(8) for _ in range(size)))
+
+
+class FastCDCTest(TestCase):
+    size = 2**19
+    split_file_kwargs = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = random_bytes(cls.size)
+
+    def setUp(self):
+        self.chunker = FastCDC(2**12, 2**14, 2**16)
+        self.paths = []
+
+    def tearDown(self):
+        for path in self.paths:
+            os.unlink(path)
+
+    def split_file(self, data):
+        fd, path = mkstemp()
+        self.paths.append(path)
+        with io.open(fd, 'wb') as f:
+            f.write(data)
+        split_file = SplitFile(path, chunker=self.chunker,
+                               **self.__class__.split_file_kwargs)
+        self.addCleanup(split_file.close)
+        return split_file
+
+    def test_sizes(self):
+        split_file = self.split_file(self.data)
+        sizes = [c.size for c in split_file]
+        self.assertEqual(len(split_file), len(sizes))
+        self.assertEqual(len(self.data), sum(sizes))
+        for size in sizes[:-1]:
+            self.assertTrue(self.chunker.min_size <= size <=
+                            self.chunker.max_size)
+        # normalised chunking should land reasonably close to avg_size
+        average = len(self.data) / len(sizes)
+        self.assertTrue(self.chunker.avg_size / 2 < average <
+                        self.chunker.avg_size * 2)
+
+    def test_data_integrity(self):
+        split_file = self.split_file(self.data)
+        self.assertEqual(self.data, b''.join(c.read() for c in split_file))
+        self.assertEqual([c.read() for c in split_file],
+                         [split_file[i].read()
+                          for i in range(len(split_file))])
+
+    def test_block_size_independent(self):
+        expected = list(self.chunker.lengths([self.data]))
+        blocks = [self.data[i:i + 1000]
+                  for i in range(0, len(self.data), 1000)]
+        self.assertEqual(expected, list(self.chunker.lengths(blocks)))
+
+    def test_insert_byte(self):
+        before = set(c.md5 for c in self.split_file(self.data))
+        after = set(c.md5 for c in self.split_file(
+            self.data[:100] + b'x' + self.data[100:]))
+        # only the chunk(s) around the edit should differ
+        self.assertLessEqual(len(after - before), 2)
+
+    def test_small_file(self):
+        split_file = self.split_file(b'abc')
+        self.assertEqual(1, len(split_file))
+        self.assertEqual(b'abc', split_file[0].read())
+        self.assertEqual(0, len(self.split_file(b'')))
+
+    def test_invalid_sizes(self):
+        self.assertRaises(ValueError, FastCDC, 10, 5, 20)
+
+
+class PositionalFastCDCTest(FastCDCTest):
+    split_file_kwargs = {'positional': True}
+
+
+class RecordChunkerTest(TestCase):
+    split_file_kwargs = {}
+
+    def setUp(self):
+        rand = random.Random(0)
+        self.lines = [
+            '{{"id": {}, "payload": "{}"}}\n'.format(
+                i, 'x' * rand.randint(0, 300)).encode('ascii')
+            for i in range(500)]
+        self.data = b''.join(self.lines)
+        fd, self.path = mkstemp()
+        with io.open(fd, 'wb') as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def split_file(self, chunker):
+        split_file = SplitFile(self.path, chunker=chunker,
+                               **self.__class__.split_file_kwargs)
+        self.addCleanup(split_file.close)
+        return split_file
+
+    def test_whole_records(self):
+        split_file = self.split_file(RecordChunker(4096))
+        lines = []
+        for chunk in split_file:
+            data = chunk.read()
+            self.assertTrue(data.endswith(b'\n'))
+            chunk.seek(0)
+            lines.extend(chunk)
+        self.assertEqual(self.lines, lines)
+        sizes = [split_file[i].size for i in range(len(split_file))]
+        self.assertTrue(all(s >= 4096 for s in sizes[:-1]))
+        self.assertEqual(len(self.data), sum(sizes))
+
+    def test_block_size_independent(self):
+        chunker = RecordChunker(1000, b'}\n')
+        expected = list(chunker.lengths([self.data]))
+        for block_size in (1, 7, 999, 4096):
+            blocks = [self.data[i:i + block_size]
+                      for i in range(0, len(self.data), block_size)]
+            self.assertEqual(expected, list(chunker.lengths(blocks)))
+        offset = 0
+        for length in expected[:-1]:
+            offset += length
+            self.assertEqual(b'}\n', self.data[offset - 2:offset])
+
+    def test_delimiter_longer_than_chunk_size(self):
+        chunker = RecordChunker(1, b'abc')
+        data = b'bcaxbaaaacabcaaxbxbxxbcccxxxccabccxbbb'
+        expected = list(chunker.lengths([data]))
+        self.assertEqual([13, 20, 5], expected)
+        for block_size in (1, 2, 3, 5):
+            blocks = [data[i:i + block_size]
+                      for i in range(0, len(data), block_size)]
+            self.assertEqual(expected, list(chunker.lengths(blocks)))
+        # a block shorter than the delimiter right after a search failed
+        blocks = [b'b', b'caxbaaaacabcaaxbxb', b'x', b'xbcc', b'cxxx', b'cca',
+                  b'bccxbbb']
+        self.assertEqual(expected, list(chunker.lengths(blocks)))
+
+    def test_no_trailing_delimiter(self):
+        chunker = RecordChunker(10)
+        self.assertEqual([12, 5],
+                         list(chunker.lengths([b'0123456789a\nbcdef'])))
+        self.assertEqual([3], list(chunker.lengths([b'abc'])))
+
+    def test_long_chunks(self):
+        if tracemalloc is None:
+            raise SkipTest('tracemalloc is not available')
+        filler = b'x' * 2**16
+        record_end = filler[1:] + b'\n'
+
+        def blocks():
+            # 16 MB of 4 MB records
+            for i in range(256):
+                yield record_end if i % 64 == 63 else filler
+        tracemalloc.start()
+        try:
+            self.assertEqual([2**22] * 4,
+                             list(RecordChunker(1000).lengths(blocks())))
+            self.assertEqual([2**24],
+                             list(RecordChunker(2**24).lengths(blocks())))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        # only about a block is kept, not the chunk read so far
+        self.assertLess(peak, 2**20)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, RecordChunker, 0)
+        self.assertRaises(ValueError, RecordChunker, 10, b'')
+
+
+class PositionalRecordChunkerTest(RecordChunkerTest):
+    split_file_kwargs = {'positional': True}
@@ -0,0 +1,161 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import gzip
+import hashlib
+import io
+import os
+import random
+
+from tempfile import mkstemp
+from unittest import SkipTest, TestCase
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from splitfile import CompressedSplitFile
+
+
+def records(count, seed=0):
+    rand = random.Random(seed)
+    return b''.join('record {} {}\n'.format(i, rand.randrange(10**9))
+                    .encode('ascii') for i in range(count))
+
+
+def gzip_compress(data):
+    out = io.BytesIO()
+    with gzip.GzipFile(fileobj=out, mode='wb') as f:
+        f.write(data)
+    return out.getvalue()
+
+
+class CompressedSplitFileTest(TestCase):
+    chunk_size = 2**14
+    spacing = 2**16
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = records(20000)
+
+    def setUp(self):
+        self.paths = []
+
+    def tearDown(self):
+        for path in self.paths:
+            os.unlink(path)
+
+    def compress(self, data):
+        return gzip_compress(data)
+
+    def path(self, compressed):
+        fd, path = mkstemp()
+        self.paths.append(path)
+        with io.open(fd, 'wb') as f:
+            f.write(compressed)
+        return path
+
+    def split_file(self, path=None, **kwargs):
+        if path is None:
+            path = self.path(self.compress(self.data))
+        kwargs.setdefault('spacing', self.__class__.spacing)
+        split_file = CompressedSplitFile(path, self.__class__.chunk_size,
+                                         **kwargs)
+        self.addCleanup(split_file.close)
+        return split_file
+
+    def expected(self, index):
+        offset = index * self.__class__.chunk_size
+        return self.data[offset:offset + self.__class__.chunk_size]
+
+    def test_len(self):
+        split_file = self.split_file()
+        self.assertEqual(len(self.data), split_file.size)
+        self.assertEqual(
+            -(-len(self.data) // self.__class__.chunk_size), len(split_file))
+
+    def test_iteration(self):
+        split_file = self.split_file()
+        chunks = list(split_file)
+        self.assertEqual(self.data, b''.join(c.read() for c in chunks))
+        self.assertEqual(list(range(len(chunks))), [c.index for c in chunks])
+        self.assertEqual(len(chunks), len(split_file))
+
+    def test_getitem(self):
+        split_file = self.split_file()
+        for index in (5, 0, len(split_file) - 1, 17, 3):
+            chunk = split_file[index]
+            self.assertEqual(index * self.__class__.chunk_size, chunk.offset)
+            self.assertEqual(self.expected(index), chunk.read())
+        self.assertEqual(self.expected(len(split_file) - 1),
+                         split_file[-1].read())
+        self.assertRaises(IndexError, split_file.__getitem__,
+                          len(split_file))
+
+    def test_access_points(self):
+        split_file = self.split_file()
+        split_file.build_index()
+        self.assertEqual(
+            list(range(0, len(self.data), split_file.spacing)),
+            split_file.access_points)
+
+    def test_no_spacing(self):
+        split_file = self.split_file(spacing=0)
+        self.assertEqual(self.expected(20), split_file[20].read())
+        self.assertEqual([0], split_file.access_points)
+
+    def test_chunk(self):
+        chunk = self.split_file()[4]
+        expected = self.expected(4)
+        self.assertEqual(hashlib.md5(expected).hexdigest(), chunk.md5)
+        self.assertEqual(expected[:expected.index(b'\n') + 1],
+                         chunk.readline())
+
+    def test_members(self):
+        parts = [self.data[:100000], self.data[100000:100001],
+                 self.data[100001:]]
+        path = self.path(b''.join(self.compress(p) for p in parts))
+        split_file = self.split_file(path, spacing=0)
+        self.assertEqual(self.data, b''.join(c.read() for c in split_file))
+        self.assertEqual([0, 100000, 100001], split_file.access_points)
+        self.assertEqual(self.expected(10), split_file[10].read())
+
+    def test_save_index(self):
+        parts = [self.data[:200000], self.data[200000:]]
+        path = self.path(b''.join(self.compress(p) for p in parts))
+        index_path = self.path(b'')
+        self.split_file(path).save_index(index_path)
+        split_file = self.split_file(path)
+        self.assertTrue(split_file.load_index(index_path))
+        self.assertEqual([0, 200000], split_file.access_points)
+        self.assertEqual(len(self.data), split_file.size)
+        self.assertEqual(self.expected(15), split_file[15].read())
+        with io.open(path, 'ab') as f:
+            f.write(self.compress(b'more'))
+        self.assertFalse(self.split_file(path).load_index(index_path))
+
+    def test_truncated(self):
+        path = self.path(self.compress(self.data)[:-100])
+        self.assertRaises(EOFError, len, self.split_file(path))
+
+    def test_unknown_format(self):
+        path = self.path(self.data)
+        self.assertRaises(ValueError, CompressedSplitFile, path)
+
+
+class ZstdCompressedSplitFileTest(CompressedSplitFileTest):
+    def setUp(self):
+        if zstandard is None:
+            raise SkipTest('zstandard is not installed')
+        super(ZstdCompressedSplitFileTest, self).setUp()
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor().compress(data)
+
+    def test_access_points(self):
+        # zstd decompressors can't be copied, frame starts only
+        split_file = self.split_file()
+        split_file.build_index()
+        self.assertEqual([0], split_file.access_points)
@@ -0,0 +1,156 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import io
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+from splitfile import IOStats, StreamSplitFile, ranges
+
+from . import BaseTest
+
+
+class CopyToTest(BaseTest):
+    split_file_kwargs = {}
+
+    def setUp(self):
+        super(CopyToTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.split_file.seek(0)
+        self.data = self.split_file.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(CopyToTest, self).tearDown()
+
+    def expected(self, chunk, pos=0):
+        return self.data[chunk.offset + pos:chunk.offset + chunk.size]
+
+    def test_path(self):
+        chunk = self.split_file[3]
+        path = os.path.join(self.directory, 'chunk')
+        self.assertEqual(chunk.size, chunk.copy_to(path))
+        with io.open(path, 'rb') as f:
+            self.assertEqual(self.expected(chunk), f.read())
+        self.assertEqual(chunk.size, chunk.tell())
+
+    def test_file(self):
+        chunk = self.split_file[2]
+        chunk.seek(100)
+        with io.open(os.path.join(self.directory, 'chunk'), 'w+b') as f:
+            f.write(b'header')
+            self.assertEqual(chunk.size - 100, chunk.copy_to(f))
+            f.write(b'trailer')
+            f.seek(0)
+            self.assertEqual(b'header' + self.expected(chunk, 100) +
+                             b'trailer', f.read())
+
+    def test_file_object(self):
+        chunk = self.split_file[-1]
+        target = io.BytesIO()
+        self.assertEqual(chunk.size, chunk.copy_to(target))
+        self.assertEqual(self.expected(chunk), target.getvalue())
+
+    def test_socket(self):
+        chunk = self.split_file[1]
+        sender, receiver = socket.socketpair()
+        received = []
+
+        def receive():
+            data = receiver.recv(65536)
+            while data:
+                received.append(data)
+                data = receiver.recv(65536)
+        thread = threading.Thread(target=receive)
+        thread.start()
+        try:
+            self.assertEqual(chunk.size, chunk.copy_to(sender))
+        finally:
+            sender.close()
+            thread.join()
+            receiver.close()
+        self.assertEqual(self.expected(chunk), b''.join(received))
+
+    def test_pipe(self):
+        chunk = self.split_file[2]
+        chunk.seek(10)
+        read_fd, write_fd = os.pipe()
+        received = []
+
+        def receive():
+            with io.open(read_fd, 'rb') as f:
+                received.append(f.read())
+        thread = threading.Thread(target=receive)
+        thread.start()
+        try:
+            with io.open(write_fd, 'wb') as f:
+                f.write(b'header')
+                self.assertEqual(chunk.size - 10, chunk.copy_to(f))
+        finally:
+            thread.join()
+        self.assertEqual(b'header' + self.expected(chunk, 10), received[0])
+
+    def test_split_to_files(self):
+        directory = os.path.join(self.directory, 'parts')
+        paths = self.split_file.split_to_files(directory)
+        self.assertEqual(len(self.split_file), len(paths))
+        data = b''
+        for index, path in enumerate(paths):
+            self.assertEqual('part-{:05d}'.format(index),
+                             os.path.basename(path))
+            with io.open(path, 'rb') as f:
+                data += f.read()
+        self.assertEqual(self.data, data)
+
+    def test_zero_copy(self):
+        stats = IOStats()
+        self.split_file._stats = stats
+        chunk = self.split_file[0]
+        chunk.copy_to(os.path.join(self.directory, 'chunk'))
+        self.assertIsNone(stats.op('read'))
+        self.assertEqual(chunk.size, stats.bytes_read)
+        if ranges._copy_file_range is not None:
+            self.assertEqual(1, stats.calls('copy_file_range'))
+
+
+class PositionalCopyToTest(CopyToTest):
+    split_file_kwargs = {'positional': True}
+
+
+class MmapCopyToTest(CopyToTest):
+    split_file_kwargs = {'use_mmap': True}
+
+
+class FallbackCopyToTest(CopyToTest):
+    def setUp(self):
+        super(FallbackCopyToTest, self).setUp()
+        self.saved = ranges._copy_file_range, ranges._sendfile
+        ranges._copy_file_range = ranges._sendfile = None
+
+    def tearDown(self):
+        ranges._copy_file_range, ranges._sendfile = self.saved
+        super(FallbackCopyToTest, self).tearDown()
+
+    def test_zero_copy(self):
+        stats = IOStats()
+        self.split_file._stats = stats
+        chunk = self.split_file[0]
+        chunk.copy_to(os.path.join(self.directory, 'chunk'))
+        self.assertEqual(chunk.size, stats.bytes_read)
+        self.assertEqual(0, stats.calls('copy_file_range'))
+
+
+class StreamCopyToTest(BaseTest):
+    def test_copy_to(self):
+        with io.open(self.split_file.name, 'rb') as f:
+            data = f.read()
+        target = io.BytesIO()
+        with StreamSplitFile(self.split_file.name, 1000) as stream:
+            for chunk in stream:
+                chunk.copy_to(target)
+                chunk.close()
+        self.assertEqual(data, target.getvalue())
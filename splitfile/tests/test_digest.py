@@ -0,0 +1,105 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import hashlib
+import io
+import os
+import zlib
+
+from unittest import TestCase
+
+from splitfile import digest
+
+from . import BaseTest, data_path
+
+
+class ChecksumTest(TestCase):
+    def test_crc32c(self):
+        self.assertEqual(0xE3069283, digest.crc32c(b'123456789'))
+        self.assertEqual(digest.crc32c(b'123456789'),
+                         digest.crc32c(b'6789', digest.crc32c(b'12345')))
+
+    def test_crc32c_fallback(self):
+        module = digest._crc32c
+        digest._crc32c = None
+        try:
+            self.assertEqual(0xE3069283, digest.crc32c(b'123456789'))
+        finally:
+            digest._crc32c = module
+
+    def test_new(self):
+        hasher = digest.new('crc32')
+        hasher.update(b'1234')
+        hasher.update(memoryview(b'56789'))
+        self.assertEqual('{:08x}'.format(zlib.crc32(b'123456789')),
+                         hasher.hexdigest())
+        self.assertEqual(hashlib.sha256(b'').hexdigest(),
+                         digest.new('sha256').hexdigest())
+
+
+class ChunkDigestTest(BaseTest):
+    algorithms = ('md5', 'sha256', 'crc32', 'crc32c')
+
+    def setUp(self):
+        super(ChunkDigestTest, self).setUp()
+        with io.open(os.path.join(data_path, 'test.bin'), 'rb') as f:
+            self.data = f.read()
+
+    def expected(self, index):
+        data = self.data[index * self.chunk_size:
+                         (index + 1) * self.chunk_size]
+        return {
+            'md5': hashlib.md5(data).hexdigest(),
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'crc32': '{:08x}'.format(zlib.crc32(data) & 0xFFFFFFFF),
+            'crc32c': '{:08x}'.format(digest.crc32c(data)),
+        }
+
+    def test_digests(self):
+        for i, chunk in enumerate(self.split_file):
+            chunk.read(3)
+            self.assertEqual(self.expected(i),
+                             chunk.digests(self.__class__.algorithms))
+            self.assertEqual(3, chunk.tell())
+            self.assertEqual(self.expected(i)['md5'], chunk.md5)
+
+    def test_cached(self):
+        chunk = self.split_file[1]
+        chunk.digests(('md5', ))
+        compute = digest.compute
+        digest.compute = None
+        try:
+            self.assertEqual(self.expected(1)['md5'],
+                             self.split_file[1].md5)
+        finally:
+            digest.compute = compute
+
+    def test_split_file_digests(self):
+        expected = [self.expected(i) for i in range(len(self.split_file))]
+        self.assertEqual(expected,
+                         self.split_file.digests(self.__class__.algorithms))
+
+
+class PositionalChunkDigestTest(ChunkDigestTest):
+    split_file_kwargs = {'positional': True}
+
+    def test_parallel_digests(self):
+        expected = [self.expected(i) for i in range(len(self.split_file))]
+        self.assertEqual(expected,
+                         self.split_file.digests(self.__class__.algorithms,
+                                                 workers=4))
+
+    def test_invalidated(self):
+        # (the shared buffered file of non-positional chunks may serve stale
+        # data, so this is only checked for positional reads)
+        chunk = self.split_file[0]
+        before = chunk.md5
+        with io.open(self.split_file.name, 'r+b') as f:
+            f.write(b'x' * 16)
+        os.utime(self.split_file.name, (0, 0))
+        self.assertNotEqual(before, self.split_file[0].md5)
+
+
+class MmapChunkDigestTest(PositionalChunkDigestTest):
+    split_file_kwargs = {'use_mmap': True}
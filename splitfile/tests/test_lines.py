@@ -0,0 +1,123 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import io
+import os
+import random
+
+from tempfile import mkstemp
+from unittest import TestCase
+
+from splitfile import SplitFile
+from splitfile.chunk import Chunk
+
+
+def split_lines(data):
+    return io.BytesIO(data).readlines()
+
+
+class LinesTest(TestCase):
+    chunk_size = 1000
+    split_file_kwargs = {}
+
+    @classmethod
+    def setUpClass(cls):
+        rand = random.Random(0)
+        lines = []
+        for _ in range(500):
+            # mostly short lines, some spanning several chunks
+            length = rand.choice([0, 1, 10, 50, 80, 300, 2500])
+            lines.append(b'x' * length + b'\n')
+        # no trailing newline
+        lines.append(b'last')
+        cls.data = b''.join(lines)
+
+    def setUp(self):
+        fd, self.path = mkstemp()
+        with io.open(fd, 'wb') as f:
+            f.write(self.data)
+        self.split_file = SplitFile(self.path, self.__class__.chunk_size,
+                                    **self.__class__.split_file_kwargs)
+
+    def tearDown(self):
+        self.split_file.close()
+        os.unlink(self.path)
+
+    def expected(self, chunk):
+        return split_lines(self.data[chunk.offset:chunk.offset + chunk.size])
+
+    def test_iteration(self):
+        for chunk in self.split_file:
+            self.assertEqual(self.expected(chunk), list(chunk))
+            self.assertEqual(chunk.size, chunk.tell())
+
+    def test_block_sizes(self):
+        chunk = self.split_file[3]
+        for block_size in (1, 7, 100, 10000):
+            chunk.seek(0)
+            self.assertEqual(self.expected(chunk),
+                             list(chunk.iterlines(block_size)))
+            chunk.seek(0)
+            batches = list(chunk.iterbatches(block_size))
+            self.assertEqual(self.expected(chunk),
+                             [l for batch in batches for l in batch])
+            self.assertEqual(chunk.size, chunk.tell())
+
+    def test_abandoned(self):
+        chunk = self.split_file[5]
+        lines = []
+        for line in chunk:
+            lines.append(line)
+            if len(lines) == 3:
+                break
+        self.assertEqual(sum(len(l) for l in lines), chunk.tell())
+        self.assertEqual(self.expected(chunk)[3:], chunk.readlines())
+
+    def test_readline(self):
+        chunk = self.split_file[7]
+        lines = []
+        for line in iter(chunk.readline, b''):
+            lines.append(line)
+            self.assertEqual(sum(len(l) for l in lines), chunk.tell())
+        self.assertEqual(self.expected(chunk), lines)
+        chunk.seek(1)
+        self.assertEqual(self.expected(chunk)[0][1:], chunk.readline())
+        chunk.seek(0)
+        self.assertEqual(self.expected(chunk)[0][:2], chunk.readline(2))
+
+    def test_readline_long_lines(self):
+        line_chunk_size = Chunk.line_chunk_size
+        Chunk.line_chunk_size = 16
+        try:
+            for chunk in self.split_file:
+                self.assertEqual(self.expected(chunk),
+                                 list(iter(chunk.readline, b'')))
+        finally:
+            Chunk.line_chunk_size = line_chunk_size
+
+    def test_next(self):
+        chunk = self.split_file[2]
+        self.assertEqual(self.expected(chunk)[0], next(chunk))
+
+    def test_readlines(self):
+        chunk = self.split_file[-1]
+        self.assertEqual(self.expected(chunk), chunk.readlines())
+        self.assertEqual(chunk.size, chunk.tell())
+        chunk.seek(0)
+        expected = self.expected(chunk)
+        lines = chunk.readlines(len(expected[0]) + 1)
+        self.assertEqual(expected[:2], lines)
+        self.assertEqual(len(expected[0]) + len(expected[1]), chunk.tell())
+
+    def test_data_integrity(self):
+        data = b''.join(l for chunk in self.split_file for l in chunk)
+        self.assertEqual(self.data, data)
+
+
+class PositionalLinesTest(LinesTest):
+    split_file_kwargs = {'positional': True}
+
+
+class MmapLinesTest(LinesTest):
+    split_file_kwargs = {'use_mmap': True}
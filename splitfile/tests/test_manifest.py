@@ -0,0 +1,101 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import hashlib
+import io
+import os
+
+from tempfile import mkstemp
+
+from splitfile import Manifest, SplitFile
+
+from . import BaseTest
+
+
+class ManifestTest(BaseTest):
+    def setUp(self):
+        super(ManifestTest, self).setUp()
+        self.manifest = self.split_file.manifest()
+
+    def write(self, offset, data):
+        with io.open(self.split_file.name, 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+        st = os.stat(self.split_file.name)
+        # make sure the change shows even on coarse timestamps
+        os.utime(self.split_file.name, (st.st_atime, st.st_mtime + 1))
+
+    def test_build(self):
+        self.assertEqual(len(self.split_file), len(self.manifest))
+        for index, record in enumerate(self.manifest):
+            chunk = self.split_file[index]
+            self.assertEqual((chunk.offset, chunk.size),
+                             (record.offset, record.size))
+            self.assertEqual(hashlib.md5(chunk.read()).hexdigest(),
+                             record.digest)
+        self.assertEqual(self.split_file.size,
+                         self.manifest.identity['size'])
+
+    def test_save_load(self):
+        fd, path = mkstemp()
+        os.close(fd)
+        try:
+            self.manifest.save(path)
+            manifest = Manifest.load(path)
+            self.assertEqual(self.manifest.to_dict(), manifest.to_dict())
+            self.assertEqual([], self.split_file.changed_chunks(path))
+        finally:
+            os.unlink(path)
+
+    def test_unchanged(self):
+        for verify in Manifest.verify_modes:
+            self.assertEqual([], self.manifest.changed_chunks(
+                self.split_file, verify))
+
+    def test_changed(self):
+        self.write(3 * self.chunk_size + 100, b'changed')
+        for verify in Manifest.verify_modes:
+            self.assertEqual([3], self.split_file.changed_chunks(
+                self.manifest, verify))
+
+    def test_sample(self):
+        manifest = Manifest.build(self.split_file, sample_size=16)
+        self.write(3 * self.chunk_size + 100, b'changed')
+        # the change is in between the sample windows
+        self.assertEqual([], manifest.changed_chunks(self.split_file,
+                                                     'sample'))
+        self.assertEqual([3], manifest.changed_chunks(self.split_file,
+                                                      'full'))
+        self.write(4 * self.chunk_size + 2, b'changed')
+        self.assertEqual([4], manifest.changed_chunks(self.split_file,
+                                                      'sample'))
+
+    def test_appended(self):
+        size = self.split_file.size
+        self.write(size, b'x' * self.chunk_size)
+        changed = self.split_file.changed_chunks(self.manifest)
+        # the last chunk grew and a new one was added
+        self.assertEqual([size // self.chunk_size, len(self.split_file) - 1],
+                         changed)
+
+    def test_chunk_size(self):
+        split_file = SplitFile(self.split_file.name, self.chunk_size // 2,
+                               **self.split_file_kwargs)
+        try:
+            changed = split_file.changed_chunks(self.manifest)
+        finally:
+            split_file.close()
+        # only the last chunk has the same offset and size as before
+        self.assertEqual(list(range(len(split_file) - 1)), changed)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self.manifest.changed_chunks,
+                          self.split_file, 'guess')
+        data = self.manifest.to_dict()
+        data['version'] = 0
+        self.assertRaises(ValueError, Manifest.from_dict, data)
+
+
+class PositionalManifestTest(ManifestTest):
+    split_file_kwargs = {'positional': True}
@@ -0,0 +1,98 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import hashlib
+import io
+
+from unittest import TestCase
+
+from splitfile import MerkleTree, composite_etag
+
+from . import BaseTest
+
+
+def md5(data):
+    return hashlib.md5(data).hexdigest()
+
+
+class CompositeEtagTest(TestCase):
+    def test_etag(self):
+        parts = [b'a' * 10, b'b' * 20, b'c']
+        expected = hashlib.md5(b''.join(hashlib.md5(p).digest()
+                                        for p in parts)).hexdigest()
+        self.assertEqual(expected + '-3',
+                         composite_etag([md5(p) for p in parts]))
+
+
+class MerkleTreeTest(TestCase):
+    def test_root(self):
+        leaves = [md5(b'a'), md5(b'b'), md5(b'c')]
+        node = hashlib.md5(b'\x01' + hashlib.md5(b'a').digest() +
+                           hashlib.md5(b'b').digest()).digest()
+        root = hashlib.md5(b'\x01' + node +
+                           hashlib.md5(b'c').digest()).hexdigest()
+        self.assertEqual(root, MerkleTree(leaves).root)
+        self.assertEqual(leaves[0], MerkleTree(leaves[:1]).root)
+        self.assertEqual(md5(b''), MerkleTree([]).root)
+
+    def test_update(self):
+        leaves = [md5(str(i).encode('ascii')) for i in range(13)]
+        tree = MerkleTree(leaves)
+        for index in (0, 7, 12, -1):
+            leaves[index] = md5(b'changed' + str(index).encode('ascii'))
+            tree.update(index, leaves[index])
+            self.assertEqual(MerkleTree(leaves).root, tree.root)
+        self.assertRaises(IndexError, tree.update, 13, leaves[0])
+
+    def test_diff(self):
+        leaves = [md5(str(i).encode('ascii')) for i in range(10)]
+        extents = [(i * 10, 10) for i in range(10)]
+        tree = MerkleTree(leaves, extents=extents)
+        other = MerkleTree(leaves, extents=extents)
+        self.assertEqual([], tree.diff(other))
+        for index in (3, 4, 9):
+            other.update(index, md5(b'x'))
+        self.assertEqual([3, 4, 9], tree.diff(other))
+        self.assertEqual([(30, 20), (90, 10)], tree.diff_ranges(other))
+        self.assertEqual([1, 10, 11],
+                         tree.diff(MerkleTree(leaves[:1] + [md5(b'x')] +
+                                              leaves[2:] + leaves[:2])))
+        self.assertRaises(ValueError, tree.diff,
+                          MerkleTree(leaves, 'sha256'))
+        self.assertRaises(ValueError, MerkleTree(leaves).diff_ranges, tree)
+
+    def test_etag(self):
+        self.assertEqual(composite_etag([md5(b'a')]),
+                         MerkleTree([md5(b'a')]).etag)
+        with self.assertRaises(ValueError):
+            MerkleTree([], 'sha256').etag
+
+
+class SplitFileMerkleTreeTest(BaseTest):
+    split_file_kwargs = {'positional': True}
+
+    def test_tree(self):
+        tree = self.split_file.merkle_tree()
+        self.assertEqual([c.md5 for c in self.split_file], tree.leaves)
+        self.assertEqual(list(self.split_file.extents()), tree.extents)
+        self.assertEqual(tree.etag, self.split_file.etag())
+        self.assertEqual(self.split_file.merkle_tree('sha256').root,
+                         self.split_file.merkle_tree('sha256',
+                                                     workers=2).root)
+
+    def test_rehash(self):
+        tree = self.split_file.merkle_tree()
+        old = self.split_file.merkle_tree()
+        with io.open(self.split_file.name, 'r+b') as f:
+            f.seek(2 * self.chunk_size + 5)
+            f.write(b'changed')
+        self.split_file.refresh()
+        tree.rehash(self.split_file, [2])
+        self.assertEqual(self.split_file.merkle_tree().root, tree.root)
+        self.assertEqual([2], tree.diff(old))
+        self.assertEqual([(2 * self.chunk_size, self.chunk_size)],
+                         tree.diff_ranges(old))
+        with io.open(self.split_file.name, 'ab') as f:
+            f.write(b'x' * self.chunk_size)
+        self.assertRaises(ValueError, tree.rehash, self.split_file, [2])
@@ -0,0 +1,117 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import hashlib
+import io
+import os
+import random
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+from splitfile import IOStats, MultiSplitFile, upload_parts
+
+
+class MultiSplitFileTest(TestCase):
+    chunk_size = 1000
+    sizes = [10, 0, 2500, 1, 999, 0, 4000, 3]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        rand = random.Random(0)
+        self.paths = []
+        pieces = []
+        for i, size in enumerate(self.__class__.sizes):
+            data = bytes(bytearray(rand.getrandbits(8) for _ in range(size)))
+            path = os.path.join(self.directory, 'file-{}'.format(i))
+            with io.open(path, 'wb') as f:
+                f.write(data)
+            self.paths.append(path)
+            pieces.append(data)
+        self.data = b''.join(pieces)
+        self.stats = IOStats()
+        self.split_file = MultiSplitFile(self.paths, self.__class__.chunk_size,
+                                         max_open=2, stats=self.stats)
+
+    def tearDown(self):
+        self.split_file.close()
+        shutil.rmtree(self.directory)
+
+    def expected(self, index):
+        offset = index * self.__class__.chunk_size
+        return self.data[offset:offset + self.__class__.chunk_size]
+
+    def test_len(self):
+        self.assertEqual(len(self.data), self.split_file.size)
+        self.assertEqual(-(-len(self.data) // self.__class__.chunk_size),
+                         len(self.split_file))
+
+    def test_iteration(self):
+        chunks = list(self.split_file)
+        self.assertEqual(self.data, b''.join(c.read() for c in chunks))
+
+    def test_getitem(self):
+        for index in (3, 0, -1, 5):
+            self.assertEqual(self.expected(index % len(self.split_file)),
+                             self.split_file[index].read())
+        self.assertRaises(IndexError, self.split_file.__getitem__,
+                          len(self.split_file))
+
+    def test_readinto(self):
+        chunk = self.split_file[2]
+        chunk.seek(500)
+        buffer_ = bytearray(2000)
+        size = chunk.readinto(buffer_)
+        self.assertEqual(500, size)
+        self.assertEqual(self.expected(2)[500:], bytes(buffer_[:size]))
+
+    def test_readline(self):
+        chunk = self.split_file[1]
+        data = b''.join(iter(chunk.readline, b''))
+        self.assertEqual(self.expected(1), data)
+
+    def test_digests(self):
+        expected = [hashlib.md5(self.expected(i)).hexdigest()
+                    for i in range(len(self.split_file))]
+        self.assertEqual(expected, [d['md5'] for d in
+                                    self.split_file.digests()])
+        self.assertEqual(expected, [d['md5'] for d in
+                                    self.split_file.digests(workers=3)])
+
+    def test_sources(self):
+        self.assertEqual(
+            [(self.paths[0], 0, 10), (self.paths[2], 0, 990)],
+            self.split_file[0].sources)
+        self.assertEqual(
+            [(self.paths[2], 1990, 510), (self.paths[3], 0, 1),
+             (self.paths[4], 0, 489)],
+            self.split_file[2].sources)
+        self.assertEqual([(self.paths[6], 3490, 510), (self.paths[7], 0, 3)],
+                         self.split_file[-1].sources)
+        for chunk in self.split_file:
+            self.assertEqual(chunk.size, sum(s.size for s in chunk.sources))
+
+    def test_max_open(self):
+        for chunk in self.split_file:
+            chunk.read()
+            self.assertTrue(self.split_file.open_files <= 2)
+        # every file is reopened once it has been evicted
+        self.split_file[0].read()
+        self.assertTrue(self.stats.calls('open') > 5)
+
+    def test_close(self):
+        chunk = self.split_file[0]
+        self.split_file.close()
+        self.assertEqual(0, self.split_file.open_files)
+        self.assertRaises(ValueError, chunk.read)
+
+    def test_upload(self):
+        parts = {}
+
+        def upload_part(part_number, chunk):
+            parts[part_number] = chunk.read()
+        upload_parts(self.split_file, upload_part, workers=3)
+        self.assertEqual(self.data,
+                         b''.join(parts[k] for k in sorted(parts)))
@@ -0,0 +1,67 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import io
+import os
+import pickle
+
+from splitfile import RecordChunker, SplitFile, open_chunk
+
+from . import BaseTest
+
+
+def chunk_md5(chunk):
+    return chunk.md5
+
+
+def chunk_lines(chunk):
+    return len(chunk.readlines())
+
+
+class ParallelMapTest(BaseTest):
+    def test_map(self):
+        self.assertEqual([c.md5 for c in self.split_file],
+                         self.split_file.map(chunk_md5, workers=2))
+
+    def test_imap_chunksize(self):
+        self.assertEqual([c.md5 for c in self.split_file],
+                         list(self.split_file.imap(chunk_md5, workers=2,
+                                                   chunksize=3)))
+
+    def test_imap_unordered(self):
+        expected = [c.md5 for c in self.split_file]
+        results = list(self.split_file.imap_unordered(chunk_md5, workers=2,
+                                                      chunksize=2))
+        self.assertEqual(len(expected), len(results))
+        for index, result in results:
+            self.assertEqual(expected[index], result)
+
+    def test_descriptors(self):
+        descriptors = self.split_file.descriptors()
+        self.assertEqual(len(self.split_file), len(descriptors))
+        descriptor = pickle.loads(pickle.dumps(descriptors[2]))
+        self.assertEqual((self.split_file.name, 2, 2 * self.chunk_size,
+                          self.chunk_size), tuple(descriptor))
+        chunk = open_chunk(descriptor)
+        self.assertEqual(self.split_file[2].read(), chunk.read())
+
+    def test_chunker(self):
+        with io.open(self.split_file.name, 'wb') as f:
+            f.write(b''.join('line {}\n'.format(i).encode('ascii')
+                             for i in range(1000)))
+        split_file = SplitFile(self.split_file.name,
+                               chunker=RecordChunker(1000))
+        try:
+            self.assertEqual(1000, sum(split_file.map(chunk_lines,
+                                                      workers=2)))
+        finally:
+            split_file.close()
+
+    def test_no_path(self):
+        split_file = SplitFile(io.open(os.open(self.split_file.name,
+                                               os.O_RDONLY), 'rb'))
+        try:
+            self.assertRaises(ValueError, split_file.descriptors)
+        finally:
+            split_file.close()
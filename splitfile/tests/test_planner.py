@@ -0,0 +1,110 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+from unittest import TestCase
+
+from splitfile import (
+    IOStats, LayoutChunker, PartPlanner, SplitFile, upload_parts
+)
+
+from . import BaseTest
+
+
+MiB = 2**20
+GiB = 2**30
+
+
+class PartPlannerTest(TestCase):
+    def test_small_file(self):
+        planner = PartPlanner()
+        # one part per worker, but never below the minimum
+        self.assertEqual(5 * MiB, planner.plan_part_size(20 * MiB))
+        self.assertEqual(5 * MiB, planner.plan_part_size(1))
+        self.assertEqual(5 * MiB, planner.plan_part_size(0))
+
+    def test_target(self):
+        planner = PartPlanner()
+        self.assertEqual(8 * MiB, planner.plan_part_size(GiB))
+
+    def test_max_parts(self):
+        planner = PartPlanner()
+        size = 100 * GiB
+        part_size = planner.plan_part_size(size)
+        self.assertEqual(11 * MiB, part_size)
+        self.assertTrue(-(-size // part_size) <= planner.max_parts)
+        self.assertRaises(ValueError, planner.plan_part_size,
+                          10000 * 5 * GiB + 1)
+
+    def test_alignment(self):
+        planner = PartPlanner(min_part_size=1000, max_part_size=10000,
+                              max_parts=10, alignment=4096, workers=10)
+        self.assertEqual(8192, planner.plan_part_size(50000))
+        # rounding up would exceed max_part_size
+        self.assertEqual(9500, planner.plan_part_size(95000))
+
+    def test_throughput(self):
+        planner = PartPlanner(part_duration=2)
+        self.assertIsNone(planner.throughput)
+        planner.observe(10 * MiB, 1)
+        planner.observe(10 * MiB, 1)
+        self.assertEqual(10 * MiB, planner.throughput)
+        self.assertEqual(20 * MiB, planner.plan_part_size(GiB))
+        planner.observe(20 * MiB, 1)
+        self.assertTrue(10 * MiB < planner.throughput < 20 * MiB)
+
+    def test_layout(self):
+        planner = PartPlanner(workers=1)
+        # a short remainder is merged into the last part
+        self.assertEqual([8 * MiB, 9 * MiB], planner.layout(17 * MiB))
+        self.assertEqual([8 * MiB, 8 * MiB, 6 * MiB],
+                         planner.layout(22 * MiB))
+        self.assertEqual([MiB], planner.layout(MiB))
+        self.assertEqual([], planner.layout(0))
+
+    def test_layout_head(self):
+        planner = PartPlanner(workers=1)
+        self.assertEqual([6 * MiB, 8 * MiB, 9 * MiB],
+                         planner.layout(23 * MiB, head=[6 * MiB]))
+        self.assertRaises(ValueError, planner.layout, MiB, [2 * MiB])
+
+
+class LayoutChunkerTest(BaseTest):
+    split_file_kwargs = {'positional': True}
+
+    def split_file_with(self, chunker):
+        stats = IOStats()
+        split_file = SplitFile(self.split_file.name, chunker=chunker,
+                               stats=stats, positional=True)
+        self.addCleanup(split_file.close)
+        return split_file, stats
+
+    def test_layout(self):
+        split_file, stats = self.split_file_with(
+            LayoutChunker([1000, 3000, 5000]))
+        self.assertEqual([1000, 3000, 4197], [c.size for c in split_file])
+        # the layout doesn't depend on the data
+        self.assertEqual(0, stats.calls('pread'))
+
+    def test_remainder(self):
+        split_file, _ = self.split_file_with(LayoutChunker([1000]))
+        self.assertEqual([(0, 1000), (1000, 7197)],
+                         list(split_file.extents()))
+
+    def test_planner(self):
+        planner = PartPlanner(min_part_size=1000, target_part_size=2048,
+                              alignment=1024, workers=2)
+        split_file = planner.split_file(self.split_file.name,
+                                        positional=True)
+        self.addCleanup(split_file.close)
+        self.assertEqual(2048, split_file.chunk_size)
+        split_file = planner.split_file(self.split_file.name, uniform=False)
+        self.addCleanup(split_file.close)
+        self.assertEqual([2048, 2048, 2048, 2053],
+                         [c.size for c in split_file])
+
+    def test_upload(self):
+        planner = PartPlanner()
+        upload_parts(self.split_file, lambda part_number, chunk: chunk.read(),
+                     planner=planner)
+        self.assertTrue(planner.throughput > 0)
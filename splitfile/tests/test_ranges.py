@@ -0,0 +1,141 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import io
+import os
+import random
+import time
+
+from tempfile import mkstemp
+from unittest import TestCase
+
+from splitfile import RecordChunker, SplitFile, ranges
+
+
+class RangesTest(TestCase):
+    size = 2**18 + 1234
+
+    @classmethod
+    def setUpClass(cls):
+        rand = random.Random(0)
+        cls.data = bytes(bytearray(rand.getrandbits(8)
+                                   for _ in range(cls.size)))
+
+    def setUp(self):
+        fd, self.path = mkstemp()
+        with io.open(fd, 'wb') as f:
+            f.write(self.data)
+        self.fd = os.open(self.path, os.O_RDWR)
+
+    def tearDown(self):
+        os.close(self.fd)
+        os.unlink(self.path)
+
+    def contents(self):
+        with io.open(self.path, 'rb') as f:
+            return f.read()
+
+    def check_delete(self, offset, length):
+        ranges.delete_range(self.fd, offset, length)
+        self.assertEqual(self.data[:offset] + self.data[offset + length:],
+                         self.contents())
+
+    def check_move(self, src, length, dst):
+        data = self.contents()
+        ranges.move_range(self.fd, src, length, dst)
+        rest = data[:src] + data[src + length:]
+        self.assertEqual(rest[:dst] + data[src:src + length] + rest[dst:],
+                         self.contents())
+
+    def test_delete_small(self):
+        self.check_delete(100, 7)
+
+    def test_delete_aligned(self):
+        self.check_delete(2**16, 2**16)
+
+    def test_delete_large(self):
+        self.check_delete(12345, 2**17)
+
+    def test_delete_tail(self):
+        self.check_delete(1000, self.size - 1000)
+
+    def test_move_down(self):
+        self.check_move(2**17 + 5, 2**16, 3)
+
+    def test_move_up(self):
+        self.check_move(3, 2**16, 2**17 + 5)
+
+    def test_move_aligned(self):
+        self.check_move(2**17, 2**16, 2**12)
+        self.check_move(2**12, 2**16, 2**17)
+
+    def test_delete_few_bytes(self):
+        # a shift by a few bytes must not copy a few bytes per call
+        data = self.data * (2**23 // self.size)
+        with io.open(self.path, 'wb') as f:
+            f.write(data)
+        start = time.time()
+        ranges.delete_range(self.fd, 1000, 3)
+        self.assertLess(time.time() - start, 2)
+        self.assertEqual(data[:1000] + data[1003:], self.contents())
+
+    def test_move_unaligned_block(self):
+        # an unaligned block is rotated with the bytes it moves over, not
+        # inserted and then shifted out together with the rest of the file
+        shifted = []
+        shift_range = ranges.shift_range
+
+        def counting_shift_range(fd, src, dst, length):
+            shifted.append(length)
+            shift_range(fd, src, dst, length)
+        ranges.shift_range = counting_shift_range
+        try:
+            self.check_move(5000, 2**12, 0)
+        finally:
+            ranges.shift_range = shift_range
+        self.assertTrue(sum(shifted) <= 5000, shifted)
+
+    def test_move_to_end(self):
+        self.check_move(0, 2**12, self.size - 2**12)
+
+    def test_block_size(self):
+        block_size = ranges.block_size
+        ranges.block_size = 1000
+        try:
+            self.check_move(10, 2**16 + 1, 2**17)
+        finally:
+            ranges.block_size = block_size
+
+
+class FallbackRangesTest(RangesTest):
+    """Without fallocate and copy_file_range everything is a buffered copy"""
+    def setUp(self):
+        super(FallbackRangesTest, self).setUp()
+        self.saved = ranges._fallocate, ranges._copy_file_range
+        ranges._fallocate = ranges._copy_file_range = None
+
+    def tearDown(self):
+        ranges._fallocate, ranges._copy_file_range = self.saved
+        super(FallbackRangesTest, self).tearDown()
+
+
+class ChunkerRangesTest(TestCase):
+    def setUp(self):
+        fd, self.path = mkstemp()
+        with io.open(fd, 'wb') as f:
+            f.write(b''.join('record {}\n'.format(i).encode('ascii')
+                             for i in range(1000)))
+        self.split_file = SplitFile(self.path, mode='rb+',
+                                    chunker=RecordChunker(100))
+
+    def tearDown(self):
+        self.split_file.close()
+        os.unlink(self.path)
+
+    def test_layout(self):
+        before = len(self.split_file)
+        self.split_file.delete_range(0, self.split_file.size // 2)
+        self.assertTrue(len(self.split_file) < before)
+        for chunk in self.split_file:
+            self.assertTrue(chunk.read().endswith(b'\n'))
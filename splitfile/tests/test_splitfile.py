@@ -9,6 +9,7 @@ import os
 import random
 import shutil
 import string
+import threading
 
 from six.moves import range
 from tempfile import mkstemp
@@ -28,7 +29,7 @@ try:
 except ImportError:
     pass
 
-from splitfile import SplitFile
+from splitfile import FastCDC, IOStats, SplitFile, digest
 
 from . import BaseTest, data_path
 
@@ -72,13 +73,62 @@ class SplitFileTest(BaseTest):
                                        -1)]
         self.assertListEqual(iter_list, getitem_list)
 
+    def _writable(self):
+        return SplitFile(self.split_file.name, self.__class__.chunk_size,
+                         mode='rb+', **self.__class__.split_file_kwargs)
+
     # delete range tests
     def test_delete_range(self):
-        raise SkipTest('not yet implemented')
+        self.split_file.seek(0)
+        data = self.split_file.read()
+        # unaligned, block aligned and up to the end of the file
+        for offset, length in ((1000, 3), (4096, 4096), (2000, 101)):
+            split_file = self._writable()
+            try:
+                split_file.delete_range(offset, length)
+                data = data[:offset] + data[offset + length:]
+                self.assertEqual(len(data), split_file.size)
+                self.assertEqual(len(data), sum(c.size for c in split_file))
+                self.assertEqual(data, b''.join(c.read() for c in split_file))
+                self.assertEqual(
+                    int(math.ceil(len(data) / self.__class__.chunk_size)),
+                    len(split_file))
+                last = split_file[-1]
+                self.assertEqual(data[last.offset:], last.read())
+            finally:
+                split_file.close()
+        split_file = self._writable()
+        try:
+            split_file.delete_range(10, split_file.size - 10)
+            self.assertEqual([data[:10]], [c.read() for c in split_file])
+        finally:
+            split_file.close()
+
+    def test_delete_range_read_only(self):
+        self.assertRaises(io.UnsupportedOperation,
+                          self.split_file.delete_range, 0, 1)
+        self.assertRaises(ValueError, self.split_file.delete_range,
+                          self.split_file.size, 1)
 
     # move range tests
     def test_move_range(self):
-        raise SkipTest('not yet implemented')
+        self.split_file.seek(0)
+        data = self.split_file.read()
+        for src, length, dst in ((10, 100, 5000), (5000, 100, 10),
+                                 (0, 4096, 4096), (4096, 4096, 0),
+                                 (8000, 197, 0), (0, 8000, 197)):
+            split_file = self._writable()
+            try:
+                split_file.move_range(src, length, dst)
+                block = data[src:src + length]
+                rest = data[:src] + data[src + length:]
+                data = rest[:dst] + block + rest[dst:]
+                self.assertEqual(len(data), split_file.size)
+                self.assertEqual(data, b''.join(c.read() for c in split_file))
+            finally:
+                split_file.close()
+        self.assertRaises(ValueError, self.split_file.move_range, 0, 10,
+                          self.split_file.size - 5)
 
     # bytes remaining tests
     def test_bytes_remaining(self):
@@ -96,6 +146,87 @@ class SplitFileTest(BaseTest):
                                self.__class__.chunk_size)
         self.assertFalse(other_file[2] in self.split_file)
 
+    def test_lookups_while_iterating(self):
+        self.split_file.seek(0)
+        data = self.split_file.read()
+        etag = self.split_file.etag()
+        pieces = []
+        for chunk in self.split_file:
+            pieces.append(chunk.read(10))
+            self.assertTrue(chunk in self.split_file)
+            self.assertTrue(self.split_file.count(chunk) >= 1)
+            self.assertTrue(self.split_file.index(chunk) < len(pieces))
+            self.assertEqual(len(self.split_file),
+                             len(self.split_file.manifest()))
+            self.assertEqual(etag, self.split_file.etag())
+            pieces.append(chunk.read())
+        self.assertEqual(data, b''.join(pieces))
+
+    # digest index tests
+    def test_index(self):
+        for i in range(len(self.split_file)):
+            self.assertEqual(i, self.split_file.index(self.split_file[i]))
+        self.assertRaises(ValueError, self.split_file.index,
+                          self.split_file[2], 3)
+        other_file = SplitFile(os.path.join(data_path, 'test2.bin'),
+                               self.__class__.chunk_size)
+        self.assertRaises(ValueError, self.split_file.index, other_file[2])
+
+    def test_count(self):
+        fd, temp_path = mkstemp()
+        try:
+            with io.open(fd, 'wb') as f:
+                f.write(b'a' * 3 * self.__class__.chunk_size + b'b')
+            split_file = SplitFile(temp_path, self.__class__.chunk_size)
+            self.assertEqual(3, split_file.count(split_file[0]))
+            self.assertEqual(1, split_file.count(split_file[3]))
+            self.assertEqual(2, split_file.index(split_file[0], 2))
+            self.assertEqual(0, self.split_file.count(split_file[0]))
+            split_file.close()
+        finally:
+            os.unlink(temp_path)
+
+    def test_contains_uses_index(self):
+        chunk = self.split_file[2]
+        self.assertTrue(chunk in self.split_file)
+        compute = digest.compute
+        digest.compute = None
+        try:
+            self.assertTrue(chunk in self.split_file)
+        finally:
+            digest.compute = compute
+
+    def test_save_load_index(self):
+        fd, index_path = mkstemp()
+        os.close(fd)
+        try:
+            self.split_file.save_index(index_path)
+            split_file = SplitFile(self.split_file.name,
+                                   self.__class__.chunk_size)
+            self.assertTrue(split_file.load_index(index_path))
+            self.assertEqual(3, split_file.index(self.split_file[3]))
+            split_file.close()
+
+            split_file = SplitFile(self.split_file.name,
+                                   self.__class__.chunk_size * 2)
+            self.assertFalse(split_file.load_index(index_path))
+            split_file.close()
+
+            # same chunk_size, boundaries decided by a chunker
+            split_file = SplitFile(self.split_file.name,
+                                   self.__class__.chunk_size,
+                                   chunker=FastCDC(64, 256, 1024))
+            self.assertFalse(split_file.load_index(index_path))
+            self.assertTrue(split_file[5] in split_file)
+            split_file.save_index(index_path)
+            self.assertTrue(split_file.load_index(index_path))
+            split_file.close()
+
+            os.utime(self.split_file.name, (0, 0))
+            self.assertFalse(self.split_file.load_index(index_path))
+        finally:
+            os.unlink(index_path)
+
 
 class ChunkTest(BaseTest):
     # read test
@@ -114,6 +245,15 @@ class ChunkTest(BaseTest):
         chunk = self.split_file[0]
         self.assertEqual(self.split_file.chunk_size, len(chunk.read()))
 
+    def test_readinto(self):
+        chunk = self.split_file[1]
+        data = chunk.read()
+        chunk.seek(0)
+        buffer_ = bytearray(chunk.size + 10)
+        self.assertEqual(chunk.size, chunk.readinto(buffer_))
+        self.assertEqual(data, bytes(buffer_[:chunk.size]))
+        self.assertEqual(0, chunk.readinto(buffer_))
+
     # bytes remaining tests
 
     # seek tests
@@ -165,6 +305,245 @@ class ChunkTest(BaseTest):
         raise SkipTest('not yet implemented')
 
 
+class PositionalSplitFileTest(SplitFileTest):
+    split_file_kwargs = {'positional': True}
+
+    def test_chunks(self):
+        chunks = list(self.split_file.chunks())
+        self.assertEqual([c.read() for c in self.split_file],
+                         [c.read() for c in chunks])
+        self.assertEqual([(c.offset, c.size) for c in chunks],
+                         list(self.split_file.extents()))
+
+    def test_slots(self):
+        chunk = self.split_file[0]
+        self.assertRaises(AttributeError, setattr, chunk, 'attr', None)
+
+    def test_refresh(self):
+        size = self.split_file.size
+        length = len(self.split_file)
+        with io.open(self.split_file.name, 'ab') as f:
+            f.write(b'x' * self.__class__.chunk_size)
+        # stat data is cached until refreshed
+        self.assertEqual(size, self.split_file.size)
+        self.assertEqual(length, len(self.split_file))
+        self.split_file.refresh()
+        self.assertEqual(size + self.__class__.chunk_size,
+                         self.split_file.size)
+        self.assertEqual(length + 1, len(self.split_file))
+
+    def test_iteration_refreshes(self):
+        length = len(self.split_file)
+        with io.open(self.split_file.name, 'ab') as f:
+            f.write(b'x' * self.__class__.chunk_size)
+        self.assertEqual(length + 1, sum(1 for _ in self.split_file))
+
+
+class PositionalChunkTest(BaseTest):
+    split_file_kwargs = {'positional': True}
+
+    def setUp(self):
+        super(PositionalChunkTest, self).setUp()
+        with io.open(os.path.join(data_path, 'test.bin'), 'rb') as f:
+            self.data = f.read()
+
+    def expected(self, index):
+        chunk_size = self.split_file.chunk_size
+        return self.data[index * chunk_size:(index + 1) * chunk_size]
+
+    def test_getitem_while_iterating(self):
+        chunks = []
+        for chunk in self.split_file:
+            # random access hands out more live chunks, the iteration goes on
+            other = self.split_file[-1 - len(chunks)]
+            chunks.append((chunk, other))
+            self.assertTrue(self.split_file.chunk is chunk)
+        self.assertEqual(len(self.split_file), len(chunks))
+        for index, (chunk, other) in enumerate(chunks):
+            self.assertEqual(self.expected(index), chunk.read())
+            self.assertEqual(self.expected(len(chunks) - 1 - index),
+                             other.read())
+
+    def test_live_chunks(self):
+        chunks = list(self.split_file)
+        self.assertFalse(any(c.closed for c in chunks))
+        # interleave reads across chunks
+        heads = [c.read(10) for c in chunks]
+        tails = [c.read() for c in chunks]
+        for i, (head, tail) in enumerate(zip(heads, tails)):
+            self.assertEqual(self.expected(i), head + tail)
+
+    def test_file_position_untouched(self):
+        self.split_file.seek(7)
+        chunk = self.split_file[3]
+        chunk.read(100)
+        self.assertEqual(100, chunk.tell())
+        self.assertEqual(7, self.split_file.tell())
+
+    def test_getitem_keeps_chunks_open(self):
+        first = self.split_file[0]
+        second = self.split_file[1]
+        self.assertEqual(self.expected(1), second.read())
+        self.assertEqual(self.expected(0), first.read())
+
+    def test_seek(self):
+        chunk = self.split_file[1]
+        chunk.seek(chunk.size // 2)
+        self.assertEqual(chunk.size // 2, chunk.tell())
+        chunk.seek(chunk.size // 4, os.SEEK_CUR)
+        self.assertEqual((3 * chunk.size) // 4, chunk.tell())
+        chunk.seek(chunk.size // -2, os.SEEK_END)
+        self.assertEqual(chunk.size // 2, chunk.tell())
+        chunk.seek(chunk.size * 2)
+        self.assertEqual(chunk.size, chunk.tell())
+        self.assertRaises(IOError, chunk.seek, -1)
+
+    def test_readlines(self):
+        for i, chunk in enumerate(self.split_file):
+            lines = chunk.readlines()
+            self.assertEqual(self.expected(i), b''.join(lines))
+            self.assertTrue(all(l.endswith(b'\n') for l in lines[:-1]))
+            chunk.seek(0)
+            self.assertEqual(lines, [l for l in chunk])
+
+    def test_concurrent_reads(self):
+        chunks = list(self.split_file)
+        results = [None] * len(chunks)
+
+        def worker(index):
+            results[index] = chunks[index].md5
+
+        threads = [threading.Thread(target=worker, args=(i, ))
+                   for i in range(len(chunks))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([hashlib.md5(self.expected(i)).hexdigest()
+                          for i in range(len(chunks))], results)
+
+
+class MmapSplitFileTest(SplitFileTest):
+    split_file_kwargs = {'use_mmap': True}
+
+    def test_grow(self):
+        length = len(self.split_file)
+        view = self.split_file[0].getbuffer()
+        head = view.tobytes()
+        with io.open(self.split_file.name, 'rb') as f:
+            data = f.read()
+        extra = b'x' * (3 * self.__class__.chunk_size)
+        with io.open(self.split_file.name, 'ab') as f:
+            f.write(extra)
+        # the file is mapped again, the old mapping stays valid for the view
+        chunks = [(c.size, c.read(), c.md5) for c in self.split_file]
+        self.assertEqual(length + 3, len(chunks))
+        for size, chunk_data, md5 in chunks:
+            self.assertEqual(size, len(chunk_data))
+            self.assertEqual(hashlib.md5(chunk_data).hexdigest(), md5)
+        self.assertEqual(data + extra, b''.join(c[1] for c in chunks))
+        self.assertEqual(head, view.tobytes())
+        view.release()
+
+
+class MmapChunkTest(PositionalChunkTest):
+    split_file_kwargs = {'use_mmap': True}
+
+    def test_getbuffer(self):
+        for i, chunk in enumerate(self.split_file):
+            view = chunk.getbuffer()
+            self.assertEqual(chunk.size, len(view))
+            self.assertEqual(self.expected(i), view.tobytes())
+            view.release()
+
+    def test_readinto(self):
+        chunk = self.split_file[len(self.split_file) - 1]
+        buffer_ = bytearray(self.split_file.chunk_size)
+        chunk.seek(1)
+        read = chunk.readinto(buffer_)
+        self.assertEqual(chunk.size - 1, read)
+        self.assertEqual(self.expected(len(self.split_file) - 1)[1:],
+                         bytes(buffer_[:read]))
+
+    def test_getbuffer_requires_mmap(self):
+        split_file = SplitFile(self.split_file.name, self.chunk_size,
+                               positional=True)
+        try:
+            self.assertRaises(ValueError, split_file[0].getbuffer)
+        finally:
+            split_file.close()
+
+
+class SequentialAccessTest(BaseTest):
+    split_file_kwargs = {'access': 'sequential', 'readahead': 2}
+
+    def setUp(self):
+        super(SequentialAccessTest, self).setUp()
+        self.advice = []
+        advise = self.split_file._advise
+
+        def record(offset, length, advice):
+            self.advice.append((offset, length, advice))
+            advise(offset, length, advice)
+        self.split_file._advise = record
+
+    def test_iteration(self):
+        data = b''.join(c.read() for c in self.split_file)
+        self.assertEqual(self.split_file.size, len(data))
+        chunk_size = self.split_file.chunk_size
+        willneed = [(o, l) for o, l, a in self.advice if a == 'willneed']
+        # the first chunk and the ones after it are requested up front, then
+        # one more chunk each step
+        self.assertEqual((0, 3 * chunk_size), willneed[0])
+        self.assertEqual((3 * chunk_size, chunk_size), willneed[1])
+        self.assertEqual(self.split_file.size, sum(l for _, l in willneed))
+        dontneed = [o for o, l, a in self.advice if a == 'dontneed']
+        self.assertEqual(list(range(0, self.split_file.size, chunk_size)),
+                         dontneed)
+
+    def test_close(self):
+        chunk = self.split_file[1]
+        offset, size = chunk.offset, chunk.size
+        chunk.close()
+        chunk.close()
+        self.assertEqual([(offset, size, 'dontneed')],
+                         [a for a in self.advice if a[2] == 'dontneed'])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, SplitFile, self.split_file.name,
+                          access='backwards')
+
+
+class PositionalSequentialAccessTest(SequentialAccessTest):
+    split_file_kwargs = {'access': 'sequential', 'readahead': 2,
+                         'positional': True}
+
+    def test_iteration(self):
+        chunks = list(self.split_file)
+        self.assertFalse([a for a in self.advice if a[2] == 'dontneed'])
+        for chunk in chunks:
+            chunk.close()
+        self.assertEqual(len(chunks),
+                         len([a for a in self.advice if a[2] == 'dontneed']))
+
+
+class MmapSequentialAccessTest(PositionalSequentialAccessTest):
+    split_file_kwargs = {'access': 'sequential', 'use_mmap': True}
+
+
+class RandomAccessTest(BaseTest):
+    split_file_kwargs = {'access': 'random', 'positional': True}
+
+    def test_getitem(self):
+        stats = IOStats()
+        self.split_file._stats = stats
+        chunk = self.split_file[3]
+        self.assertEqual(1, stats.calls('fadvise'))
+        chunk.read()
+        chunk.close()
+        self.assertEqual(1, stats.calls('fadvise'))
+
+
 class BotoTest(TestCase):
     def setUp(self):
         if 'boto' not in globals():
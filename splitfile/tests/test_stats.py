@@ -0,0 +1,89 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import json
+
+from splitfile import IOStats
+
+from . import BaseTest
+
+
+class IOStatsTest(BaseTest):
+    split_file_kwargs = {'stats': None}
+
+    def setUp(self):
+        self.stats = IOStats()
+        self.__class__.split_file_kwargs = \
+            dict(self.__class__.split_file_kwargs, stats=self.stats)
+        super(IOStatsTest, self).setUp()
+        self.stats.reset()
+
+    def test_read(self):
+        chunks = 0
+        for chunk in self.split_file:
+            chunk.read(10)
+            chunk.read()
+            chunks += 1
+        read = self.stats.op('read')
+        self.assertEqual(2 * chunks, read['count'])
+        self.assertEqual(self.split_file.size, read['bytes'])
+        self.assertEqual(read['count'], sum(read['histogram'].values()))
+        self.assertEqual(self.split_file.size, self.stats.bytes_read)
+        self.assertEqual(1, self.stats.calls('fstat'))
+
+    def test_per_chunk(self):
+        chunk = self.split_file[2]
+        chunk.readline()
+        chunk.seek(0)
+        chunk.read()
+        chunks = self.stats.snapshot()['chunks']
+        self.assertEqual([chunk.offset], list(chunks))
+        self.assertEqual(chunk.size, chunks[chunk.offset]['read']['bytes'])
+        self.assertEqual(1, chunks[chunk.offset]['readline']['count'])
+        self.assertIn('seek', chunks[chunk.offset])
+
+    def test_digests(self):
+        chunk = self.split_file[1]
+        chunk.md5
+        self.assertEqual(1, self.stats.op('digests')['count'])
+        # the reads made to compute the digest belong to the digest
+        self.assertIsNone(self.stats.op('readinto'))
+        self.assertEqual(chunk.size, self.stats.bytes_read)
+
+    def test_readlines(self):
+        chunk = self.split_file[1]
+        lines = chunk.readlines()
+        self.assertEqual(1, self.stats.op('readlines')['count'])
+        self.assertEqual(sum(len(l) for l in lines),
+                         self.stats.op('readlines')['bytes'])
+        self.assertIsNone(self.stats.op('readline'))
+
+    def test_callbacks(self):
+        events = []
+        chunk = self.split_file[3]
+        self.stats.add_callback(events.append)
+        chunk.read(7)
+        self.assertEqual(1, len(events))
+        self.assertEqual(('read', chunk.offset, 7), events[0][:3])
+        self.stats.remove_callback(events.append)
+        chunk.read(7)
+        self.assertEqual(1, len(events))
+
+    def test_snapshot_serialisable(self):
+        for chunk in self.split_file:
+            chunk.read()
+        json.dumps(self.stats.snapshot())
+
+
+class PositionalIOStatsTest(IOStatsTest):
+    split_file_kwargs = {'positional': True}
+
+    def test_pread_calls(self):
+        for chunk in self.split_file:
+            chunk.read()
+        self.assertEqual(len(self.split_file), self.stats.calls('pread'))
+
+
+class MmapIOStatsTest(IOStatsTest):
+    split_file_kwargs = {'use_mmap': True}
@@ -0,0 +1,157 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import hashlib
+import io
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+from unittest import TestCase
+
+from splitfile.stream import StreamSplitFile
+from splitfile.upload import upload_parts
+
+from . import data_path
+from .fake_s3 import FakeS3Server
+
+
+class StreamSplitFileTest(TestCase):
+    chunk_size = 1024
+
+    def setUp(self):
+        with io.open(os.path.join(data_path, 'test.bin'), 'rb') as f:
+            self.data = f.read()
+
+    def expected(self, index):
+        chunk_size = self.__class__.chunk_size
+        return self.data[index * chunk_size:(index + 1) * chunk_size]
+
+    def pipe(self, data, repeat=1):
+        read_fd, write_fd = os.pipe()
+
+        def writer():
+            with io.open(write_fd, 'wb') as f:
+                for _ in range(repeat):
+                    f.write(data)
+
+        thread = threading.Thread(target=writer)
+        thread.daemon = True
+        thread.start()
+        return read_fd
+
+    def test_chunks(self):
+        with StreamSplitFile(self.pipe(self.data),
+                             self.__class__.chunk_size) as stream:
+            for i, chunk in enumerate(stream):
+                self.assertEqual(i, chunk.index)
+                self.assertEqual(i * self.__class__.chunk_size, chunk.offset)
+                self.assertEqual(self.expected(i), chunk.read())
+                chunk.seek(0)
+                self.assertEqual(hashlib.md5(self.expected(i)).hexdigest(),
+                                 chunk.md5)
+                self.assertEqual(b''.join(chunk), self.expected(i))
+                chunk.close()
+            self.assertEqual(len(self.data), stream.offset)
+
+    def test_bounded(self):
+        stream = StreamSplitFile(self.pipe(self.data, 4),
+                                 self.__class__.chunk_size, max_chunks=3)
+        try:
+            held = [next(stream)]
+            held[0].detach()
+            time.sleep(0.1)
+            # one buffer is held, the other two have been read ahead
+            self.assertEqual(2, stream._ready.qsize())
+            for _ in range(2):
+                held.append(next(stream))
+                held[-1].detach()
+            time.sleep(0.1)
+            self.assertEqual(0, stream._ready.qsize())
+            held[0].close()
+            self.assertRaises(ValueError, held[0].read)
+            chunk = next(stream)
+            self.assertEqual(self.expected(3), chunk.read())
+        finally:
+            stream.close()
+
+    def test_unclosed_chunks(self):
+        # the previous chunk is closed by the next step
+        stream = StreamSplitFile(self.pipe(self.data),
+                                 self.__class__.chunk_size, max_chunks=2)
+        with stream:
+            chunks = []
+            for chunk in stream:
+                chunks.append(chunk)
+                self.assertEqual(self.expected(chunk.index), chunk.read())
+            self.assertEqual(len(self.data), stream.offset)
+        self.assertTrue(all(chunk.closed for chunk in chunks))
+
+    def test_fifo(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'fifo')
+            os.mkfifo(path)
+
+            def writer():
+                with io.open(path, 'wb') as f:
+                    f.write(self.data)
+
+            thread = threading.Thread(target=writer)
+            thread.start()
+            with StreamSplitFile(path, self.__class__.chunk_size) as stream:
+                data = []
+                for chunk in stream:
+                    data.append(chunk.read())
+                    chunk.close()
+            thread.join()
+            self.assertEqual(self.data, b''.join(data))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_socket(self):
+        reader, writer = socket.socketpair()
+
+        def write():
+            writer.sendall(self.data)
+            writer.close()
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        try:
+            with StreamSplitFile(reader, self.__class__.chunk_size) as stream:
+                sizes = []
+                for chunk in stream:
+                    sizes.append(chunk.size)
+                    chunk.close()
+            self.assertEqual(len(self.data), sum(sizes))
+            self.assertTrue(all(s == self.__class__.chunk_size
+                                for s in sizes[:-1]))
+        finally:
+            thread.join()
+            reader.close()
+
+    def test_upload(self):
+        key = '/bucket/key'
+        with FakeS3Server(part_delay=0.01) as server:
+            upload_id = \
+                server.request('POST', key + '?uploads')[2].decode('ascii')
+
+            def upload_part(part_number, chunk):
+                status, _, _ = server.request(
+                    'PUT', '{}?partNumber={}&uploadId={}'.format(
+                        key, part_number, upload_id),
+                    chunk.read())
+                return status
+
+            stream = StreamSplitFile(self.pipe(self.data, 3),
+                                     self.__class__.chunk_size, max_chunks=2)
+            with stream:
+                statuses = upload_parts(stream, upload_part, workers=2)
+            self.assertTrue(all(s == 200 for s in statuses))
+            server.request('POST', '{}?uploadId={}'.format(key, upload_id))
+            self.assertEqual(self.data * 3, server.request('GET', key)[2])
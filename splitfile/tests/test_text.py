@@ -0,0 +1,175 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import io
+import os
+import random
+
+from tempfile import mkstemp
+from unittest import TestCase
+
+from splitfile import (
+    Manifest, RecordChunker, SplitFile, TextChunk, TextCodec
+)
+
+
+def read_text(chunk):
+    return chunk.read()
+
+
+def sample_text(seed=0, length=3000):
+    rand = random.Random(seed)
+    pieces = ['a', 'x y', 'é', '€', '中', '\U0001d11e', '\n',
+              '\r\n', '\r']
+    return ''.join(rand.choice(pieces) for _ in range(length))
+
+
+class TextModeTest(TestCase):
+    encoding = 'utf-8'
+    chunk_size = 100
+    split_file_kwargs = {}
+
+    def setUp(self):
+        text = sample_text()
+        data = text.encode(self.encoding, 'ignore')
+        fd, self.path = mkstemp()
+        with io.open(fd, 'wb') as f:
+            f.write(data)
+        self.data = data
+        with io.open(self.path, encoding=self.encoding, newline='') as f:
+            self.text = f.read()
+        self.split_file = self.open()
+
+    def tearDown(self):
+        self.split_file.close()
+        os.unlink(self.path)
+
+    def open(self, **kwargs):
+        options = dict(self.split_file_kwargs, mode='r',
+                       encoding=self.encoding)
+        options.update(kwargs)
+        return SplitFile(self.path, self.chunk_size, **options)
+
+    def test_chunks(self):
+        chunks = list(self.split_file)
+        self.assertTrue(all(isinstance(c, TextChunk) for c in chunks))
+        split_file = self.open(newline='')
+        try:
+            self.assertEqual(self.text,
+                             ''.join(c.read() for c in split_file))
+        finally:
+            split_file.close()
+
+    def test_boundaries(self):
+        extents = list(self.split_file.extents())
+        self.assertEqual(len(self.split_file), len(extents))
+        self.assertEqual(len(self.data), sum(size for _, size in extents))
+        for offset, size in extents[1:]:
+            # every chunk decodes on its own, \r\n pairs stay together
+            self.data[offset:offset + size].decode(
+                self.split_file.text.chunk_encoding(offset))
+            self.assertFalse(self.data[offset - 1:offset + 1] ==
+                             '\r\n'.encode(self.split_file.text
+                                           .chunk_encoding(offset)))
+
+    def test_lines(self):
+        lines = []
+        for chunk in self.split_file:
+            chunk_lines = list(chunk)
+            self.assertTrue(all(l.endswith('\n') for l in chunk_lines[:-1]))
+            lines.extend(chunk_lines)
+        translated = io.StringIO(self.text, newline=None).read()
+        self.assertEqual(translated, ''.join(lines))
+
+    def test_tell_seek(self):
+        chunk = self.split_file[1]
+        first = chunk.readline()
+        pos = chunk.tell()
+        rest = chunk.read()
+        chunk.seek(pos)
+        self.assertEqual(rest, chunk.read())
+        chunk.seek(0)
+        self.assertEqual(first + rest, chunk.read())
+
+    def test_raw(self):
+        chunk = self.split_file[2]
+        raw = self.data[chunk.offset:chunk.offset + chunk.size]
+        self.assertEqual(raw, chunk.raw.read())
+        self.assertEqual(self.split_file[2].md5, chunk.raw.md5)
+        chunk.close()
+        self.assertTrue(chunk.closed)
+        self.assertRaises(ValueError, chunk.read)
+
+    def test_map(self):
+        expected = [c.read() for c in self.split_file]
+        self.assertEqual(expected,
+                         self.split_file.map(read_text, workers=2))
+
+    def test_manifest(self):
+        manifest = self.split_file.manifest()
+        self.assertEqual([], manifest.changed_chunks(self.split_file,
+                                                     verify='sample'))
+        self.assertEqual(len(self.split_file), len(Manifest.from_dict(
+            manifest.to_dict())))
+
+
+class PositionalTextModeTest(TextModeTest):
+    split_file_kwargs = {'positional': True}
+
+
+class MmapTextModeTest(TextModeTest):
+    split_file_kwargs = {'use_mmap': True}
+
+
+class Utf16TextModeTest(TextModeTest):
+    encoding = 'utf-16'
+    split_file_kwargs = {'positional': True}
+
+
+class ShiftJisTextModeTest(TextModeTest):
+    # needs a scan of the whole file to find character boundaries
+    encoding = 'shift_jis'
+    chunk_size = 7
+
+
+class TextModeRecordTest(TestCase):
+    def test_chunker(self):
+        fd, path = mkstemp()
+        with io.open(fd, 'w', encoding='utf-8') as f:
+            f.write(''.join('€{}\n'.format(i) for i in range(100)))
+        split_file = SplitFile(path, mode='r', encoding='utf-8',
+                               chunker=RecordChunker(50))
+        try:
+            for chunk in split_file:
+                lines = chunk.readlines()
+                self.assertTrue(all(l.startswith('€') for l in lines))
+        finally:
+            split_file.close()
+            os.unlink(path)
+
+
+class TextCodecTest(TestCase):
+    def test_invalid(self):
+        self.assertRaises(ValueError, TextCodec, 'utf-8', newline='x')
+        self.assertRaises(LookupError, TextCodec, 'no-such-encoding')
+
+    def test_cut(self):
+        data = '€\r\nab'.encode('utf-8')
+        codec = TextCodec('utf-8')
+        read_at = lambda size, offset: data[offset:offset + size]
+        self.assertEqual([0, 3, len(data)],
+                         codec.snap([0, 1, len(data)], read_at, None))
+        self.assertEqual([0, 5, len(data)],
+                         codec.snap([0, 4, len(data)], read_at, None))
+        codec = TextCodec('utf-8', newline='\n')
+        self.assertEqual([0, 3, 4, len(data)],
+                         codec.snap([0, 2, 4, len(data)], read_at, None))
+
+    def test_chunk_encoding(self):
+        data = '﻿ab'.encode('utf-16-be')
+        codec = TextCodec('utf-16')
+        codec.snap([0, 2, len(data)], lambda s, o: data[o:o + s], None)
+        self.assertEqual('utf-16', codec.chunk_encoding(0))
+        self.assertEqual('utf-16-be', codec.chunk_encoding(2))
+        self.assertEqual('utf-8', TextCodec('utf-8-sig').chunk_encoding(3))
@@ -0,0 +1,94 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import io
+import os
+
+from splitfile import SplitFile
+from splitfile.upload import MultipartUploader, upload_parts
+
+from . import BaseTest, data_path
+from .fake_s3 import FakeS3Server
+
+
+class UploadError(Exception):
+    pass
+
+
+class MultipartUploadTest(BaseTest):
+    split_file_kwargs = {'positional': True}
+    key = '/bucket/key'
+
+    def setUp(self):
+        super(MultipartUploadTest, self).setUp()
+        self.server = FakeS3Server(part_delay=0.02).__enter__()
+        status, _, body = self.server.request('POST', self.key + '?uploads')
+        self.assertEqual(200, status)
+        self.upload_id = body.decode('ascii')
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        super(MultipartUploadTest, self).tearDown()
+
+    def upload_part(self, part_number, chunk):
+        status, headers, _ = self.server.request(
+            'PUT', '{}?partNumber={}&uploadId={}'.format(
+                self.key, part_number, self.upload_id),
+            chunk.read())
+        if status != 200:
+            raise UploadError(status)
+        return dict(headers)['ETag']
+
+    def complete(self):
+        self.server.request('POST', '{}?uploadId={}'.format(
+            self.key, self.upload_id))
+        return self.server.request('GET', self.key)[2]
+
+    def expected_data(self):
+        with io.open(os.path.join(data_path, 'test.bin'), 'rb') as f:
+            return f.read()
+
+    def test_upload(self):
+        etags = upload_parts(self.split_file, self.upload_part, workers=4)
+        self.assertEqual(len(self.split_file), len(etags))
+        self.assertEqual(['"{}"'.format(c.md5) for c in self.split_file],
+                         etags)
+        self.assertEqual(self.expected_data(), self.complete())
+        self.assertGreater(self.server.max_in_flight, 1)
+
+    def test_etag(self):
+        uploader = MultipartUploader(self.split_file, self.upload_part,
+                                     algorithm='md5')
+        etags = uploader.upload()
+        self.assertEqual(['"{}"'.format(leaf)
+                          for leaf in uploader.tree.leaves], etags)
+        _, headers, _ = self.server.request('POST', '{}?uploadId={}'.format(
+            self.key, self.upload_id))
+        self.assertEqual('"{}"'.format(uploader.tree.etag),
+                         dict(headers)['ETag'])
+        self.assertEqual(uploader.tree.etag, self.split_file.etag())
+
+    def test_max_in_flight(self):
+        upload_parts(self.split_file, self.upload_part, workers=4,
+                     max_in_flight=2)
+        self.assertLessEqual(self.server.max_in_flight, 2)
+        self.assertEqual(self.expected_data(), self.complete())
+
+    def test_retry(self):
+        self.server.failures = {2: 2, 5: 1}
+        upload_parts(self.split_file, self.upload_part, retry_delay=0)
+        self.assertEqual(self.expected_data(), self.complete())
+
+    def test_retries_exhausted(self):
+        self.server.failures = {3: 10}
+        self.assertRaises(UploadError, upload_parts, self.split_file,
+                          self.upload_part, retries=2, retry_delay=0)
+
+    def test_requires_positional(self):
+        split_file = SplitFile(self.split_file.name, self.chunk_size)
+        try:
+            self.assertRaises(ValueError, MultipartUploader, split_file,
+                              self.upload_part)
+        finally:
+            split_file.close()
@@ -0,0 +1,93 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import os
+
+from splitfile import BufferPool, ChunkView, IOStats, SplitFile
+
+from . import BaseTest
+
+
+class ChunkViewTest(BaseTest):
+    def expected(self, index):
+        chunk = self.split_file[index]
+        try:
+            return chunk.read()
+        finally:
+            chunk.close()
+
+    def test_slice(self):
+        length = len(self.split_file)
+        view = self.split_file[2:8:2]
+        self.assertIsInstance(view, ChunkView)
+        self.assertEqual([2, 4, 6], list(view.indices))
+        self.assertEqual(3, len(view))
+        self.assertEqual(self.expected(4), view[1].read())
+        self.assertEqual(self.expected(6), view[-1].read())
+        self.assertRaises(IndexError, view.__getitem__, 3)
+        self.assertEqual([6, 4, 2], list(view[::-1].indices))
+        self.assertEqual(list(range(length - 1, -1, -1)),
+                         list(self.split_file[::-1].indices))
+        self.assertEqual(0, len(self.split_file[length:]))
+
+    def test_iteration(self):
+        view = self.split_file[1:4]
+        data = []
+        for chunk in view:
+            data.append(chunk.read())
+        self.assertEqual([self.expected(i) for i in range(1, 4)], data)
+        self.assertEqual([self.split_file._extent(i) for i in range(1, 4)],
+                         list(view.extents()))
+
+    def test_read_chunks(self):
+        indices = [0, 1, 2, 5, 3, -1]
+        views = self.split_file.read_chunks(indices)
+        self.assertEqual([self.expected(i) for i in indices],
+                         [v.tobytes() for v in views])
+        self.assertRaises(IndexError, self.split_file.read_chunks,
+                          [len(self.split_file)])
+
+    def test_read_chunks_buffers(self):
+        buffers = [bytearray(self.chunk_size + 1) for _ in range(3)]
+        views = self.split_file[3:6].read_chunks(buffers)
+        self.assertEqual([self.expected(i) for i in range(3, 6)],
+                         [bytes(b[:self.chunk_size]) for b in buffers])
+        self.assertEqual(self.chunk_size, len(views[0]))
+        self.assertRaises(ValueError, self.split_file.read_chunks, [0, 1],
+                          buffers[:1])
+        self.assertRaises(ValueError, self.split_file.read_chunks, [0],
+                          [bytearray(10)])
+
+    def test_read_chunks_pool(self):
+        pool = BufferPool(self.chunk_size)
+        views = self.split_file[-3:].read_chunks(pool=pool)
+        self.assertEqual([self.expected(i) for i in range(-3, 0)],
+                         [v.tobytes() for v in views])
+        buffers = [v.obj for v in views]
+        for view in views:
+            pool.release(view)
+        self.assertEqual(3 * self.chunk_size, pool.free_bytes)
+        self.assertTrue(any(pool.acquire() is b for b in buffers))
+
+
+class PositionalChunkViewTest(ChunkViewTest):
+    split_file_kwargs = {'positional': True}
+
+    def test_vectored(self):
+        stats = IOStats()
+        split_file = SplitFile(self.split_file.name, self.chunk_size,
+                               stats=stats)
+        try:
+            split_file.read_chunks(range(len(split_file)))
+            if hasattr(os, 'preadv'):
+                # a single call for all (adjacent) chunks
+                self.assertEqual(1, stats.calls('preadv'))
+                self.assertEqual(split_file.size, stats.bytes_read)
+        finally:
+            split_file.close()
+
+
+class MmapChunkViewTest(ChunkViewTest):
+    split_file_kwargs = {'use_mmap': True}
+
@@ -0,0 +1,297 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import codecs
+import io
+import sys
+
+
+_NEWLINES = (None, '', '\n', '\r', '\r\n')
+
+
+class _ChunkIO(io.RawIOBase):
+    """Raw binary stream over a chunk, for `io.BufferedReader`"""
+    def __init__(self, chunk):
+        super(_ChunkIO, self).__init__()
+        self._chunk = chunk
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer_):
+        return self._chunk.readinto(buffer_)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._chunk.seek(offset, whence)
+        return self._chunk.tell()
+
+    def tell(self):
+        return self._chunk.tell()
+
+
+class TextChunk(object):
+    """A chunk of a `SplitFile` opened in text mode
+
+    Reads return text, decoded by an `io.TextIOWrapper` over the binary chunk
+    that is set up on first use. Chunks start and end on character
+    boundaries, so every chunk decodes on its own. `tell` and `seek` work
+    with the wrapper's opaque positions; everything else (`offset`, `size`,
+    `digests`, `copy_to`, ...) is passed on to the binary chunk, see `raw`.
+    """
+    __slots__ = ('_raw', '_encoding', '_errors', '_newline', '_reader')
+
+    buffer_size = 2**16
+
+    def __init__(self, raw, encoding, errors=None, newline=None):
+        self._raw = raw
+        self._encoding = encoding
+        self._errors = errors
+        self._newline = newline
+        self._reader = None
+
+    def __getattr__(self, attr):
+        return getattr(self._raw, attr)
+
+    def _text(self):
+        reader = self._reader
+        if reader is None:
+            if self._raw.closed:
+                raise ValueError('I/O operation on closed file')
+            reader = io.TextIOWrapper(
+                io.BufferedReader(_ChunkIO(self._raw),
+                                  self.__class__.buffer_size),
+                self._encoding, self._errors, self._newline)
+            self._reader = reader
+        return reader
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._text())
+
+    def next(self):
+        return self.__next__()
+
+    def read(self, size=-1):
+        return self._text().read(size)
+
+    def readline(self, size=-1):
+        return self._text().readline(size)
+
+    def readlines(self, hint=-1):
+        return self._text().readlines(hint)
+
+    def seek(self, cookie, whence=io.SEEK_SET):
+        return self._text().seek(cookie, whence)
+
+    def tell(self):
+        return self._text().tell()
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+        self._raw.close()
+
+    @property
+    def closed(self):
+        return self._raw.closed
+
+    @property
+    def raw(self):
+        """The binary `Chunk`"""
+        return self._raw
+
+    @property
+    def encoding(self):
+        return self._encoding
+
+    @property
+    def errors(self):
+        return self._errors
+
+
+class TextCodec(object):
+    """Where a file in `encoding` may be cut into chunks
+
+    Boundaries are moved forward to the next character boundary, and past
+    a `\\n` following a `\\r` unless `newline` keeps those apart. For UTF-8,
+    UTF-16, UTF-32 and single byte encodings the bytes around every boundary
+    are enough to find it; other encodings are decoded from the start of
+    the file once, like a content dependent `Chunker`.
+
+    Chunks after the first one are decoded without a byte order mark, see
+    `chunk_encoding`.
+    """
+    def __init__(self, encoding, errors=None, newline=None):
+        if newline not in _NEWLINES:
+            raise ValueError('illegal newline value: {!r}'.format(newline))
+        self.encoding = encoding
+        self.errors = errors
+        self.newline = newline
+        name = codecs.lookup(encoding).name
+        self._name = name
+        self._continuation = encoding
+        if name in ('utf-8', 'utf-8-sig'):
+            self._kind, self._width = 'utf-8', 1
+        elif name.startswith('utf-16'):
+            self._kind, self._width = 'utf-16', 2
+        elif name.startswith('utf-32'):
+            self._kind, self._width = 'fixed', 4
+        elif _single_byte(name):
+            self._kind, self._width = 'fixed', 1
+        else:
+            self._kind, self._width = 'scan', 1
+        self._resolve(b'')
+
+    def _resolve(self, header):
+        """Pick the encoding of the chunks after the first one"""
+        name = self._name
+        if name == 'utf-8-sig':
+            self._continuation = 'utf-8'
+        elif name in ('utf-16', 'utf-32'):
+            bom = {
+                'utf-16': (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE),
+                'utf-32': (codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE),
+            }[name]
+            if header.startswith(bom[0]):
+                order = 'le'
+            elif header.startswith(bom[1]):
+                order = 'be'
+            else:
+                # what the decoder assumes without a byte order mark
+                order = 'le' if sys.byteorder == 'little' else 'be'
+            self._continuation = '{}-{}'.format(name, order)
+        else:
+            self._continuation = self.encoding
+        self._cr = '\r'.encode(self._continuation)
+        self._lf = '\n'.encode(self._continuation)
+
+    def chunk_encoding(self, offset):
+        """Return the encoding to decode a chunk starting at `offset` with"""
+        return self.encoding if offset == 0 else self._continuation
+
+    def wrap(self, chunk):
+        """Return a `TextChunk` over the binary `chunk`"""
+        return TextChunk(chunk, self.chunk_encoding(chunk.offset),
+                         self.errors, self.newline)
+
+    @property
+    def _keep_crlf(self):
+        return self.newline not in ('\n', '\r')
+
+    def snap(self, boundaries, read_at, blocks):
+        """Move chunk boundaries to character boundaries
+
+        :param boundaries: chunk offsets followed by the file size
+        :param read_at: `read_at(size, offset)` returns file data
+        :param blocks: iterable over the whole file in blocks, only used if
+            the encoding needs a scan
+        :returns: the new boundaries, empty chunks are dropped
+        """
+        if len(boundaries) < 3:
+            return list(boundaries)
+        size = boundaries[-1]
+        self._resolve(read_at(4, 0))
+        if self._kind == 'scan':
+            cuts = self._scan_cuts(boundaries[1:-1], blocks)
+        else:
+            cuts = [self._cut(b, read_at) for b in boundaries[1:-1]]
+        snapped = [0]
+        for cut in cuts:
+            if snapped[-1] < cut < size:
+                snapped.append(cut)
+        snapped.append(size)
+        return snapped
+
+    def _cut(self, offset, read_at):
+        width = self._width
+        # offsets of UTF-16/32 code units are aligned to the file start (a
+        # byte order mark has the same width)
+        offset += -offset % width
+        start = max(offset - 4, 0)
+        data = bytearray(read_at(16, start))
+        i = offset - start
+        if self._kind == 'utf-8':
+            end = min(i + 3, len(data))
+            while i < end and 0x80 <= data[i] < 0xC0:
+                i += 1
+        elif self._kind == 'utf-16' and i >= 2:
+            # don't separate a surrogate pair
+            high = data[i - 1] if self._continuation.endswith('le') \
+                else data[i - 2]
+            if 0xD8 <= high <= 0xDB:
+                i += 2
+        if self._keep_crlf:
+            cr, lf = self._cr, self._lf
+            if i >= len(cr) and bytes(data[i - len(cr):i]) == cr and \
+                    bytes(data[i:i + len(lf)]) == lf:
+                i += len(lf)
+        return start + i
+
+    def _scan_cuts(self, targets, blocks):
+        # the decoder is at a character boundary when it holds no bytes and
+        # is back in its initial state
+        decoder = codecs.getincrementaldecoder(self.encoding)('replace')
+        initial = decoder.getstate()
+        keep_crlf = self._keep_crlf
+        targets = iter(targets)
+        target = next(targets, None)
+        cuts = []
+        pos = 0
+        last = ''
+        # offset after a `\r` at a boundary and the text decoded since
+        cr_at = None
+        after_cr = ''
+        for block in blocks:
+            i = 0
+            n = len(block)
+            while i < n:
+                if target is None:
+                    return cuts
+                if pos < target:
+                    step = min(n - i, target - pos)
+                    text = decoder.decode(block[i:i + step])
+                    i += step
+                    pos += step
+                    if text:
+                        last = text[-1]
+                    continue
+                if decoder.getstate() == initial:
+                    cut = None
+                    if cr_at is not None:
+                        if after_cr:
+                            cut = pos if after_cr.startswith('\n') \
+                                else cr_at
+                    elif keep_crlf and last == '\r':
+                        cr_at = pos
+                        after_cr = ''
+                    else:
+                        cut = pos
+                    if cut is not None:
+                        cuts.append(cut)
+                        cr_at = None
+                        while target is not None and target <= cut:
+                            target = next(targets, None)
+                        continue
+                text = decoder.decode(block[i:i + 1])
+                i += 1
+                pos += 1
+                if text:
+                    last = text[-1]
+                    if cr_at is not None:
+                        after_cr += text
+        return cuts
+
+
+def _single_byte(name):
+    if name in ('ascii', 'iso8859-1', 'latin-1'):
+        return True
+    decoder = codecs.lookup(name).incrementaldecoder
+    module = sys.modules.get(getattr(decoder, '__module__', None))
+    # charmap codecs map every byte to one character
+    return hasattr(module, 'decoding_table')
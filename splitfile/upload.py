@@ -0,0 +1,162 @@
+from __future__ import (
+    absolute_import, division, print_function, unicode_literals
+)
+
+import logging
+import time
+
+from concurrent.futures import (
+    FIRST_COMPLETED, ThreadPoolExecutor, wait
+)
+
+from .merkle import MerkleTree
+from .stream import StreamChunk
+
+
+logger = logging.getLogger(__name__)
+
+
+class MultipartUploader(object):
+    """MultipartUploader class
+
+    Drive the chunks of a `SplitFile` through a bounded pool of worker threads,
+    calling `upload_part(part_number, chunk)` for each one. Part numbers start
+    at 1 (as with S3 multipart uploads). Parts that raise one of
+    `retry_exceptions` are rewound and retried individually. Each chunk is
+    closed once its part is done.
+
+    The `SplitFile` must have been opened with `positional=True` so that its
+    chunks can be read from several threads at the same time. A
+    `StreamSplitFile` works as well, in which case parts are uploaded while
+    the stream is still being read.
+    """
+    def __init__(self, split_file, upload_part, workers=4,
+                 max_in_flight=None, retries=3, retry_delay=0.5,
+                 retry_exceptions=(Exception, ), planner=None,
+                 algorithm=None):
+        """Constructor
+
+        :param split_file: the file whose chunks should be uploaded
+        :type split_file: SplitFile, StreamSplitFile
+        :param upload_part: callable taking `(part_number, chunk)`; its return
+            value is collected as the result for that part
+        :param workers: number of worker threads
+        :param max_in_flight: maximum number of parts submitted but not yet
+            finished (defaults to `workers`)
+        :param retries: number of times a failed part is retried
+        :param retry_delay: initial delay in seconds before retrying a part,
+            doubled after every failed attempt
+        :param retry_exceptions: exception types that cause a part to be
+            retried, anything else fails the upload immediately
+        :param planner: if given, the throughput of every successful part
+            upload is reported to this planner
+        :type planner: PartPlanner
+        :param algorithm: if given, every part is hashed with this digest
+            algorithm right before it is uploaded (so `upload_part` finds
+            the digest cached and reads the part from the page cache) and
+            `tree` holds a `MerkleTree` of the parts after the upload
+        """
+        if not split_file.positional:
+            raise ValueError('split_file must be opened with positional=True')
+        if workers < 1:
+            raise ValueError('workers must be >= 1')
+        max_in_flight = workers if max_in_flight is None else max_in_flight
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be >= 1')
+        if planner is not None:
+            upload_part = planner.timed(upload_part)
+        self._split_file = split_file
+        self._upload_part = upload_part
+        self._workers = workers
+        self._max_in_flight = max_in_flight
+        self._retries = retries
+        self._retry_delay = retry_delay
+        self._retry_exceptions = tuple(retry_exceptions)
+        self._algorithm = algorithm
+        self._leaves = {}
+        self._tree = None
+
+    def _upload(self, part_number, chunk):
+        attempt = 0
+        try:
+            if self._algorithm is not None:
+                algorithm = self._algorithm
+                self._leaves[part_number] = (
+                    chunk.digests((algorithm, ))[algorithm],
+                    (chunk.offset, chunk.size))
+            while True:
+                chunk.seek(0)
+                try:
+                    return self._upload_part(part_number, chunk)
+                except self._retry_exceptions as e:
+                    if attempt >= self._retries:
+                        raise
+                    delay = self._retry_delay * 2 ** attempt
+                    attempt += 1
+                    logger.warning('part %d failed (%r), retrying in %.2fs '
+                                   '(attempt %d of %d)', part_number, e,
+                                   delay, attempt, self._retries)
+                    time.sleep(delay)
+        finally:
+            chunk.close()
+
+    def upload(self):
+        """Upload all parts
+
+        :returns: the results of `upload_part`, ordered by part number
+        :rtype: list
+        """
+        results = []
+        pending = {}
+        self._leaves = {}
+        self._tree = None
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            try:
+                for index, chunk in enumerate(self._split_file):
+                    if isinstance(chunk, StreamChunk):
+                        # closed by the worker, not by the next step
+                        chunk.detach()
+                    results.append(None)
+                    future = executor.submit(self._upload, index + 1, chunk)
+                    pending[future] = index
+                    if len(pending) >= self._max_in_flight:
+                        self._collect(pending, results)
+                while pending:
+                    self._collect(pending, results)
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+        if self._algorithm is not None:
+            leaves = [self._leaves[n] for n in sorted(self._leaves)]
+            self._tree = MerkleTree([leaf for leaf, _ in leaves],
+                                    self._algorithm,
+                                    [extent for _, extent in leaves])
+        return results
+
+    @property
+    def tree(self):
+        """`MerkleTree` of the uploaded parts (requires `algorithm`)
+
+        With `algorithm='md5'` its `etag` is the ETag S3 reports for the
+        completed upload.
+        """
+        return self._tree
+
+    @staticmethod
+    def _collect(pending, results):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = pending.pop(future)
+            results[index] = future.result()
+
+
+def upload_parts(split_file, upload_part, **kwargs):
+    """Upload the chunks of `split_file` in parallel
+
+    See `MultipartUploader` for the supported keyword arguments.
+
+    :returns: the results of `upload_part`, ordered by part number
+    :rtype: list
+    """
+    return MultipartUploader(split_file, upload_part, **kwargs).upload()